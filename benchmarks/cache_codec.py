@@ -0,0 +1,132 @@
+"""Bytes per cache entry and encode/decode time, per value codec.
+
+Usage (from the repository root):
+
+    uv run python -m benchmarks.cache_codec
+    uv run python -m benchmarks.cache_codec --redis-url redis://localhost:6379/15
+
+Payloads have the shape of what the app caches: a route decision, a
+conversation answer, the documents list, a long generated answer, and a
+retrieval payload (4 chunks with metadata). ``json`` is the previous
+``json.dumps`` encoding; the others go through
+``core.cache.encode_value`` with ``CACHE__COMPRESSION`` set accordingly.
+With ``--redis-url``, ``MEMORY USAGE`` of each stored key is reported too
+(the database is flushed).
+"""
+
+import argparse
+import json
+import random
+import time
+
+from src.ai_assistant.core import cache
+from src.ai_assistant.core.config import config
+
+SYLLABLES = "ba ce di fo gu ka le mi no pu ra se ti vo zu an en in on ur".split()
+
+
+def vocabulary(rng: random.Random, size: int = 3000) -> list[str]:
+    return [
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+        for _ in range(size)
+    ]
+
+
+WORDS = vocabulary(random.Random(0))
+# Zipf-like frequencies, so text compresses roughly like prose does.
+WEIGHTS = [1 / (rank + 1) for rank in range(len(WORDS))]
+
+
+def text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(WORDS, WEIGHTS, k=words))
+
+
+def payloads(rng: random.Random) -> dict[str, dict | list]:
+    chunk = lambda i: {  # noqa: E731
+        "page_content": text(rng, 170),
+        "metadata": {
+            "source": f"/app/docs/handbook_{i}.pdf",
+            "chunk_id": f"/app/docs/handbook_{i}.pdf_{rng.getrandbits(128):032x}",
+            "created_at": "2026-01-12T09:30:00.000000+00:00",
+            "file_size": 0.41,
+            "page": i,
+            "relevance_score": rng.random(),
+        },
+    }
+    return {
+        "route": {
+            "use_rag": True,
+            "search_query": text(rng, 8),
+            "sub_queries": [text(rng, 5)],
+        },
+        "conversation": {
+            "answer": text(rng, 100),
+            "document_sources": ["a.pdf", "b.pdf"],
+        },
+        "documents": {
+            "documents": [
+                {
+                    "source": f"handbook_{i}.pdf",
+                    "date": "2026-01-12T09:30:00",
+                    "size": 0.41,
+                }
+                for i in range(5)
+            ]
+        },
+        "generate": {"answer": text(rng, 450)},
+        "retrieval": [chunk(i) for i in range(4)],
+    }
+
+
+def timed(fn, arg, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(arg)
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--redis-url")
+    args = parser.parse_args()
+
+    values = payloads(random.Random(7))
+    codecs = {
+        "json": (lambda v: json.dumps(v).encode(), json.loads),
+        "msgpack": "none",
+        "msgpack+zlib": "zlib",
+        "msgpack+zstd": "zstd",
+    }
+    redis = None
+    if args.redis_url:
+        import redis as redis_lib
+
+        redis = redis_lib.Redis.from_url(args.redis_url)
+        redis.flushdb()
+
+    print(
+        f"{'payload':<13} {'codec':<13} {'bytes':>7} {'redis':>7} {'enc µs':>8} {'dec µs':>8}"
+    )
+    for name, value in values.items():
+        for codec, setting in codecs.items():
+            if isinstance(setting, tuple):
+                encode, decode = setting
+            else:
+                config.cache.compression = setting
+                encode, decode = cache.encode_value, cache.decode_value
+            raw = encode(value)
+            assert decode(raw) == value
+            memory = "-"
+            if redis is not None:
+                key = f"bench:{name}:{codec}"
+                redis.set(key, raw)
+                memory = str(redis.memory_usage(key))
+            print(
+                f"{name:<13} {codec:<13} {len(raw):>7} {memory:>7} "
+                f"{timed(encode, value, args.rounds):>8.1f} {timed(decode, raw, args.rounds):>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Memory growth of conversation checkpointers under synthetic multi-thread load.
+
+Usage (from the repository root):
+
+    uv run python -m benchmarks.checkpointer_memory --threads 500 --turns 10
+
+Runs a one-node message graph (same ``add_messages`` reducer as the agent)
+for ``--threads`` concurrent conversations of ``--turns`` turns each and
+reports Python heap growth (tracemalloc) per backend. With ``--redis-url``
+the Redis backend is measured through ``INFO memory`` instead.
+"""
+
+import argparse
+import asyncio
+import gc
+import tracemalloc
+import uuid
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, StateGraph
+from langgraph.graph.message import add_messages
+
+from src.ai_assistant.graph.checkpointer import BoundedMemorySaver, RedisSaver
+
+
+class State(TypedDict):
+    messages: Annotated[list[AnyMessage], add_messages]
+
+
+def build(checkpointer, answer_chars: int):
+    answer = "a" * answer_chars
+    graph = StateGraph(State)
+    graph.add_node("reply", lambda state: {"messages": [AIMessage(answer)]})
+    graph.set_entry_point("reply")
+    graph.add_edge("reply", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+async def drive(app, threads: int, turns: int, prompt_chars: int, concurrency: int):
+    prompt = "q" * prompt_chars
+    thread_ids = [str(uuid.uuid4()) for _ in range(threads)]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def conversation(thread_id: str):
+        for _ in range(turns):
+            async with semaphore:
+                await app.ainvoke(
+                    {"messages": [HumanMessage(prompt)]},
+                    {"configurable": {"thread_id": thread_id}},
+                )
+
+    await asyncio.gather(*(conversation(t) for t in thread_ids))
+
+
+async def measure_python(name: str, checkpointer, args) -> None:
+    app = build(checkpointer, args.answer_chars)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    await drive(app, args.threads, args.turns, args.prompt_chars, args.concurrency)
+    gc.collect()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    growth = (after - before) / 1024 / 1024
+    print(
+        f"{name:<28} retained={growth:>8.1f} MiB  peak={peak / 1024 / 1024:>8.1f} MiB  "
+        f"per-thread={growth * 1024 / args.threads:>7.1f} KiB"
+    )
+
+
+async def measure_redis(args) -> None:
+    saver = RedisSaver(args.redis_url, f"bench:{uuid.uuid4()}:", args.idle_ttl)
+    client = saver._get_client()
+    before = (await client.info("memory"))["used_memory"]
+    await drive(
+        build(saver, args.answer_chars),
+        args.threads,
+        args.turns,
+        args.prompt_chars,
+        args.concurrency,
+    )
+    after = (await client.info("memory"))["used_memory"]
+    growth = (after - before) / 1024 / 1024
+    print(
+        f"{'RedisSaver':<28} redis used_memory +{growth:>6.1f} MiB  "
+        f"per-thread={growth * 1024 / args.threads:>7.1f} KiB"
+    )
+    async for key in client.scan_iter(match=f"{saver.key_prefix}*"):
+        await client.delete(key)
+    await saver.aclose()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=500)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--prompt-chars", type=int, default=6000)
+    parser.add_argument("--answer-chars", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--max-threads", type=int, default=1000)
+    parser.add_argument("--idle-ttl", type=int, default=3600)
+    parser.add_argument("--redis-url")
+    args = parser.parse_args()
+
+    print(
+        f"{args.threads} threads x {args.turns} turns, "
+        f"{args.prompt_chars}+{args.answer_chars} chars per turn"
+    )
+    await measure_python("InMemorySaver", InMemorySaver(), args)
+    await measure_python(
+        f"BoundedMemorySaver({args.max_threads})",
+        BoundedMemorySaver(args.max_threads, args.idle_ttl),
+        args,
+    )
+    if args.redis_url:
+        await measure_redis(args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+"""Chunk shape per splitter on structured, PDF-like pages.
+
+Usage (from the repository root):
+
+    uv run python -m benchmarks.chunking
+    uv run python -m benchmarks.chunking --pages 200 --seed 3
+
+Pages look like ``PyPDFLoader`` output: one line per text line, no blank
+lines, numbered section headings, and tables of aligned columns. Sections
+run across page breaks. Token counts use the ``chars_per_token`` estimate
+(the embedding model's tokenizer isn't loaded here) for both splitters.
+
+``structure`` runs twice: at its default size (what the embedding model
+reads) and at the ``recursive`` splitter's size in tokens, for a like-for-like
+comparison.
+
+Reported per splitter: chunks, mean tokens per chunk, tables cut across
+chunks (of the tables within one page: pages are split separately, so every
+splitter cuts a table that straddles a page break), headings that fall
+inside a chunk instead of starting one (that chunk mixes two sections), the
+mean number of chunks a section is spread over (what
+retrieval must fetch to see a whole section), and split time.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from langchain_core.documents import Document
+
+from benchmarks.load import WORDS
+from src.ai_assistant.core.config import config
+from src.ai_assistant.rag.context import estimate_tokens
+from src.ai_assistant.rag.splitter import get_splitter
+
+LINE_CHARS = 90
+
+
+def sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(8, 20))
+    return " ".join(words).capitalize() + "."
+
+
+def wrap(text: str) -> list[str]:
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > LINE_CHARS:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}".strip()
+    return lines + [line]
+
+
+def table(rng: random.Random) -> list[str]:
+    header = "Region     Days     Budget     Approved"
+    rows = [
+        f"R{i:<9} {rng.randint(10, 30):<8} {rng.randint(1, 99) * 100:<10} {rng.randint(1, 40)}"
+        for i in range(rng.randint(5, 14))
+    ]
+    return [header, *rows]
+
+
+def corpus(rng: random.Random, pages: int, page_lines: int = 45):
+    """Pages, and the heading, tables and text lines of each section."""
+    lines: list[str] = []
+    sections: list[dict] = []
+    for number in range(1, pages * 2):
+        heading = f"{number} {rng.choice(WORDS).title()} {rng.choice(WORDS)}"
+        section = {"heading": heading, "tables": [], "lines": [heading]}
+        sections.append(section)
+        lines.append(heading)
+        for _ in range(rng.randint(1, 6)):
+            if rng.random() < 0.25:
+                rows = table(rng)
+                section["tables"].append("\n".join(rows))
+                lines.extend(rows)
+            paragraph = wrap(" ".join(sentence(rng) for _ in range(rng.randint(2, 6))))
+            section["lines"].extend(paragraph)
+            lines.extend(paragraph)
+        if len(lines) >= pages * page_lines:
+            break
+    docs = [
+        Document(
+            "\n".join(lines[i : i + page_lines]),
+            metadata={"source": "handbook.pdf", "page": p},
+        )
+        for p, i in enumerate(range(0, len(lines), page_lines))
+    ]
+    return docs, sections
+
+
+def measure(
+    name: str, chunk_tokens: int | None, docs: list[Document], sections: list[dict]
+) -> dict:
+    config.rag.splitter = name
+    config.rag.chunk_tokens = chunk_tokens
+    splitter = get_splitter()
+    start = time.perf_counter()
+    chunks = splitter.split_documents(docs)
+    elapsed = time.perf_counter() - start
+
+    texts = [c.page_content for c in chunks]
+    chunk_lines = [set(t.split("\n")) for t in texts]
+    tables = [
+        t
+        for s in sections
+        for t in s["tables"]
+        if any(t in d.page_content for d in docs)
+    ]
+    headings = {s["heading"] for s in sections}
+    # A section's text lines are unique, so a chunk holding one holds part of it.
+    spread = [
+        sum(not lines.isdisjoint(s["lines"]) for lines in chunk_lines) for s in sections
+    ]
+
+    return {
+        "chunks": len(chunks),
+        "tokens": statistics.mean(estimate_tokens(t) for t in texts),
+        "tables_cut": sum(not any(t in c for c in texts) for t in tables),
+        "tables": len(tables),
+        "mixed": sum(line in headings for t in texts for line in t.split("\n")[1:]),
+        "spread": statistics.mean(spread),
+        "ms": elapsed * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    docs, sections = corpus(random.Random(args.seed), args.pages)
+    tables = [t for s in sections for t in s["tables"]]
+    straddling = sum(not any(t in d.page_content for d in docs) for t in tables)
+    print(
+        f"{len(docs)} pages, {len(sections)} sections, "
+        f"{len(tables)} tables ({straddling} across a page break)\n"
+    )
+    print(
+        f"{'splitter':<16} {'chunks':>7} {'tokens':>7} {'tables cut':>11} "
+        f"{'mid-chunk headings':>19} {'chunks/section':>15} {'ms':>7}"
+    )
+    same_size = estimate_tokens("x" * config.rag.chunk_size)
+    runs = [("recursive", None), ("structure", None), ("structure", same_size)]
+    for name, chunk_tokens in runs:
+        r = measure(name, chunk_tokens, docs, sections)
+        label = f"{name} @{chunk_tokens}" if chunk_tokens else name
+        print(
+            f"{label:<16} {r['chunks']:>7} {r['tokens']:>7.0f} "
+            f"{r['tables_cut']:>4}/{r['tables']:<6} {r['mixed']:>19} {r['spread']:>15.2f} {r['ms']:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
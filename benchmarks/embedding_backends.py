@@ -0,0 +1,143 @@
+"""Compare embedding backends: cosine parity against PyTorch and throughput.
+
+Usage (from the repository root):
+
+    uv run python -m benchmarks.embedding_backends --backend onnx
+    uv run python -m benchmarks.embedding_backends --backend onnx \\
+        --model-file onnx/model_qint8_avx512_vnni.onnx
+    uv run python -m benchmarks.embedding_backends \\
+        --export-quantized models/e5-base-qint8 --quantization avx512_vnni
+
+The reference is always the ``torch`` backend of ``RAG__EMBEDDING_MODEL``.
+Exits non-zero when the minimum cosine similarity is below ``--min-cosine``.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from src.ai_assistant.core.config import config
+from src.ai_assistant.rag.embeddings import (
+    SentenceTransformerEmbeddings,
+    load_embedding_model,
+)
+
+
+SAMPLE_TEXTS = [
+    "What is the company's mission?",
+    "Quarterly revenue grew by 12% compared to the previous year.",
+    "The warranty covers manufacturing defects for two years from purchase.",
+    "Какие документы нужны для оформления отпуска?",
+    "Die Lieferung erfolgt innerhalb von fünf Werktagen.",
+    "La réunion est reportée à jeudi prochain à 14 heures.",
+    "Employees must complete the security training before accessing production.",
+    "Returns are accepted within 30 days if the product is unused.",
+]
+
+
+def load(
+    backend: str, model_file: str | None
+) -> tuple[SentenceTransformerEmbeddings, float]:
+    # Through the app's own loader, so the numbers are those of serving.
+    config.rag.embedding_backend = backend
+    config.rag.embedding_model_file = model_file
+
+    start = time.perf_counter()
+    embeddings = load_embedding_model()
+    return embeddings, time.perf_counter() - start
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+
+def throughput(
+    embeddings: SentenceTransformerEmbeddings, batch: int, rounds: int
+) -> dict:
+    texts = (SAMPLE_TEXTS * (batch // len(SAMPLE_TEXTS) + 1))[:batch]
+    embeddings.embed_documents(texts)  # warm up
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        embeddings.embed_documents(texts)
+    batch_rate = batch * rounds / (time.perf_counter() - start)
+
+    latencies = []
+    for text in SAMPLE_TEXTS * rounds:
+        t0 = time.perf_counter()
+        embeddings.embed_query(text)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    return {
+        "texts_per_s": batch_rate,
+        "query_p50_ms": statistics.median(latencies),
+        "query_p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def export_quantized(target: str, quantization: str) -> None:
+    from sentence_transformers import (
+        SentenceTransformer,
+        export_dynamic_quantized_onnx_model,
+    )
+
+    model = SentenceTransformer(config.rag.embedding_model, backend="onnx")
+    model.save_pretrained(target)
+    export_dynamic_quantized_onnx_model(model, quantization, target)
+    print(
+        f"Exported to {target}; set RAG__EMBEDDING_MODEL={target} "
+        f"RAG__EMBEDDING_BACKEND=onnx "
+        f"RAG__EMBEDDING_MODEL_FILE=onnx/model_qint8_{quantization}.onnx"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default=config.rag.embedding_backend)
+    parser.add_argument("--model-file", default=config.rag.embedding_model_file)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--export-quantized", metavar="DIR")
+    parser.add_argument("--quantization", default="avx512_vnni")
+    args = parser.parse_args()
+
+    if args.export_quantized:
+        export_quantized(args.export_quantized, args.quantization)
+        return 0
+
+    reference, reference_load = load("torch", None)
+    candidate, candidate_load = load(args.backend, args.model_file)
+
+    similarity = cosine(
+        np.array(reference.embed_documents(SAMPLE_TEXTS)),
+        np.array(candidate.embed_documents(SAMPLE_TEXTS)),
+    )
+
+    rows = [
+        ("torch", reference_load, throughput(reference, args.batch, args.rounds)),
+        (
+            f"{args.backend}:{args.model_file or 'default'}",
+            candidate_load,
+            throughput(candidate, args.batch, args.rounds),
+        ),
+    ]
+
+    print(f"{'backend':<40} {'load s':>8} {'texts/s':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, load_s, stats in rows:
+        print(
+            f"{name:<40} {load_s:>8.2f} {stats['texts_per_s']:>10.1f} "
+            f"{stats['query_p50_ms']:>8.2f} {stats['query_p95_ms']:>8.2f}"
+        )
+    print(f"cosine vs torch: min={similarity.min():.4f} mean={similarity.mean():.4f}")
+
+    return 0 if similarity.min() >= args.min_cosine else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
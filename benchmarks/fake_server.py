@@ -0,0 +1,29 @@
+"""The app with offline fakes, for benchmarks that start real server processes.
+
+    gunicorn -c gunicorn.conf.py benchmarks.fake_server:app
+
+gunicorn.conf.py imports the config before this module, so the environment
+overrides ``install()`` would set (``RAG__DB_URL=:memory:`` and so on) must
+already be in the environment of the server process; see
+``benchmarks.workers_memory``. Redis is fakeredis in each process, so the
+Redis checkpointer is replaced by a per-process in-memory one: conversations
+are not shared between workers, which these benchmarks don't need.
+"""
+
+import os
+
+from benchmarks.fakes import FakeLatency, install
+
+install(
+    FakeLatency(llm_ms=float(os.environ.get("BENCH_LLM_MS", "50")), llm_jitter_ms=0),
+    synthetic_model=True,
+)
+
+import src.ai_assistant.graph.checkpointer as checkpointer  # noqa: E402
+from src.ai_assistant.core.config import config  # noqa: E402
+
+checkpointer.RedisSaver = lambda *args: checkpointer.BoundedMemorySaver(
+    config.checkpoint.max_threads, config.checkpoint.idle_ttl_seconds
+)
+
+from src.ai_assistant.main import app  # noqa: E402, F401
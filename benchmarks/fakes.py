@@ -0,0 +1,222 @@
+"""Offline stand-ins for the LLM, embedding model, reranker and Redis.
+
+``install()`` must run before anything under ``src.ai_assistant`` is imported:
+settings are read from the environment when the config module loads, and
+the factories patched here are looked up when resources are first built.
+Everything is deterministic, so runs are comparable; latencies are simulated
+with ``asyncio.sleep`` (LLM) or ``time.sleep`` on the inference thread
+(embeddings, reranker) to keep the event-loop behaviour realistic.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+GREETINGS = ("hi", "hello", "thanks", "thank you", "good morning")
+
+
+@dataclass
+class FakeLatency:
+    llm_ms: float = 300.0
+    llm_jitter_ms: float = 100.0
+    embed_ms: float = 15.0  # per batch
+    rerank_ms: float = 1.0  # per (query, passage) pair
+
+
+def _jitter(text: str, spread_ms: float) -> float:
+    digest = int.from_bytes(hashlib.sha256(text.encode()).digest()[:4], "big")
+    return (digest / 0xFFFFFFFF - 0.5) * 2 * spread_ms
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic chat model answering the router and the agent."""
+
+    latency_ms: float = 300.0
+    jitter_ms: float = 100.0
+    answer_chars: int = 600
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _reply(self, messages: list[BaseMessage]) -> str:
+        text = str(messages[-1].content)
+
+        if match := re.search(r"<user_input>\s*(.*?)\s*</user_input>", text, re.S):
+            query = match.group(1)
+            return json.dumps(
+                {
+                    "use_rag": not query.lower().startswith(GREETINGS),
+                    "search_query": query,
+                    "sub_queries": [],
+                }
+            )
+        answer = f"Based on the documents: {text[-200:]} "
+        return (answer * (self.answer_chars // len(answer) + 1))[: self.answer_chars]
+
+    def _result(self, messages: list[BaseMessage]) -> ChatResult:
+        content = self._reply(messages)
+        input_chars = sum(len(str(m.content)) for m in messages)
+        message = AIMessage(
+            content,
+            usage_metadata={
+                "input_tokens": input_chars // 4,
+                "output_tokens": len(content) // 4,
+                "total_tokens": (input_chars + len(content)) // 4,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def with_structured_output(self, schema, **kwargs):
+        # The router prompt is answered with JSON; parse it like json_schema mode.
+        return self | RunnableLambda(
+            lambda message: schema.model_validate_json(message.content)
+        )
+
+    def _delay(self, messages: list[BaseMessage]) -> float:
+        key = str(messages[-1].content)
+        return max(0.0, self.latency_ms + _jitter(key, self.jitter_ms)) / 1000
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._delay(messages))
+        return self._result(messages)
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        await asyncio.sleep(self._delay(messages))
+        return self._result(messages)
+
+
+class SlowFakeEmbedding(DeterministicFakeEmbedding):
+    latency_ms: float = 15.0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self.latency_ms / 1000)
+        return super().embed_documents(texts)
+
+
+class SyntheticEncoderEmbedding(Embeddings):
+    """Random-weight torch encoder shaped like multilingual-e5-base.
+
+    ~278M fp32 parameters (250k-token embedding table, 12 layers of 768), so
+    memory footprint and forward-pass cost are those of the real model, for
+    runs where it can't be downloaded. The vectors carry no meaning.
+    """
+
+    def __init__(self, vocab: int = 250002, hidden: int = 768, layers: int = 12):
+        import torch
+        from torch import nn
+
+        torch.manual_seed(0)
+        self.vocab = vocab
+        self.embedding = nn.Embedding(vocab, hidden)
+        layer = nn.TransformerEncoderLayer(hidden, 12, 4 * hidden, batch_first=True)
+        self.encoder = nn.TransformerEncoder(
+            layer, layers, enable_nested_tensor=False
+        ).eval()
+
+    def _token_ids(self, text: str) -> list[int]:
+        words = text.lower().split()[:128] or [""]
+        return [
+            int(hashlib.md5(w.encode()).hexdigest()[:8], 16) % self.vocab for w in words
+        ]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        import torch
+
+        ids = [self._token_ids(t) for t in texts]
+        width = max(map(len, ids))
+        batch = torch.tensor([row + [0] * (width - len(row)) for row in ids])
+        with torch.inference_mode():
+            hidden = self.encoder(self.embedding(batch)).mean(dim=1)
+            return torch.nn.functional.normalize(hidden, dim=-1).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+def fake_reranker(latency: FakeLatency):
+    from src.ai_assistant.rag.reranker import BatchedReranker
+
+    class FakeReranker(BatchedReranker):
+        """Keeps the real batching path; scores pairs by word overlap."""
+
+        def _score_pairs(self, pairs: list[list[str]]) -> np.ndarray:
+            time.sleep(latency.rerank_ms * len(pairs) / 1000)
+            scores = []
+            for query, text in pairs:
+                words = set(query.lower().split())
+                scores.append(
+                    len(words & set(text.lower().split())) / (len(words) or 1)
+                )
+            return np.array(scores)
+
+    return FakeReranker(ranker=SimpleNamespace(llm_model=None))
+
+
+def install(
+    latency: FakeLatency, real_models: bool = False, synthetic_model: bool = False
+) -> dict[str, Any]:
+    """Point the app at in-memory backends and fake models. Returns handles.
+
+    ``synthetic_model`` keeps the real embedding path (model loading, batching)
+    with ``SyntheticEncoderEmbedding`` as the model; the reranker is faked.
+    """
+    docs_folder = tempfile.mkdtemp(prefix="bench-docs-")
+    os.environ["RAG__DB_URL"] = ":memory:"
+    os.environ["RAG__DOCS_FOLDER"] = docs_folder
+    os.environ["CACHE__ENABLED"] = "true"
+    os.environ.setdefault("CHECKPOINT__BACKEND", "memory")
+    os.environ["LANGCHAIN__TRACING_V2"] = "false"
+
+    import fakeredis
+    import langchain_google_genai
+
+    def chat_model(**kwargs) -> FakeChatModel:
+        return FakeChatModel(
+            latency_ms=latency.llm_ms,
+            jitter_ms=latency.llm_jitter_ms,
+            callbacks=kwargs.get("callbacks"),
+        )
+
+    langchain_google_genai.ChatGoogleGenerativeAI = chat_model
+
+    import src.ai_assistant.core.cache as cache
+
+    redis = fakeredis.aioredis.FakeRedis()
+    cache._redis_client = redis
+
+    if synthetic_model:
+        import src.ai_assistant.rag.embeddings as embeddings
+        import src.ai_assistant.rag.pipeline as pipeline
+
+        embeddings.load_embedding_model = SyntheticEncoderEmbedding
+        pipeline.BatchedReranker = lambda: fake_reranker(latency)
+    elif not real_models:
+        import src.ai_assistant.rag.pipeline as pipeline
+        import src.ai_assistant.rag.vector_store as vector_store
+        from src.ai_assistant.core.config import config
+        from src.ai_assistant.rag.embeddings import BatchedEmbeddings
+
+        vector_store.get_embeddings = lambda profile=None: BatchedEmbeddings(
+            SlowFakeEmbedding(size=768, latency_ms=latency.embed_ms),
+            profile or config.rag.embedding_profile,
+        )
+        pipeline.BatchedReranker = lambda: fake_reranker(latency)
+
+    return {"redis": redis, "docs_folder": docs_folder}
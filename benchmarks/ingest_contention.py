@@ -0,0 +1,138 @@
+"""Chat latency while documents are being indexed, with and without priority.
+
+Usage (from the repository root):
+
+    uv run python -m benchmarks.ingest_contention --docs 4 --concurrency 8
+
+Each mode runs in a fresh process (settings are read at import). The app is
+in-process behind httpx's ASGI transport with the offline fakes, except for
+the embedding model: ``SyntheticEncoderEmbedding`` has the size and forward
+cost of multilingual-e5-base, so indexing competes with query embeddings for
+the CPU as the real model would.
+
+``--docs`` uploads run one after the other while ``--concurrency`` clients
+send conversations with distinct prompts (no cache hits) until the last
+upload finishes. Reported: chat latency during indexing, total indexing time.
+
+- ``priority``: the default ``SCHEDULER__*`` settings.
+- ``off``: no ingest cap and no deferral to chat, i.e. first come first served.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+
+from benchmarks.fakes import FakeLatency, install
+from benchmarks.load import TOPICS, make_document, summarize, timed, WORDS
+
+MODES = {
+    "priority": {},
+    "off": {
+        "SCHEDULER__INGEST_MAX_CONCURRENCY": "1000",
+        "SCHEDULER__INGEST_MAX_DEFER_SECONDS": "0",
+    },
+}
+
+
+async def child(args) -> dict:
+    install(FakeLatency(llm_ms=args.llm_ms, llm_jitter_ms=0), synthetic_model=True)
+
+    import httpx
+
+    from src.ai_assistant.core.resources import resources
+    from src.ai_assistant.main import get_app
+
+    await asyncio.to_thread(resources.warmup)
+    rng = random.Random(args.seed)
+    transport = httpx.ASGITransport(app=get_app())
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+        chat: list[float] = []
+        indexing = asyncio.Event()
+
+        async def upload_all() -> float:
+            start = time.perf_counter()
+            for i in range(args.docs):
+                topic = TOPICS[i % len(TOPICS)]
+                body = make_document(rng, topic, args.paragraphs).encode()
+                files = {"file": (f"doc_{i}.txt", body, "text/plain")}
+                await timed(client, "POST", "/api/v1/admin/documents", files=files)
+            indexing.set()
+            return time.perf_counter() - start
+
+        async def chatter() -> None:
+            while not indexing.is_set():
+                detail = " ".join(rng.sample(WORDS, 4))
+                payload = {
+                    "prompt": f"What does the {rng.choice(TOPICS)} say about {detail}?",
+                    "thread_id": str(uuid.uuid4()),
+                }
+                chat.append(
+                    await timed(
+                        client, "POST", "/api/v1/chat/conversation", json=payload
+                    )
+                )
+
+        upload_seconds, *_ = await asyncio.gather(
+            upload_all(), *(chatter() for _ in range(args.concurrency))
+        )
+    return {"chat": summarize(chat), "upload_s": round(upload_seconds, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=4)
+    parser.add_argument("--paragraphs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(child(args))))
+        return
+
+    results = {}
+    for mode, env in MODES.items():
+        out = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.ingest_contention",
+                *sys.argv[1:],
+                "--child",
+                mode,
+            ],
+            env={
+                **os.environ,
+                "LOG__LEVEL": "WARNING",
+                "LOG__FILE_ENABLED": "false",
+                **env,
+            },
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(
+        f"\n{'mode':<10} {'chats':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'indexing s':>11}"
+    )
+    for mode, r in results.items():
+        c = r["chat"]
+        print(
+            f"{mode:<10} {c['count']:>6} {c['p50_ms']:>9.0f} {c['p95_ms']:>9.0f} "
+            f"{c['p99_ms']:>9.0f} {r['upload_s']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""End-to-end load and latency benchmark, fully offline.
+
+Usage (from the repository root):
+
+    uv run python -m benchmarks.load --requests 300 --concurrency 32
+    uv run python -m benchmarks.load --save-baseline
+    uv run python -m benchmarks.load --llm-ms 800 --real-models
+
+The app runs in-process behind httpx's ASGI transport with a deterministic
+fake LLM (``--llm-ms`` +/- ``--llm-jitter-ms``), Qdrant in ``:memory:`` mode
+and fakeredis. Embeddings and the reranker are fakes with simulated cost
+unless ``--real-models`` is given, in which case the configured models are
+loaded (they must be available locally).
+
+A corpus is first uploaded through ``POST /api/v1/admin/documents``, then a
+mix of ``POST /api/v1/chat/conversation`` and ``GET /api/v1/admin/documents``
+is driven at ``--concurrency``. Per-endpoint and per-stage (graph node,
+embed/rerank batch, Qdrant call, LLM call) p50/p95/p99 come from the same
+histograms that back ``/metrics``, recorded raw here for exact percentiles.
+
+Results are compared against ``--baseline`` when it exists and was recorded
+with the same parameters; the run exits non-zero when throughput drops or a
+p95 grows by more than ``--tolerance`` (and by at least ``--min-delta-ms``).
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.fakes import FakeLatency, install
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "load.json"
+
+# Stage histograms reported per label value; see src/ai_assistant/core/metrics.py.
+STAGES = {
+    "rag_graph_node_duration_seconds": "node",
+    "inference_batch_duration_seconds": "batch",
+    "vector_store_request_duration_seconds": "qdrant",
+    "llm_request_duration_seconds": "llm",
+}
+
+TOPICS = [
+    "vacation policy",
+    "expense reports",
+    "security training",
+    "onboarding",
+    "warranty claims",
+    "delivery times",
+    "refund process",
+    "remote work",
+    "performance reviews",
+    "data retention",
+    "incident response",
+    "pricing tiers",
+]
+WORDS = (
+    "employee manager request approval days policy company document process "
+    "customer product support team report quarter budget access system review "
+    "contract deadline payment invoice schedule training compliance audit"
+).split()
+
+
+class SampleRecorder:
+    """Collects every ``Histogram.observe`` call as a raw sample."""
+
+    def __init__(self):
+        self.samples: dict[tuple[str, tuple], list[float]] = defaultdict(list)
+
+    def install(self) -> None:
+        from prometheus_client import Histogram
+
+        original = Histogram.observe
+        samples = self.samples
+
+        def observe(histogram, amount, exemplar=None):
+            samples[(histogram._name, histogram._labelvalues)].append(amount)
+            return original(histogram, amount, exemplar)
+
+        Histogram.observe = observe
+
+    def clear(self) -> None:
+        self.samples.clear()
+
+    def stages(self) -> dict[str, list[float]]:
+        result = {}
+        for (name, labels), values in self.samples.items():
+            if name in STAGES and labels:
+                result[f"{STAGES[name]}:{labels[0]}"] = values
+        return result
+
+
+def summarize(samples_s: list[float]) -> dict:
+    ms = np.array(samples_s) * 1000
+    return {
+        "count": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+    }
+
+
+def make_document(rng: random.Random, topic: str, paragraphs: int) -> str:
+    lines = [f"{topic.title()} handbook"]
+    for _ in range(paragraphs):
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 90)))
+        lines.append(f"The {topic} rules: {sentence}.")
+    return "\n\n".join(lines)
+
+
+def make_prompts(rng: random.Random, distinct: int) -> list[str]:
+    prompts = ["hello", "thanks, that helps"]
+    while len(prompts) < distinct:
+        topic = rng.choice(TOPICS)
+        detail = " ".join(rng.sample(WORDS, 3))
+        prompts.append(f"What does the {topic} say about {detail}?")
+    return prompts[:distinct]
+
+
+async def timed(client, method: str, url: str, **kwargs) -> float:
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return elapsed
+
+
+async def seed(client, args, rng: random.Random) -> list[float]:
+    durations = []
+    for i in range(args.docs):
+        topic = TOPICS[i % len(TOPICS)]
+        body = make_document(rng, topic, args.paragraphs).encode()
+        files = {"file": (f"{topic.replace(' ', '_')}_{i}.txt", body, "text/plain")}
+        durations.append(
+            await timed(client, "POST", "/api/v1/admin/documents", files=files)
+        )
+    return durations
+
+
+async def drive(
+    client, args, rng: random.Random
+) -> tuple[dict[str, list[float]], float]:
+    prompts = make_prompts(rng, args.distinct_prompts)
+    workload = [
+        ("documents", None)
+        if rng.random() < args.admin_ratio
+        else ("conversation", rng.choice(prompts))
+        for _ in range(args.requests)
+    ]
+    durations: dict[str, list[float]] = defaultdict(list)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(kind: str, prompt: str | None) -> None:
+        async with semaphore:
+            if kind == "documents":
+                elapsed = await timed(
+                    client, "GET", "/api/v1/admin/documents", params={"limit": 5}
+                )
+            else:
+                payload = {"prompt": prompt, "thread_id": str(uuid.uuid4())}
+                elapsed = await timed(
+                    client, "POST", "/api/v1/chat/conversation", json=payload
+                )
+            durations[kind].append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(kind, prompt) for kind, prompt in workload))
+    return durations, time.perf_counter() - start
+
+
+def compare(
+    result: dict, baseline: dict, tolerance: float, min_delta_ms: float
+) -> list[str]:
+    regressions = []
+    old_rps, new_rps = baseline["throughput_rps"], result["throughput_rps"]
+    if new_rps < old_rps * (1 - tolerance):
+        regressions.append(f"throughput {old_rps:.1f} -> {new_rps:.1f} req/s")
+
+    for section in ("endpoints", "stages"):
+        for name, stats in result[section].items():
+            old = baseline[section].get(name)
+            if (
+                old
+                and stats["p95_ms"] > old["p95_ms"] * (1 + tolerance)
+                and stats["p95_ms"] - old["p95_ms"] > min_delta_ms
+            ):
+                regressions.append(
+                    f"{name} p95 {old['p95_ms']:.1f} -> {stats['p95_ms']:.1f} ms"
+                )
+    return regressions
+
+
+def print_table(title: str, rows: dict[str, dict]) -> None:
+    print(f"\n{title:<32} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in sorted(rows.items()):
+        print(
+            f"{name:<32} {stats['count']:>6} {stats['p50_ms']:>9.2f} "
+            f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}"
+        )
+
+
+async def run(args) -> dict:
+    install(
+        FakeLatency(args.llm_ms, args.llm_jitter_ms, args.embed_ms, args.rerank_ms),
+        real_models=args.real_models,
+    )
+    recorder = SampleRecorder()
+    recorder.install()
+
+    import httpx
+
+    from src.ai_assistant.core.cache import get_cache_stats
+    from src.ai_assistant.main import get_app
+
+    rng = random.Random(args.seed)
+    transport = httpx.ASGITransport(app=get_app())
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+        upload = await seed(client, args, rng)
+        recorder.clear()
+        durations, wall = await drive(client, args, rng)
+
+    endpoints = {"upload": summarize(upload)}
+    endpoints.update({kind: summarize(values) for kind, values in durations.items()})
+    return {
+        "params": {
+            key: getattr(args, key)
+            for key in (
+                "requests",
+                "concurrency",
+                "distinct_prompts",
+                "admin_ratio",
+                "docs",
+                "paragraphs",
+                "llm_ms",
+                "llm_jitter_ms",
+                "embed_ms",
+                "rerank_ms",
+                "real_models",
+                "seed",
+            )
+        },
+        "throughput_rps": round(args.requests / wall, 2),
+        "endpoints": endpoints,
+        "stages": {
+            name: summarize(values) for name, values in recorder.stages().items()
+        },
+        "cache": get_cache_stats(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--distinct-prompts", type=int, default=50)
+    parser.add_argument("--admin-ratio", type=float, default=0.1)
+    parser.add_argument("--docs", type=int, default=12)
+    parser.add_argument("--paragraphs", type=int, default=20)
+    parser.add_argument("--llm-ms", type=float, default=300.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--embed-ms", type=float, default=15.0)
+    parser.add_argument("--rerank-ms", type=float, default=1.0)
+    parser.add_argument("--real-models", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    # Millisecond-scale stages jitter by more than 25% between identical runs.
+    parser.add_argument("--min-delta-ms", type=float, default=50.0)
+    parser.add_argument("--json", type=Path, help="also write results here")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    print(
+        f"{args.requests} requests at concurrency {args.concurrency}: "
+        f"{result['throughput_rps']:.1f} req/s"
+    )
+    print_table("endpoint", result["endpoints"])
+    print_table("stage", result["stages"])
+    for prefix, counts in sorted(result["cache"].items()):
+        print(f"cache {prefix:<20} hits={counts['hits']:<6} misses={counts['misses']}")
+
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    if baseline["params"] != result["params"]:
+        print(
+            f"\nBaseline {args.baseline} was recorded with other parameters; not compared"
+        )
+        return 0
+
+    regressions = compare(result, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"\nRegressions vs {args.baseline} (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions vs {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Per-request logging overhead: previous setup vs. config-driven modes.
+
+Usage (from the repository root):
+
+    uv run python -m benchmarks.logging_overhead --requests 20000
+
+Replays the log calls one RAG turn makes on the request path, in two
+situations: ``healthy`` (only the context-packing debug line) and
+``redis-down`` (every cache get/set/lock also logs a debug error). Each
+scenario runs under:
+
+* ``before``: DEBUG stdout + INFO file, ``diagnose=True``, eager f-strings
+  and no sampling, i.e. the setup before ``LogConfig`` existed;
+* ``dev``: the same levels with lazy ``{}`` formatting and ``sampled()``;
+* ``production``: ``LOG__LEVEL=INFO``, JSON output, ``LOG__SAMPLE_RATE=0.1``.
+
+``caller`` is the time spent on the request's own thread, i.e. what the
+event loop pays. ``total`` also includes draining the writer threads, i.e.
+CPU taken from the process. stdout goes to /dev/null and the file sink to a
+temporary directory, so disk speed doesn't dominate.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.ai_assistant.core import logger as logging_setup
+from src.ai_assistant.core.config import LogConfig
+
+KEY = "generate:thread:0c2f5a1b9e7d4c3a:5f1d2e3c4b5a69788796a5b4c3d2e1f0"
+ERROR = ConnectionError("Error 111 connecting to localhost:6379. Connection refused.")
+
+CONFIGS = {
+    "before": LogConfig(level="DEBUG", diagnose=True),
+    "dev": LogConfig(level="DEBUG"),
+    "production": LogConfig(
+        level="INFO", file_level="INFO", json_format=True, sample_rate=0.1
+    ),
+}
+
+
+def request_eager(logger, redis_down: bool, spans: int, tokens: int) -> None:
+    if redis_down:
+        for _ in range(3):  # conversation, optimize_query, generate
+            logger.debug(f"Cache get error for {KEY}: {ERROR}")
+            logger.debug(f"Cache lock error for {KEY}: {ERROR}")
+            logger.debug(f"Cache set error for {KEY}: {ERROR}")
+    logger.debug(f"Packed {spans} context spans, ~{tokens} tokens")
+
+
+def request_lazy(logger, redis_down: bool, spans: int, tokens: int) -> None:
+    sampled = logging_setup.sampled
+    if redis_down:
+        for _ in range(3):
+            sampled().debug("Cache get error for {}: {}", KEY, ERROR)
+            sampled().debug("Cache lock error for {}: {}", KEY, ERROR)
+            sampled().debug("Cache set error for {}: {}", KEY, ERROR)
+    sampled().debug("Packed {} context spans, ~{} tokens", spans, tokens)
+
+
+def exception_path(logger) -> None:
+    secret = "sk-live-" + "x" * 40  # what diagnose=True would print
+    try:
+        {"api_key": secret}["missing"]
+    except KeyError:
+        logger.exception("Error in node_generate")
+
+
+def measure(name: str, settings: LogConfig, redis_down: bool, requests: int) -> dict:
+    logger = logging_setup.setup_logger(settings)
+    replay = request_eager if name == "before" else request_lazy
+
+    start = time.perf_counter()
+    for i in range(requests):
+        replay(logger, redis_down, 4, 2800 + i % 100)
+    caller = time.perf_counter() - start
+    logger.remove()  # stops the sinks, waiting for queued lines to be written
+    total = time.perf_counter() - start
+    logger = logging_setup.setup_logger(settings)
+
+    start = time.perf_counter()
+    for _ in range(200):
+        exception_path(logger)
+    exception_caller = (time.perf_counter() - start) / 200
+    logger.complete()
+
+    return {
+        "caller_us": caller / requests * 1e6,
+        "total_us": total / requests * 1e6,
+        "exception_us": exception_caller * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    log_dir = Path(tempfile.mkdtemp(prefix="bench-logs-"))
+    logging_setup.LOG_FILE = log_dir / "app.log"
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+
+    rows = []
+    try:
+        for scenario, redis_down in (("healthy", False), ("redis-down", True)):
+            for name, settings in CONFIGS.items():
+                rows.append(
+                    (scenario, name, measure(name, settings, redis_down, args.requests))
+                )
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+        logging_setup.setup_logger()
+
+    print(f"{args.requests} simulated requests per row; microseconds per request")
+    print(f"{'scenario':<12} {'mode':<12} {'caller':>9} {'total':>9} {'exception':>10}")
+    for scenario, name, stats in rows:
+        print(
+            f"{scenario:<12} {name:<12} {stats['caller_us']:>9.1f} "
+            f"{stats['total_us']:>9.1f} {stats['exception_us']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Answer recall and context tokens: plain chunks vs. small-to-big retrieval.
+
+Usage (from the repository root):
+
+    uv run python -m benchmarks.parent_retrieval
+    uv run python -m benchmarks.parent_retrieval --docs 40 --queries 400
+
+Offline and deterministic. Documents are handbook-like sections of filler
+text with facts ("The amber ledger quota is 417.") whose two-word names
+share words with many other facts. The embedding is a hashed bag of words,
+so similarity is lexical but real, unlike the synthetic encoder; the
+reranker keeps the vector order, so only chunking differs between modes.
+Qdrant runs in ``:memory:``.
+
+For each question ("What is the amber ledger quota?") the pipeline retrieves
+``k`` results and packs them into the prompt context as the graph does. A
+question is answered when its whole fact sentence is in the context.
+Reported per mode: points embedded, answer recall, mean context tokens, and
+answers per 1,000 context tokens.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import math
+import random
+import re
+import statistics
+import time
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from benchmarks.load import WORDS
+from src.ai_assistant.core.config import config
+from src.ai_assistant.rag.context import pack_context
+
+ADJECTIVES = (
+    "amber azure brisk coral dusty eager fossil gentle hollow ivory jade keen lunar "
+    "mellow noble opal polar quiet rustic silver"
+).split()
+NOUNS = (
+    "ledger harbor beacon canyon delta engine falcon garden hangar island jetty kiosk "
+    "lantern meadow nexus orchard pylon quarry river summit"
+).split()
+
+
+class HashingEmbedding(Embeddings):
+    """L2-normalized word counts hashed into ``dim`` buckets."""
+
+    def __init__(self, dim: int = 2048):
+        self.dim = dim
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dim
+            for word in re.findall(r"\w+", text.lower()):
+                vector[
+                    int(hashlib.md5(word.encode()).hexdigest()[:8], 16) % self.dim
+                ] += 1.0
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            vectors.append([v / norm for v in vector])
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+class KeepOrderRanker:
+    llm_model = object()
+
+    def rerank(self, request):
+        return request.passages
+
+
+def corpus(
+    rng: random.Random, docs: int, sections: int
+) -> tuple[list[Document], list[tuple[str, str]]]:
+    names = [(a, n) for a in ADJECTIVES for n in NOUNS]
+    rng.shuffle(names)
+    facts: list[tuple[str, str]] = []
+    documents = []
+    for d in range(docs):
+        lines = []
+        for s in range(1, sections + 1):
+            lines.append(f"{s} {rng.choice(WORDS).title()} {rng.choice(WORDS)}")
+            paragraph = []
+            for _ in range(rng.randint(6, 14)):
+                if names and rng.random() < 0.3:
+                    adjective, noun = names.pop()
+                    sentence = (
+                        f"The {adjective} {noun} quota is {rng.randint(100, 999)}."
+                    )
+                    facts.append((f"What is the {adjective} {noun} quota?", sentence))
+                else:
+                    sentence = (
+                        " ".join(rng.choices(WORDS, k=rng.randint(8, 18))).capitalize()
+                        + "."
+                    )
+                paragraph.append(sentence)
+                if rng.random() < 0.3:
+                    lines.append(" ".join(paragraph))
+                    lines.append("")
+                    paragraph = []
+            lines.append(" ".join(paragraph))
+            lines.append("")
+        documents.append(
+            Document("\n".join(lines), metadata={"source": f"handbook_{d}.txt"})
+        )
+    return documents, facts
+
+
+async def run_mode(
+    parent: bool, child_tokens: int | None, documents, facts, k: int
+) -> dict:
+    from langchain_qdrant import QdrantVectorStore
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models
+
+    from src.ai_assistant.rag import pipeline as pipeline_mod
+    from src.ai_assistant.rag.embeddings import BatchedEmbeddings
+    from src.ai_assistant.rag.reranker import BatchedReranker
+
+    config.rag.parent_documents = parent
+    config.rag.child_chunk_tokens = child_tokens or config.rag.child_chunk_tokens
+    embeddings = HashingEmbedding()
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        "bench",
+        vectors_config=models.VectorParams(
+            size=embeddings.dim, distance=models.Distance.COSINE
+        ),
+    )
+    store = QdrantVectorStore(
+        client=client, collection_name="bench", embedding=BatchedEmbeddings(embeddings)
+    )
+    pipeline_mod.BatchedReranker = lambda: BatchedReranker(ranker=KeepOrderRanker())
+    rag = pipeline_mod.RAGPipeline(store=store)
+
+    start = time.perf_counter()
+    await rag.index_documents(
+        [Document(d.page_content, metadata=dict(d.metadata)) for d in documents]
+    )
+    index_s = time.perf_counter() - start
+    points = client.count("bench").count
+
+    answered, tokens = 0, []
+    for question, sentence in facts:
+        packed = pack_context(await rag.retrieve(question, k))
+        answered += sentence in packed.text
+        tokens.append(packed.tokens)
+    rag.re_ranker.close()
+    store.embeddings.close()
+    return {
+        "points": points,
+        "recall": answered / len(facts),
+        "tokens": statistics.mean(tokens),
+        "per_1k": answered / sum(tokens) * 1000,
+        "index_s": index_s,
+    }
+
+
+async def main_async(args) -> None:
+    documents, facts = corpus(random.Random(args.seed), args.docs, args.sections)
+    facts = random.Random(args.seed).sample(facts, min(args.queries, len(facts)))
+    print(f"{len(documents)} documents, {len(facts)} questions, k={args.k}\n")
+    print(
+        f"{'mode':<22} {'points':>7} {'recall':>7} {'ctx tokens':>11} "
+        f"{'answers/1k tok':>15} {'index s':>8}"
+    )
+    modes = [
+        ("chunks", False, None),
+        *((f"parent, child {c}", True, c) for c in args.child_tokens),
+    ]
+    for label, parent, child_tokens in modes:
+        r = await run_mode(parent, child_tokens, documents, facts, args.k)
+        print(
+            f"{label:<22} {r['points']:>7} {r['recall']:>7.1%} {r['tokens']:>11.0f} "
+            f"{r['per_1k']:>15.3f} {r['index_s']:>8.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--child-tokens", type=int, nargs="+", default=[64, 128])
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
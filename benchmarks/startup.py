@@ -0,0 +1,92 @@
+"""Cold-start cost: importing the app, then loading models.
+
+Usage (from the repository root):
+
+    uv run python -m benchmarks.startup
+    uv run python -m benchmarks.startup --warmup   # also time model loading
+
+Each measurement runs in a fresh interpreter. Import time is what a worker
+(or test collection) pays before it can serve ``/healthz``; ``--warmup``
+additionally builds every resource in ``AppResources`` and reports the time
+per resource, i.e. how long ``/healthz/ready`` stays 503.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import src.ai_assistant.main
+print(time.perf_counter() - start)
+"""
+
+WARMUP_SNIPPET = """
+import json
+import src.ai_assistant.main
+from src.ai_assistant.core.resources import resources
+resources.warmup()
+print(json.dumps({"status": resources.warmup_status, "error": resources.warmup_error,
+                  "seconds": resources.load_seconds}))
+"""
+
+
+def run(snippet: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args, "-c", snippet],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_times(rounds: int) -> list[float]:
+    return [
+        float(run(IMPORT_SNIPPET).stdout.strip().splitlines()[-1])
+        for _ in range(rounds)
+    ]
+
+
+def top_imports(limit: int) -> list[tuple[float, str]]:
+    """Slowest top-level packages by summed self time (``-X importtime``)."""
+    stderr = run("import src.ai_assistant.main", "-X", "importtime").stderr
+    totals: dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = (part.strip() for part in line[12:].split("|"))
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0.0) + int(self_us) / 1e6
+    return sorted(((s, n) for n, s in totals.items()), reverse=True)[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--warmup", action="store_true")
+    args = parser.parse_args()
+
+    times = import_times(args.rounds)
+    print(
+        f"import src.ai_assistant.main: median {statistics.median(times):.2f}s "
+        f"(min {min(times):.2f}s, max {max(times):.2f}s, {args.rounds} rounds)"
+    )
+    print("\nslowest packages (self time of all their modules):")
+    for seconds, name in top_imports(args.top):
+        print(f"  {name:<32} {seconds:>6.2f}s")
+
+    if args.warmup:
+        result = json.loads(run(WARMUP_SNIPPET).stdout.strip().splitlines()[-1])
+        print(f"\nwarmup: {result['status']}")
+        if result["error"]:
+            print(f"  error: {result['error']}")
+        for name, seconds in result["seconds"].items():
+            print(f"  {name:<32} {seconds:>6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Per-worker memory of the gunicorn deployment, with and without preloading.
+
+Usage (from the repository root):
+
+    uv run python -m benchmarks.workers_memory --workers 3
+
+Starts ``gunicorn -c gunicorn.conf.py benchmarks.fake_server:app`` once with
+``APP__PRELOAD_MODELS=true`` and once with ``false``. The embedding model is
+``SyntheticEncoderEmbedding``, a random-weight encoder with the size of
+multilingual-e5-base (~1.1 GB of fp32 weights), so the figures hold without
+downloading it. LLM, reranker, Qdrant and Redis are the usual offline fakes.
+
+Once every worker has finished its warmup (one embed and one rerank pass) and
+served ``--requests`` conversations, memory is read from
+``/proc/<pid>/smaps_rollup`` (Linux only) for the master and each worker:
+RSS counts shared pages in full, PSS splits them between the processes that
+share them, USS is what the process alone holds. The sum of PSS is the
+deployment's real footprint.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def smaps(pid: int) -> dict[str, float]:
+    """RSS, PSS and USS in MiB."""
+    fields: dict[str, int] = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        fields[name] = int(value.split()[0])  # kB
+    uss = fields["Private_Clean"] + fields["Private_Dirty"]
+    return {
+        "rss": fields["Rss"] / 1024,
+        "pss": fields["Pss"] / 1024,
+        "uss": uss / 1024,
+    }
+
+
+def children(pid: int) -> list[int]:
+    path = Path(f"/proc/{pid}/task/{pid}/children")
+    return [int(p) for p in path.read_text().split()]
+
+
+def wait_until_warm(
+    server: subprocess.Popen, url: str, workers: int, timeout: float
+) -> None:
+    """Every worker answers ready (warmup done) for a few seconds in a row."""
+    deadline = time.monotonic() + timeout
+    ready_since = None
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {server.returncode}")
+        try:
+            ready = httpx.get(f"{url}/healthz/ready", timeout=5).status_code == 200
+        except httpx.HTTPError:
+            ready = False
+        if not ready:
+            ready_since = None
+        elif ready_since is None:
+            ready_since = time.monotonic()
+        elif time.monotonic() - ready_since > 2 + workers:
+            return
+        time.sleep(0.2)
+    raise TimeoutError("workers did not become ready")
+
+
+def run(preload: bool, args) -> dict:
+    port = free_port()
+    env = {
+        **os.environ,
+        "APP__WORKERS": str(args.workers),
+        "APP__PRELOAD_MODELS": str(preload).lower(),
+        "APP__HOST": "127.0.0.1",
+        "APP__PORT": str(port),
+        "CHECKPOINT__BACKEND": "redis",  # required with several workers
+        "RAG__DB_URL": ":memory:",
+        "RAG__DOCS_FOLDER": tempfile.mkdtemp(prefix="bench-docs-"),
+        "CACHE__ENABLED": "true",
+        "LANGCHAIN__TRACING_V2": "false",
+        "LOG__LEVEL": "WARNING",
+        "LOG__FILE_ENABLED": "false",
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "gunicorn.conf.py",
+            "benchmarks.fake_server:app",
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_warm(server, url, args.workers, args.timeout)
+        with httpx.Client(base_url=url, timeout=60) as client:
+            for i in range(args.requests):
+                client.post(
+                    "/api/v1/chat/conversation",
+                    json={
+                        "prompt": f"What is the refund policy, case {i}?",
+                        "thread_id": f"t{i}",
+                    },
+                ).raise_for_status()
+        time.sleep(1)
+
+        master = smaps(server.pid)
+        workers = [smaps(pid) for pid in children(server.pid)]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    return {"master": master, "workers": workers}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    results = {preload: run(preload, args) for preload in (True, False)}
+
+    print(f"\n{args.workers} workers, MiB")
+    print(f"{'mode':<12} {'process':<10} {'RSS':>8} {'PSS':>8} {'USS':>8}")
+    for preload, result in results.items():
+        mode = "preload" if preload else "per-worker"
+        rows = [("master", result["master"])]
+        rows += [(f"worker {i}", w) for i, w in enumerate(result["workers"])]
+        for name, m in rows:
+            print(
+                f"{mode:<12} {name:<10} {m['rss']:>8.0f} {m['pss']:>8.0f} {m['uss']:>8.0f}"
+            )
+        total = sum(m["pss"] for _, m in rows)
+        print(f"{mode:<12} {'total PSS':<10} {total:>26.0f}")
+
+
+if __name__ == "__main__":
+    main()
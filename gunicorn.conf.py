@@ -0,0 +1,58 @@
+"""Multi-process serving: ``gunicorn -c gunicorn.conf.py src.ai_assistant.main:app``.
+
+Worker count and model preloading come from ``APP__WORKERS`` and
+``APP__PRELOAD_MODELS``. With preloading, the app is imported and the
+embedding model loaded once in the master; workers are forked from it and
+share the weights copy-on-write. Per-worker state (clients, batcher threads,
+the reranker's ONNX session) is created after the fork.
+"""
+
+import os
+import tempfile
+
+# Not ``config``: gunicorn reads every module-level name as a setting.
+from src.ai_assistant.core.config import config as settings
+
+if settings.app.workers > 1:
+    if settings.checkpoint.backend == "memory":
+        raise RuntimeError(
+            "APP__WORKERS > 1 needs CHECKPOINT__BACKEND=redis: in-memory "
+            "conversation threads are not shared between workers"
+        )
+    # Must be set before prometheus_client is imported (by the app preload).
+    os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="prometheus-")
+    )
+
+bind = f"{settings.app.host}:{settings.app.port}"
+workers = settings.app.workers
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = settings.app.preload_models
+# Model loading happens in the background warmup, so boot itself is quick;
+# the timeout covers a worker blocked on a long LLM call.
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+
+def when_ready(server):
+    if preload_app:
+        from src.ai_assistant.core.resources import resources
+
+        resources.preload()
+
+
+def post_fork(server, worker):
+    # Split the cores between workers instead of every worker using all of them.
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+
+
+def child_exit(server, worker):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
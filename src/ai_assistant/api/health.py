@@ -1,3 +1,57 @@
-from fastapi import APIRouter
+import time
+
+from fastapi import APIRouter, Response, status
+
+from src.ai_assistant.core.config import config
+from src.ai_assistant.core.probes import queue_depths, run_probes
+from src.ai_assistant.core.resources import resources
+from src.ai_assistant.schemas.health import (
+    LivenessResponse,
+    ProbeStatus,
+    ReadinessResponse,
+)
 
 router = APIRouter(prefix="/healthz", tags=["Healthz"])
+
+_started_at = time.monotonic()
+
+
+@router.get("/live", response_model=LivenessResponse)
+async def live():
+    # Deliberately checks nothing external: a dependency outage should take
+    # the worker out of rotation (readiness), not get it restarted.
+    return LivenessResponse(
+        alive=True, uptime_seconds=round(time.monotonic() - _started_at, 1)
+    )
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def ready(response: Response):
+    results = await run_probes()
+    depths = queue_depths()
+    now = time.monotonic()
+
+    is_ready = (
+        resources.ready
+        and all(result.ok for result in results.values())
+        and sum(depths.values()) <= config.health.max_queue_depth
+    )
+    if not is_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    return ReadinessResponse(
+        ready=is_ready,
+        warmup=resources.warmup_status,
+        error=resources.warmup_error,
+        loaded=dict(resources.load_seconds),
+        checks={
+            name: ProbeStatus(
+                ok=result.ok,
+                detail=result.detail,
+                latency_ms=result.latency_ms,
+                age_seconds=round(now - result.checked_at, 2),
+            )
+            for name, result in results.items()
+        },
+        queue_depth=depths,
+    )
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Query
+import os
+
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, Query
 
 from src.ai_assistant.rag.pipeline import RAGPipeline
 from src.ai_assistant.core.logger import logger
 from src.ai_assistant.core.config import config
+from src.ai_assistant.core.resources import get_rag_pipeline
+from src.ai_assistant.core.scheduler import Overloaded, scheduler
+from src.ai_assistant.graph.warmer import cache_warmer
 from src.ai_assistant.core.cache import (
     get_json,
     set_json,
     delete_documents_cache,
+    get_cache_stats,
     DOCUMENTS_KEY_PREFIX,
 )
 from src.ai_assistant.schemas.admin import (
@@ -14,22 +20,31 @@ from src.ai_assistant.schemas.admin import (
     DocumentDeleteResponse,
     DocumentGetResponse,
     Document,
+    CacheStats,
+    CacheStatsResponse,
 )
 
 
 router = APIRouter()
-pipeline = RAGPipeline()
 
 
 @router.post("/documents", response_model=DocumentUploadResponse)
-async def add_documents(file: UploadFile = File(...)):
+async def add_documents(
+    file: UploadFile = File(...), pipeline: RAGPipeline = Depends(get_rag_pipeline)
+):
+    scheduler.admit("ingest")
     file_path = f"{config.rag.docs_folder}/{file.filename}"
 
     try:
+        # A re-upload replaces the file; keep the old one in case indexing fails.
+        previous = None
+        if os.path.exists(file_path):
+            with open(file_path, "rb") as f:
+                previous = f.read()
         with open(file_path, "wb") as f:
             f.write(await file.read())
     except Exception as e:
-        logger.error(f"Error saving file: {str(e)}")
+        logger.error("Error saving file: {}", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to save file",
@@ -43,20 +58,42 @@ async def add_documents(file: UploadFile = File(...)):
             detail="Failed to process document",
         )
 
-    index_document = await pipeline.index_documents(document)
+    # A failed run has already removed the chunks it added.
+    try:
+        index_document = await pipeline.index_documents(document)
+    except Overloaded:
+        await _discard_upload(file_path, previous)
+        raise
 
     if not index_document:
+        await _discard_upload(file_path, previous)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to index document",
         )
 
     await delete_documents_cache()
+    cache_warmer.schedule()
     return DocumentUploadResponse(success=True, filename=file.filename)
 
 
+async def _discard_upload(file_path: str, previous: bytes | None) -> None:
+    """Put back the file a failed upload replaced, or remove the new one."""
+    try:
+        if previous is None:
+            os.remove(file_path)
+        else:
+            with open(file_path, "wb") as f:
+                f.write(previous)
+    except OSError as e:
+        logger.error("Error restoring {}: {}", file_path, e)
+    await delete_documents_cache()
+
+
 @router.get("/documents", response_model=DocumentGetResponse)
-async def get_documents(limit: int = Query(5, ge=1)):
+async def get_documents(
+    limit: int = Query(5, ge=1), pipeline: RAGPipeline = Depends(get_rag_pipeline)
+):
     cache_key = f"{DOCUMENTS_KEY_PREFIX}limit:{limit}"
     cached = await get_json(cache_key)
     if cached is not None:
@@ -80,7 +117,9 @@ async def get_documents(limit: int = Query(5, ge=1)):
 
 
 @router.delete("/documents/{doc_name}", response_model=DocumentDeleteResponse)
-async def delete_document(doc_name: str):
+async def delete_document(
+    doc_name: str, pipeline: RAGPipeline = Depends(get_rag_pipeline)
+):
     is_deleted = await pipeline.delete_documents_by_name(doc_name)
 
     if not is_deleted:
@@ -90,4 +129,18 @@ async def delete_document(doc_name: str):
         )
 
     await delete_documents_cache()
+    cache_warmer.schedule()
     return DocumentDeleteResponse(success=True, deleted=doc_name)
+
+
+@router.get("/cache/stats", response_model=CacheStatsResponse)
+async def cache_stats():
+    prefixes = {}
+    for prefix, counts in get_cache_stats().items():
+        total = counts["hits"] + counts["misses"]
+        prefixes[prefix] = CacheStats(
+            hits=counts["hits"],
+            misses=counts["misses"],
+            hit_ratio=counts["hits"] / total if total else 0.0,
+        )
+    return CacheStatsResponse(prefixes=prefixes)
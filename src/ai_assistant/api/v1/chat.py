@@ -1,13 +1,22 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from src.ai_assistant.graph.graph import rag_graph
-from src.ai_assistant.graph.state import RAGState
+from src.ai_assistant.graph.graph import (
+    record_turn,
+    run_conversation,
+    thread_has_history,
+)
+from src.ai_assistant.graph.warmer import cache_warmer
 from src.ai_assistant.schemas.chat import ConversationRequest, ConversationResponse
 from src.ai_assistant.core.config import config
+from src.ai_assistant.core.resources import get_rag_graph
 from src.ai_assistant.core.cache import (
     get_json,
-    set_json,
+    get_or_compute,
+    cache_scope,
     conversation_cache_key,
+    optimize_query_cache_key,
+    prefetch,
+    reuses_shared_answers,
 )
 
 
@@ -15,33 +24,44 @@ router = APIRouter()
 
 
 @router.post("/conversation", response_model=ConversationResponse)
-async def conversation(payload: ConversationRequest):
-    cache_key = conversation_cache_key(payload.prompt)
-    cached = await get_json(cache_key)
-    if cached is not None:
-        return ConversationResponse(**cached)
+async def conversation(payload: ConversationRequest, rag_graph=Depends(get_rag_graph)):
+    has_history = await thread_has_history(payload.thread_id)
+    scope = cache_scope(payload.thread_id, has_history)
 
-    state = RAGState(query=payload.prompt, thread_id=payload.thread_id)
+    cache_key = conversation_cache_key(payload.prompt, scope)
 
-    final_state = await rag_graph.ainvoke(state)
+    if scope is None:
+        cache_warmer.record(payload.prompt)
 
-    documents_sources = []
+    computed = False
 
-    for doc in final_state["docs"]:
-        if doc.metadata["source"].split("/")[-1] not in documents_sources:
-            documents_sources.append(
-                doc.metadata.get("source", "unknown").split("/")[-1]
-            )
+    async def run_graph() -> dict:
+        nonlocal computed
+        computed = True
+        result = await run_conversation(
+            rag_graph, payload.prompt, payload.thread_id, scope
+        )
+        return ConversationResponse(**result).model_dump()
 
-    response = ConversationResponse(
-        answer=final_state["answer"], document_sources=documents_sources
-    )
-    await set_json(
-        cache_key,
-        response.model_dump(),
-        config.cache.conversation_ttl_seconds,
-    )
-    return response
+    # The route decision and the shared answer depend on the prompt only:
+    # fetch them with this turn's entry in one round trip. A later turn the
+    # router calls standalone may reuse the shared answer, but an answer it
+    # computes has seen the history and is cached in its own scope.
+    shared_key = conversation_cache_key(payload.prompt)
+    keys = [cache_key, optimize_query_cache_key(payload.prompt)]
+    if scope is not None:
+        keys.append(shared_key)
+    async with prefetch(*keys):
+        response = None
+        if scope is not None and await reuses_shared_answers(payload.prompt):
+            response = await get_json(shared_key)
+        if response is None:
+            response = await get_or_compute(
+                cache_key, config.cache.conversation_ttl_seconds, run_graph
+            )
+    if not computed:
+        await record_turn(payload.thread_id, payload.prompt, response["answer"])
+    return ConversationResponse(**response)
 
 
 @router.post("/conversation/stream")
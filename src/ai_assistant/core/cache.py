@@ -1,17 +1,73 @@
+import asyncio
 import hashlib
 import json
-from typing import Any
+import uuid
+import zlib
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+import ormsgpack
 
 from src.ai_assistant.core.config import config
-from src.ai_assistant.core.logger import logger
+from src.ai_assistant.core.logger import logger, sampled
+from src.ai_assistant.core.metrics import CACHE_REQUESTS
 
 _redis_client: Any = None
+_stats: dict[str, dict[str, int]] = {}
+_inflight: dict[str, asyncio.Future] = {}
+# Values loaded by ``prefetch`` for the current request, consumed by get_json.
+_prefetched: ContextVar[dict[str, Any] | None] = ContextVar(
+    "cache_prefetched", default=None
+)
 
 DOCUMENTS_KEY_PREFIX = "documents:"
 CONVERSATION_KEY_PREFIX = "conversation:"
 RAG_RETRIEVE_KEY_PREFIX = "rag_retrieve:"
 OPTIMIZE_QUERY_KEY_PREFIX = "optimize_query:"
 GENERATE_KEY_PREFIX = "generate:"
+LOCK_KEY_PREFIX = "lock:"
+POPULAR_QUERIES_KEY = "popular_queries"  # sorted set: normalized prompt -> count
+
+# Value encoding: one header byte, then msgpack, compressed above
+# ``config.cache.compress_min_bytes``. Entries written as plain JSON by
+# earlier versions start with "{" or "[" and are still read.
+_MSGPACK = 1
+_MSGPACK_ZLIB = 2
+_MSGPACK_ZSTD = 3
+
+_zstd_compressor: Any = None
+_zstd_decompressor: Any = None
+
+# Deletes the lock only if it still holds our token (it may have expired and
+# been taken over by another worker).
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def create_redis_client(url: str):
+    """Async Redis client with the pool and timeouts from ``config.cache``.
+
+    The pool blocks for up to ``pool_timeout_seconds`` when all connections
+    are busy instead of failing at once, and socket timeouts keep a stalled
+    Redis from holding requests (cache errors are treated as misses).
+    """
+    import redis.asyncio as redis
+
+    settings = config.cache
+    pool = redis.BlockingConnectionPool.from_url(
+        url,
+        max_connections=settings.max_connections,
+        timeout=settings.pool_timeout_seconds,
+        socket_timeout=settings.socket_timeout_seconds,
+        socket_connect_timeout=settings.socket_connect_timeout_seconds,
+        health_check_interval=settings.health_check_interval_seconds,
+    )
+    return redis.Redis(connection_pool=pool)
 
 
 def _get_client():
@@ -20,32 +76,146 @@ def _get_client():
         return None
     if _redis_client is None:
         try:
-            import redis.asyncio as redis
-
-            _redis_client = redis.from_url(
-                config.cache.redis_url,
-                encoding="utf-8",
-                decode_responses=True,
-            )
+            # Values are binary (see encode_value); keys come back as bytes.
+            _redis_client = create_redis_client(config.cache.redis_url)
         except Exception as e:
-            logger.warning(f"Redis cache disabled: {e}")
+            logger.warning("Redis cache disabled: {}", e)
             return None
     return _redis_client
 
 
+def _key_prefix(key: str) -> str:
+    return key.split(":", 1)[0] + ":"
+
+
+def _record(key: str, hit: bool) -> None:
+    prefix = _key_prefix(key)
+    stats = _stats.setdefault(prefix, {"hits": 0, "misses": 0})
+    stats["hits" if hit else "misses"] += 1
+    CACHE_REQUESTS.labels(prefix=prefix, result="hit" if hit else "miss").inc()
+
+
+def get_cache_stats() -> dict[str, dict[str, int]]:
+    """Hit/miss counters per key prefix since process start."""
+    return {prefix: dict(counts) for prefix, counts in _stats.items()}
+
+
+def _zstd():
+    global _zstd_compressor, _zstd_decompressor
+    if _zstd_compressor is None:
+        import zstandard
+
+        _zstd_compressor = zstandard.ZstdCompressor(level=config.cache.zstd_level)
+        _zstd_decompressor = zstandard.ZstdDecompressor()
+    return _zstd_compressor, _zstd_decompressor
+
+
+def encode_value(value: dict | list) -> bytes:
+    """Cache payload for ``value``: header byte + msgpack, compressed if large."""
+    packed = ormsgpack.packb(value)
+    compression = config.cache.compression
+    if compression == "none" or len(packed) < config.cache.compress_min_bytes:
+        return bytes((_MSGPACK,)) + packed
+    if compression == "zstd":
+        return bytes((_MSGPACK_ZSTD,)) + _zstd()[0].compress(packed)
+    return bytes((_MSGPACK_ZLIB,)) + zlib.compress(packed, 6)
+
+
+def decode_value(raw: bytes | str) -> dict | list:
+    """Inverse of ``encode_value``; also reads plain JSON entries."""
+    header = raw[0] if isinstance(raw, bytes) else None
+    if header == _MSGPACK:
+        return ormsgpack.unpackb(raw[1:])
+    if header == _MSGPACK_ZSTD:
+        return ormsgpack.unpackb(_zstd()[1].decompress(raw[1:]))
+    if header == _MSGPACK_ZLIB:
+        return ormsgpack.unpackb(zlib.decompress(raw[1:]))
+    return json.loads(raw)
+
+
+async def _read(client, key: str) -> dict | list | None:
+    try:
+        raw = await client.get(key)
+        return None if raw is None else decode_value(raw)
+    except Exception as e:
+        sampled().debug("Cache get error for {}: {}", key, e)
+        return None
+
+
 async def get_json(key: str) -> dict | list | None:
     """Get JSON value from cache. Returns None on miss or error."""
     client = _get_client()
     if not client:
         return None
+    prefetched = _prefetched.get()
+    if prefetched is not None and key in prefetched:
+        value = prefetched.pop(key)  # once: a later read must see fresh data
+    else:
+        value = await _read(client, key)
+    _record(key, hit=value is not None)
+    return value
+
+
+async def _mget(client, keys: list[str]) -> list[dict | list | None]:
     try:
-        raw = await client.get(key)
-        if raw is None:
-            return None
-        return json.loads(raw)
+        raws = await client.mget(keys)
     except Exception as e:
-        logger.debug(f"Cache get error for {key}: {e}")
-        return None
+        sampled().debug("Cache mget error for {} keys: {}", len(keys), e)
+        return [None] * len(keys)
+    values = []
+    for key, raw in zip(keys, raws):
+        try:
+            values.append(None if raw is None else decode_value(raw))
+        except Exception as e:
+            sampled().debug("Cache decode error for {}: {}", key, e)
+            values.append(None)
+    return values
+
+
+async def get_many(keys: list[str]) -> list[dict | list | None]:
+    """Values for ``keys`` in one MGET round trip; None for misses."""
+    client = _get_client()
+    if not client or not keys:
+        return [None] * len(keys)
+    values = await _mget(client, keys)
+    for key, value in zip(keys, values):
+        _record(key, hit=value is not None)
+    return values
+
+
+async def set_many(items: dict[str, dict | list], ttl_seconds: int) -> bool:
+    """Set several values with one TTL in one pipelined round trip."""
+    client = _get_client()
+    if not client or not items:
+        return False
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, encode_value(value), ex=ttl_seconds)
+            await pipe.execute()
+        return True
+    except Exception as e:
+        sampled().debug("Cache set error for {} keys: {}", len(items), e)
+        return False
+
+
+@asynccontextmanager
+async def prefetch(*keys: str):
+    """Load ``keys`` with one MGET for the rest of this request.
+
+    The first ``get_json`` (and so ``get_or_compute``) of each key inside the
+    block is answered from the prefetched value, hit or miss, instead of
+    making its own round trip. Use it once a request knows its cache keys.
+    """
+    client = _get_client()
+    if not client or not keys:
+        yield
+        return
+    token = _prefetched.set(dict(zip(keys, await _mget(client, list(keys)))))
+    try:
+        yield
+    finally:
+        _prefetched.reset(token)
 
 
 async def set_json(key: str, value: dict | list, ttl_seconds: int) -> bool:
@@ -54,13 +224,125 @@ async def set_json(key: str, value: dict | list, ttl_seconds: int) -> bool:
     if not client:
         return False
     try:
-        await client.set(key, json.dumps(value), ex=ttl_seconds)
+        await client.set(key, encode_value(value), ex=ttl_seconds)
         return True
     except Exception as e:
-        logger.debug(f"Cache set error for {key}: {e}")
+        sampled().debug("Cache set error for {}: {}", key, e)
         return False
 
 
+async def get_or_compute(
+    key: str,
+    ttl_seconds: int,
+    compute: Callable[[], Awaitable[dict | list | None]],
+) -> dict | list | None:
+    """Cached value for ``key``, computing it at most once for concurrent callers.
+
+    Callers in this process await one shared in-flight computation; across
+    workers a Redis lock elects a single computing worker while the others
+    poll the cache for its result. ``None`` results are returned but not
+    cached, and exceptions from ``compute`` propagate to every waiter.
+    """
+    cached = await get_json(key)
+    if cached is not None:
+        return cached
+
+    inflight = _inflight.get(key)
+    if inflight is not None:
+        try:
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            # The computing request was cancelled, not us: take over.
+            if inflight.cancelled() and not asyncio.current_task().cancelling():
+                return await get_or_compute(key, ttl_seconds, compute)
+            raise
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        value = await _compute_once(key, ttl_seconds, compute)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # don't warn when nobody else was waiting
+        raise
+    else:
+        future.set_result(value)
+        return value
+    finally:
+        _inflight.pop(key, None)
+
+
+async def _compute_once(
+    key: str,
+    ttl_seconds: int,
+    compute: Callable[[], Awaitable[dict | list | None]],
+) -> dict | list | None:
+    client = _get_client()
+    if not client:
+        return await compute()
+
+    loop = asyncio.get_running_loop()
+    lock_key = f"{LOCK_KEY_PREFIX}{key}"
+    token = uuid.uuid4().hex
+    deadline = loop.time() + config.cache.single_flight_wait_seconds
+
+    while True:
+        try:
+            acquired = await client.set(
+                lock_key,
+                token,
+                nx=True,
+                px=config.cache.single_flight_lock_ttl_seconds * 1000,
+            )
+        except Exception as e:
+            sampled().debug("Cache lock error for {}: {}", key, e)
+            acquired = True
+
+        if acquired:
+            value = None
+            try:
+                value = await compute()
+                return value
+            finally:
+                await _store_and_unlock(
+                    client, key, value, ttl_seconds, lock_key, token
+                )
+
+        # Another worker holds the lock: wait for its result. If it fails or
+        # its lock expires, the next iteration takes the lock over.
+        await asyncio.sleep(config.cache.single_flight_poll_ms / 1000)
+        value = await _read(client, key)
+        if value is not None:
+            return value
+        if loop.time() >= deadline:
+            logger.warning(
+                "Single-flight wait for {} timed out, computing locally", key
+            )
+            return await compute()
+
+
+async def _store_and_unlock(
+    client,
+    key: str,
+    value: dict | list | None,
+    ttl_seconds: int,
+    lock_key: str,
+    token: str,
+) -> None:
+    """Write the computed value and release the lock in one round trip."""
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            if value is not None:
+                pipe.set(key, encode_value(value), ex=ttl_seconds)
+            pipe.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+            await pipe.execute()
+    except Exception as e:
+        sampled().debug("Cache set/unlock error for {}: {}", key, e)
+
+
 async def delete_key(key: str) -> bool:
     """Delete single key. Returns True on success."""
     client = _get_client()
@@ -70,7 +352,7 @@ async def delete_key(key: str) -> bool:
         await client.delete(key)
         return True
     except Exception as e:
-        logger.debug(f"Cache delete error for {key}: {e}")
+        sampled().debug("Cache delete error for {}: {}", key, e)
         return False
 
 
@@ -87,16 +369,45 @@ async def delete_documents_cache() -> None:
             keys.append(key)
         if keys:
             await client.delete(*keys)
-            logger.debug(f"Invalidated documents and RAG cache: {len(keys)} keys")
+            logger.debug("Invalidated documents and RAG cache: {} keys", len(keys))
     except Exception as e:
-        logger.debug(f"Cache invalidation error: {e}")
+        logger.debug("Cache invalidation error: {}", e)
+
 
+def cache_scope(thread_id: str, has_history: bool) -> str | None:
+    """Cache scope for a conversation turn.
 
-def conversation_cache_key(prompt: str) -> str:
-    """Stable cache key for conversation by prompt (normalized)."""
+    A thread's first turn depends only on the prompt, so its answers are shared
+    across threads (scope None). Later turns see the thread history, so their
+    entries are isolated per thread.
+    """
+    if not has_history:
+        return None
+    return hashlib.sha256(thread_id.encode()).hexdigest()[:16]
+
+
+async def reuses_shared_answers(prompt: str) -> bool:
+    """Whether a later turn may read the shared (first-turn) answer to ``prompt``.
+
+    Only when the router marked the prompt ``standalone``: it doesn't refer to
+    the thread history, so an answer computed without any history fits. The
+    decision is read from the route cache, never computed here; without it
+    the turn counts as history-dependent. Answers computed with history stay
+    scoped to their thread either way.
+    """
+    decision = await get_json(optimize_query_cache_key(prompt))
+    return isinstance(decision, dict) and bool(decision.get("standalone"))
+
+
+def _scoped(prefix: str, scope: str | None) -> str:
+    return f"{prefix}thread:{scope}:" if scope else prefix
+
+
+def conversation_cache_key(prompt: str, scope: str | None = None) -> str:
+    """Stable cache key for conversation by prompt (normalized) and cache scope."""
     normalized = prompt.strip().lower()
     h = hashlib.sha256(normalized.encode()).hexdigest()[:32]
-    return f"{CONVERSATION_KEY_PREFIX}{h}"
+    return f"{_scoped(CONVERSATION_KEY_PREFIX, scope)}{h}"
 
 
 def rag_retrieve_cache_key(query: str) -> str:
@@ -113,10 +424,10 @@ def optimize_query_cache_key(query: str) -> str:
     return f"{OPTIMIZE_QUERY_KEY_PREFIX}{h}"
 
 
-def generate_cache_key(prompt: str) -> str:
-    """Stable cache key for LLM generation by full prompt (context + query)."""
+def generate_cache_key(prompt: str, scope: str | None = None) -> str:
+    """Stable cache key for LLM generation by full prompt (context + query) and cache scope."""
     h = hashlib.sha256(prompt.encode()).hexdigest()[:32]
-    return f"{GENERATE_KEY_PREFIX}{h}"
+    return f"{_scoped(GENERATE_KEY_PREFIX, scope)}{h}"
 
 
 async def delete_rag_retrieve_cache() -> None:
@@ -130,9 +441,45 @@ async def delete_rag_retrieve_cache() -> None:
             keys.append(key)
         if keys:
             await client.delete(*keys)
-            logger.debug(f"Invalidated RAG retrieve cache: {len(keys)} keys")
+            logger.debug("Invalidated RAG retrieve cache: {} keys", len(keys))
     except Exception as e:
-        logger.debug(f"RAG cache invalidation error: {e}")
+        logger.debug("RAG cache invalidation error: {}", e)
+
+
+async def count_popular_queries(counts: dict[str, int], keep: int) -> None:
+    """Add ``counts`` to the popularity ranking in one round trip, keeping the top ``keep``."""
+    client = _get_client()
+    if not client or not counts:
+        return
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            for query, count in counts.items():
+                pipe.zincrby(POPULAR_QUERIES_KEY, count, query)
+            pipe.zremrangebyrank(POPULAR_QUERIES_KEY, 0, -keep - 1)
+            await pipe.execute()
+    except Exception as e:
+        sampled().debug("Popular queries update error: {}", e)
+
+
+async def get_popular_queries(n: int) -> list[str]:
+    """The ``n`` most counted normalized prompts, most popular first."""
+    client = _get_client()
+    if not client:
+        return []
+    try:
+        members = await client.zrevrange(POPULAR_QUERIES_KEY, 0, n - 1)
+    except Exception as e:
+        sampled().debug("Popular queries read error: {}", e)
+        return []
+    return [m.decode() if isinstance(m, bytes) else m for m in members]
+
+
+async def ping() -> bool:
+    """Ping Redis. False when caching is disabled; raises if Redis is unreachable."""
+    client = _get_client()
+    if not client:
+        return False
+    return await client.ping()
 
 
 async def close_redis() -> None:
@@ -142,5 +489,5 @@ async def close_redis() -> None:
         try:
             await _redis_client.aclose()
         except Exception as e:
-            logger.debug(f"Redis close: {e}")
+            logger.debug("Redis close: {}", e)
         _redis_client = None
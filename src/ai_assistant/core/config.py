@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import List
+from typing import List, Literal
 
 from pydantic_settings import BaseSettings
 from pydantic import BaseModel
@@ -18,14 +18,80 @@ class LLMConfig(BaseModel):
 
     prompts_dir: Path = BASE_DIR / "prompts"
 
+    # Resilience (core.resilience): every graph call goes through llm_guard
+    max_retries: int = 2  # retries inside one client call (Gemini SDK default is 6)
+    request_timeout_seconds: float = 60.0  # per HTTP request to Gemini
+    max_concurrency: int = 32  # in-flight calls per worker
+    queue_timeout_seconds: float = 5.0  # wait for a free slot before rejecting
+    route_timeout_seconds: float = 5.0  # fused gatekeeper + query rewrite
+    generate_timeout_seconds: float = 60.0
+    hedge_after_ms: float = 1500.0  # duplicate a slow route call; 0 disables
+    breaker_failure_threshold: int = 5  # consecutive failures that open the circuit
+    breaker_reset_seconds: float = (
+        30.0  # open time before one trial call is let through
+    )
+
+
+class EmbeddingProfile(BaseModel):
+    """Text preparation for the embedding model, applied at index and query time.
+
+    Defaults follow the e5 model card: "query: " / "passage: " prefixes and
+    L2-normalized vectors.
+    """
+
+    query_prefix: str = "query: "
+    passage_prefix: str = "passage: "
+    normalize: bool = True
+    max_seq_length: int = 512
+    batch_size: int = 32
+
 
 class RAGConfig(BaseModel):
     db_url: str = "http://localhost:6333"
     embedding_model: str = "intfloat/multilingual-e5-base"
+    # "onnx"/"openvino" need the matching sentence-transformers extra installed.
+    embedding_backend: Literal["torch", "onnx", "openvino"] = "torch"
+    # Model file inside the repo/dir, e.g. "onnx/model_qint8_avx512_vnni.onnx".
+    embedding_model_file: str | None = None
+    embedding_profile: EmbeddingProfile = EmbeddingProfile()
     docs_folder: str = "docs"
 
-    chunk_size: int = 1500
+    # "structure": token-sized chunks cut at headings, paragraphs and tables
+    # (rag.splitter.StructureSplitter); "recursive": fixed character chunks.
+    splitter: Literal["structure", "recursive"] = "structure"
+    chunk_tokens: int | None = (
+        None  # None: what the embedding model reads (max_seq_length)
+    )
+    chunk_overlap_tokens: int = 48
+    chunk_size: int = 1500  # "recursive" splitter, characters
     chunk_overlap: int = 150
+    # Add each hit's previous and next chunk (by stored ID) before packing.
+    expand_neighbors: bool = False
+    # Small-to-big: search small child chunks, answer with their parent span
+    # (a structure-splitter chunk), stored in a payload-only collection.
+    parent_documents: bool = False
+    child_chunk_tokens: int = 128
+    child_chunk_overlap_tokens: int = 16
+
+    embed_batch_size: int = 32  # concurrent query embeddings per forward pass
+    embed_batch_wait_ms: float = 3.0
+
+    retrieve_fetch_k: int = 30  # candidates fetched from Qdrant
+    retrieve_mmr_k: int = 12  # kept after MMR, passed to the reranker
+    # Multi-part questions: the rewritten query plus the router's sub-queries
+    # are searched in one Qdrant batch and reranked together.
+    multi_query: bool = True
+    retrieve_multi_k_per_query: int = 6  # kept after MMR per query before merging
+
+    # Send retrieved context as a per-turn system prompt instead of storing
+    # it in the thread; history then holds only the question and answer.
+    ephemeral_context: bool = True
+    context_token_budget: int = 3000  # max tokens of retrieved context per prompt
+    chars_per_token: float = 4.0  # token estimate used for the budget
+
+    rerank_model: str = "ms-marco-MultiBERT-L-12"
+    rerank_batch_size: int = 8  # concurrent retrieve calls scored per ONNX run
+    rerank_batch_wait_ms: float = 5.0
 
     def create_docs_folder(self):
         Path(self.docs_folder).mkdir(parents=True, exist_ok=True)
@@ -36,13 +102,101 @@ class CacheConfig(BaseModel):
     documents_ttl_seconds: int = 300  # 5 min
     conversation_ttl_seconds: int = 600  # 10 min
     rag_retrieve_ttl_seconds: int = 600  # 10 min
-    optimize_query_ttl_seconds: int = 600  # 10 min
+    optimize_query_ttl_seconds: int = 600  # 10 min, route decision + rewritten query
     generate_ttl_seconds: int = 600  # 10 min
+    # Single-flight: one computation per key across concurrent requests/workers
+    single_flight_lock_ttl_seconds: int = 60
+    single_flight_wait_seconds: float = 30.0
+    single_flight_poll_ms: int = 50
+    # Connection pool per worker, shared with the Redis checkpointer's settings
+    max_connections: int = 64
+    pool_timeout_seconds: float = 1.0  # wait for a free connection, then error (a miss)
+    socket_timeout_seconds: float = 1.0
+    socket_connect_timeout_seconds: float = 1.0
+    health_check_interval_seconds: int = 30  # PING idle connections before reuse
+    # Value encoding (core.cache.encode_value): msgpack, compressed above the
+    # threshold. Plain JSON entries written by older versions are still read.
+    compression: Literal["none", "zlib", "zstd"] = "zstd"
+    compress_min_bytes: int = 1024
+    zstd_level: int = 3
     enabled: bool = True
 
 
+class CheckpointConfig(BaseModel):
+    """Conversation thread storage for the LangGraph agent."""
+
+    backend: Literal["memory", "redis"] = "memory"  # redis uses cache.redis_url
+    max_threads: int = (
+        10000  # memory backend: least recently used beyond this are dropped
+    )
+    idle_ttl_seconds: int = 86400  # threads untouched for this long are dropped
+    key_prefix: str = "checkpoint:"
+
+
+class HealthConfig(BaseModel):
+    """Dependency probes behind /healthz/ready."""
+
+    probe_ttl_seconds: float = (
+        2.0  # probe results are reused this long, however often polled
+    )
+    probe_timeout_seconds: float = 1.0
+    max_queue_depth: int = (
+        64  # embed + rerank items waiting; above this the worker is not ready
+    )
+    require_redis: bool = True  # only applies when cache.enabled
+
+
+class InferenceConfig(BaseModel):
+    """Optional embedding/rerank sidecar (python -m src.ai_assistant.inference)."""
+
+    # unix:///run/inference/inference.sock or http://127.0.0.1:8001; empty
+    # runs the models inside each API worker.
+    url: str = ""
+    timeout_seconds: float = 10.0
+    max_connections: int = 32  # pooled connections per API worker
+    threads: int = 0  # sidecar torch threads; 0 leaves the torch default
+
+
+class SchedulerConfig(BaseModel):
+    """Per-worker admission control (core.scheduler): chat retrieval before indexing."""
+
+    chat_max_concurrency: int = 32  # retrievals running at once
+    chat_max_queue: int = 128  # waiting retrievals before 429
+    chat_queue_timeout_seconds: float = 10.0
+    ingest_max_concurrency: int = 1  # embedding batches of uploads running at once
+    ingest_max_queue: int = 4  # waiting uploads before 429
+    ingest_queue_timeout_seconds: float = 300.0
+    ingest_max_defer_seconds: float = 2.0  # per batch, while chat is busy
+
+
+class WarmerConfig(BaseModel):
+    """Re-warming popular questions after documents change (graph.warmer)."""
+
+    enabled: bool = True  # needs the Redis cache
+    top_n: int = 20  # most asked first-turn prompts to re-run
+    rate_per_second: float = 1.0  # queries re-run per second, one at a time
+    generate: bool = False  # also regenerate and overwrite their cached answers
+    flush_every: int = 50  # prompts counted in process before one Redis write
+    max_tracked: int = 1000  # prompts kept in the popularity ranking
+
+
+class LogConfig(BaseModel):
+    """Loguru sinks. Production: LOG__LEVEL=INFO, LOG__JSON_FORMAT=true, LOG__SAMPLE_RATE=0.1."""
+
+    level: str = "DEBUG"  # stdout
+    file_level: str = "INFO"
+    file_enabled: bool = True
+    json_format: bool = False  # one JSON object per line (loguru serialize)
+    colorize: bool = True
+    enqueue: bool = True  # sinks write from a background thread
+    backtrace: bool = True
+    diagnose: bool = False  # variable values in tracebacks: slow and may leak secrets
+    sample_rate: float = 1.0  # fraction of hot-path (sampled()) log calls kept
+
+
 class LangChainConfig(BaseModel):
     """LangSmith / LangChain tracing (observability)."""
+
     tracing_v2: bool = False
     api_key: str = ""
     project: str = "ai-assistant"
@@ -63,6 +217,16 @@ class AppConfig(BaseModel):
     cors_methods: List[str] = ["*"]
     cors_credentials: bool = True
 
+    metrics_enabled: bool = True  # Prometheus /metrics and HTTP timing middleware
+    warmup: bool = (
+        True  # load models in the background at startup instead of on first request
+    )
+
+    # gunicorn.conf.py: worker processes, and whether the embedding model is
+    # loaded once in the master and shared copy-on-write by the workers.
+    workers: int = 1
+    preload_models: bool = True
+
 
 class Config(BaseSettings):
     env: str = "dev"
@@ -70,6 +234,12 @@ class Config(BaseSettings):
     llm: LLMConfig = LLMConfig()
     rag: RAGConfig = RAGConfig()
     cache: CacheConfig = CacheConfig()
+    checkpoint: CheckpointConfig = CheckpointConfig()
+    health: HealthConfig = HealthConfig()
+    inference: InferenceConfig = InferenceConfig()
+    scheduler: SchedulerConfig = SchedulerConfig()
+    warmer: WarmerConfig = WarmerConfig()
+    log: LogConfig = LogConfig()
     langchain: LangChainConfig = LangChainConfig()
     app: AppConfig = AppConfig()
 
@@ -1,7 +1,15 @@
 from pathlib import Path
+import os
+import queue
+import random
 import sys
+import threading
+import weakref
+from typing import TextIO
 from loguru import logger as loguru_logger
 
+from src.ai_assistant.core.config import LogConfig, config
+
 
 BASE_DIR = Path(__file__).resolve().parents[3]
 LOG_DIR = BASE_DIR / "logs"
@@ -17,28 +25,121 @@ LOGURU_FORMAT = (
 )
 
 
-def setup_logger(level: str = "DEBUG"):
+class BackgroundStream:
+    """Stream sink that hands formatted lines to a writer thread.
+
+    loguru's ``enqueue=True`` pickles every record through a multiprocessing
+    queue, which costs the caller more than the write it avoids (see
+    ``benchmarks/logging_overhead.py``). Here the caller only formats the
+    line and appends it to a thread queue; a slow or blocked stdout (a full
+    container log pipe) stalls the writer thread, not the event loop.
+    """
+
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+        self._start()
+        _streams.add(self)
+
+    def _start(self) -> None:
+        self._queue: queue.SimpleQueue[str | None] = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        self._queue.put(message)
+
+    def _run(self) -> None:
+        while True:
+            lines = [self._queue.get()]
+            while not self._queue.empty() and len(lines) < 512:
+                lines.append(self._queue.get_nowait())
+            stop = None in lines
+            try:
+                self._stream.write("".join(line for line in lines if line is not None))
+                self._stream.flush()
+            except ValueError:  # stream closed under us (interpreter shutdown)
+                return
+            if stop:
+                return
+
+    def stop(self) -> None:
+        """Called by loguru when the handler is removed: drain and join."""
+        _streams.discard(self)
+        self._queue.put(None)
+        self._thread.join()
+
+
+_streams: "weakref.WeakSet[BackgroundStream]" = weakref.WeakSet()
+
+
+def _restart_streams() -> None:
+    # A forked child (gunicorn worker) inherits the stream but not its writer
+    # thread; lines still queued belong to the parent, which writes them.
+    for stream in list(_streams):
+        stream._start()
+
+
+os.register_at_fork(after_in_child=_restart_streams)
+
+
+class _NullLogger:
+    """Stands in for the logger when a sampled call is dropped."""
+
+    def _drop(self, *args, **kwargs) -> None:
+        return None
+
+    trace = debug = info = success = warning = error = exception = _drop
+
+
+_null_logger = _NullLogger()
+_sample_rate = 1.0
+
+
+def sampled():
+    """Logger for per-request hot paths; only ``log.sample_rate`` of calls get through.
+
+    The coin is flipped before loguru is called, so dropped calls cost neither
+    record creation nor message formatting. Errors should not be sampled.
+    """
+    if _sample_rate >= 1.0 or random.random() < _sample_rate:
+        return loguru_logger
+    return _null_logger
+
+
+def setup_logger(settings: LogConfig | None = None):
+    global _sample_rate
+    settings = settings or config.log
+    _sample_rate = settings.sample_rate
+
     loguru_logger.remove()
     loguru_logger.add(
-        sys.stdout,
-        colorize=True,
-        format=LOGURU_FORMAT,
-        level=level,
-        enqueue=True,
-    )
-    loguru_logger.add(
-        LOG_FILE,
-        rotation="10 MB",
-        retention="10 days",
-        compression="zip",
-        encoding="utf-8",
+        BackgroundStream(sys.stdout) if settings.enqueue else sys.stdout,
+        colorize=settings.colorize and not settings.json_format,
         format=LOGURU_FORMAT,
-        level="INFO",
-        enqueue=True,
-        backtrace=True,
-        diagnose=True,
+        serialize=settings.json_format,
+        level=settings.level,
+        backtrace=settings.backtrace,
+        diagnose=settings.diagnose,
     )
-    loguru_logger.info(f"🚀 Loguru initialized. Logs → {LOG_FILE}")
+    if settings.file_enabled:
+        # Rotation and zip compression must stay off the request path, so the
+        # (INFO and up, low volume) file sink keeps loguru's own queue.
+        loguru_logger.add(
+            LOG_FILE,
+            rotation="10 MB",
+            retention="10 days",
+            compression="zip",
+            encoding="utf-8",
+            format=LOGURU_FORMAT,
+            serialize=settings.json_format,
+            level=settings.file_level,
+            enqueue=settings.enqueue,
+            backtrace=settings.backtrace,
+            diagnose=settings.diagnose,
+        )
+    loguru_logger.info("🚀 Loguru initialized. Logs → {}", LOG_FILE)
     return loguru_logger
 
 
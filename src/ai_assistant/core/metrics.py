@@ -0,0 +1,189 @@
+import time
+from functools import wraps
+from typing import Any, Awaitable, Callable
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from prometheus_client import Counter, Gauge, Histogram
+
+# Latency buckets from sub-millisecond cache/Qdrant calls up to slow LLM turns.
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+GRAPH_NODE_DURATION = Histogram(
+    "rag_graph_node_duration_seconds",
+    "RAG graph node latency",
+    ["node"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by key prefix and result",
+    ["prefix", "result"],
+)
+CACHE_WARMED = Counter(
+    "cache_warmed_queries_total",
+    "Popular queries re-run after a document change (ok, skipped, error)",
+    ["result"],
+)
+BATCH_DURATION = Histogram(
+    "inference_batch_duration_seconds",
+    "Micro-batch run time on the inference thread (embed, rerank)",
+    ["batcher"],
+    buckets=LATENCY_BUCKETS,
+)
+BATCH_SIZE = Histogram(
+    "inference_batch_size",
+    "Items per micro-batch (embed, rerank)",
+    ["batcher"],
+    buckets=BATCH_SIZE_BUCKETS,
+)
+VECTOR_STORE_DURATION = Histogram(
+    "vector_store_request_duration_seconds",
+    "Qdrant call latency",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+INFERENCE_REQUEST_DURATION = Histogram(
+    "inference_request_duration_seconds",
+    "Calls from an API worker to the inference sidecar",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds",
+    "LLM call latency",
+    ["model"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Histogram(
+    "llm_tokens",
+    "Tokens per LLM call",
+    ["model", "kind"],
+    buckets=TOKEN_BUCKETS,
+)
+LLM_CALLS = Counter(
+    "llm_guarded_calls_total",
+    "Graph LLM calls by outcome (ok, error, timeout, circuit_open, queue_timeout)",
+    ["call", "outcome"],
+)
+LLM_HEDGES = Counter(
+    "llm_hedged_requests_total",
+    "Hedge requests sent for slow calls, and how many answered first",
+    ["call", "result"],
+)
+# multiprocess_mode only applies under gunicorn with several workers (see
+# gunicorn.conf.py): in-flight counts add up, the breaker shows the worst worker.
+LLM_IN_FLIGHT = Gauge(
+    "llm_in_flight", "LLM calls holding a concurrency slot", multiprocess_mode="livesum"
+)
+LLM_QUEUED = Gauge(
+    "llm_queued",
+    "LLM calls waiting for a concurrency slot",
+    multiprocess_mode="livesum",
+)
+LLM_CIRCUIT_STATE = Gauge(
+    "llm_circuit_state",
+    "LLM circuit breaker state: 0 closed, 1 half-open, 2 open",
+    multiprocess_mode="livemax",
+)
+
+SCHEDULER_IN_FLIGHT = Gauge(
+    "scheduler_in_flight",
+    "Work holding a scheduler slot, per queue (chat, ingest)",
+    ["queue"],
+    multiprocess_mode="livesum",
+)
+SCHEDULER_QUEUED = Gauge(
+    "scheduler_queued",
+    "Work waiting for a scheduler slot, per queue",
+    ["queue"],
+    multiprocess_mode="livesum",
+)
+SCHEDULER_WAIT = Histogram(
+    "scheduler_wait_seconds",
+    "Time from arrival to getting a scheduler slot",
+    ["queue"],
+    buckets=LATENCY_BUCKETS,
+)
+SCHEDULER_REJECTED = Counter(
+    "scheduler_rejected_total",
+    "Work rejected with 429 (queue_full, queue_timeout)",
+    ["queue", "reason"],
+)
+
+
+def timed_node(name: str, node: Callable[..., Awaitable[Any]]):
+    """Wrap an async graph node so its duration lands in ``GRAPH_NODE_DURATION``."""
+    histogram = GRAPH_NODE_DURATION.labels(node=name)
+
+    @wraps(node)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await node(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Records latency and token usage of every call made through a chat model."""
+
+    # Runs on the event loop instead of a thread pool hop; it only does dict
+    # and counter updates.
+    run_inline = True
+
+    def __init__(self, model: str):
+        self.model = model
+        self._started: dict[UUID, float] = {}
+        self._duration = LLM_REQUEST_DURATION.labels(model=model)
+        self._input_tokens = LLM_TOKENS.labels(model=model, kind="input")
+        self._output_tokens = LLM_TOKENS.labels(model=model, kind="output")
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id: UUID, **kwargs
+    ) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self._duration.observe(time.perf_counter() - started)
+
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(
+                    getattr(generation, "message", None), "usage_metadata", None
+                )
+                if usage:
+                    self._input_tokens.observe(usage.get("input_tokens", 0))
+                    self._output_tokens.observe(usage.get("output_tokens", 0))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        self._started.pop(run_id, None)
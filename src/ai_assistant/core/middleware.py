@@ -0,0 +1,42 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.ai_assistant.core.metrics import HTTP_REQUEST_DURATION
+
+
+class MetricsMiddleware:
+    """Times every HTTP request into ``HTTP_REQUEST_DURATION``.
+
+    Plain ASGI rather than ``BaseHTTPMiddleware`` so responses are not
+    re-buffered through an extra task. Requests are labelled with the matched
+    route template (``/api/v1/admin/documents/{name}``), not the raw path, to
+    keep label cardinality bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status),
+            ).observe(time.perf_counter() - start)
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from src.ai_assistant.core import cache
+from src.ai_assistant.core.config import config
+from src.ai_assistant.core.resources import resources
+
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    detail: str | None = None
+    latency_ms: float = 0.0
+    checked_at: float = 0.0  # time.monotonic()
+
+
+class CachedProbe:
+    """Dependency check that runs at most once per ``ttl_seconds``.
+
+    Every caller within the TTL gets the last result, and callers arriving
+    while a check is running share it, so a load balancer polling every
+    worker once a second costs the dependency one request per TTL per worker.
+    A check that hangs is reported as failed after ``timeout_seconds``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        check: Callable[[], Awaitable[str | None]],
+        ttl_seconds: float,
+        timeout_seconds: float,
+    ):
+        self.name = name
+        self.check = check
+        self.ttl_seconds = ttl_seconds
+        self.timeout_seconds = timeout_seconds
+        self._last: ProbeResult | None = None
+        self._running: asyncio.Task | None = None
+
+    async def result(self) -> ProbeResult:
+        last = self._last
+        if last is not None and time.monotonic() - last.checked_at < self.ttl_seconds:
+            return last
+        if self._running is None or self._running.done():
+            self._running = asyncio.ensure_future(self._run())
+        return await asyncio.shield(self._running)
+
+    async def _run(self) -> ProbeResult:
+        start = time.monotonic()
+        try:
+            detail = await asyncio.wait_for(self.check(), self.timeout_seconds)
+            ok = True
+        except asyncio.TimeoutError:
+            ok, detail = False, f"timed out after {self.timeout_seconds}s"
+        except Exception as e:
+            ok, detail = False, str(e) or type(e).__name__
+
+        now = time.monotonic()
+        self._last = ProbeResult(ok, detail, round((now - start) * 1000, 2), now)
+        return self._last
+
+
+def _collection_exists() -> bool:
+    from src.ai_assistant.rag.vector_store import COLLECTION_NAME, get_qdrant_client
+
+    return get_qdrant_client().collection_exists(COLLECTION_NAME)
+
+
+async def check_qdrant() -> str | None:
+    from src.ai_assistant.rag.vector_store import COLLECTION_NAME
+
+    # The client is sync (and its first creation does a version check), so
+    # keep every network round trip off the event loop.
+    if not await asyncio.to_thread(_collection_exists):
+        raise RuntimeError(f"collection '{COLLECTION_NAME}' not found")
+    return None
+
+
+async def check_redis() -> str | None:
+    if not await cache.ping():
+        return "cache disabled"
+    return None
+
+
+async def check_inference() -> str | None:
+    from src.ai_assistant.inference.client import get_inference_client
+
+    await get_inference_client().health()
+    return None
+
+
+probes = {
+    "qdrant": CachedProbe(
+        "qdrant",
+        check_qdrant,
+        config.health.probe_ttl_seconds,
+        config.health.probe_timeout_seconds,
+    ),
+    "redis": CachedProbe(
+        "redis",
+        check_redis,
+        config.health.probe_ttl_seconds,
+        config.health.probe_timeout_seconds,
+    ),
+}
+if config.inference.url:
+    probes["inference"] = CachedProbe(
+        "inference",
+        check_inference,
+        config.health.probe_ttl_seconds,
+        config.health.probe_timeout_seconds,
+    )
+
+
+def queue_depths() -> dict[str, int]:
+    """Inference queue depths; empty until the pipeline has been built."""
+    if not resources.is_loaded("rag_pipeline"):
+        return {}
+    return resources.rag_pipeline.queue_depths()
+
+
+def redis_required() -> bool:
+    return config.cache.enabled and config.health.require_redis
+
+
+async def run_probes() -> dict[str, ProbeResult]:
+    names = [name for name in probes if name != "redis" or redis_required()]
+    results = await asyncio.gather(*(probes[name].result() for name in names))
+    return dict(zip(names, results))
@@ -0,0 +1,222 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Literal, TypeVar
+
+from src.ai_assistant.core.config import config
+from src.ai_assistant.core.logger import logger
+from src.ai_assistant.core.metrics import (
+    LLM_CALLS,
+    LLM_CIRCUIT_STATE,
+    LLM_HEDGES,
+    LLM_IN_FLIGHT,
+    LLM_QUEUED,
+)
+
+T = TypeVar("T")
+CircuitState = Literal["closed", "half_open", "open"]
+_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class LLMUnavailable(Exception):
+    """The LLM did not answer: circuit open, no free slot, or deadline exceeded."""
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(f"LLM unavailable ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Stops calling the LLM after ``failure_threshold`` consecutive failures.
+
+    While open, calls are rejected without touching Gemini. After
+    ``reset_seconds`` one trial call is let through (half-open): success
+    closes the circuit, failure opens it for another period.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state: CircuitState = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        LLM_CIRCUIT_STATE.set(0)
+
+    def _set(self, state: CircuitState) -> None:
+        if state != self.state:
+            logger.warning("LLM circuit {} -> {}", self.state, state)
+            self.state = state
+            LLM_CIRCUIT_STATE.set(_STATE_VALUES[state])
+
+    def retry_after(self) -> float:
+        if self.state != "open":
+            return 1.0
+        return max(1.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._set("half_open")
+        if self.state == "half_open":
+            if self._trial_running:
+                return False
+            self._trial_running = True
+        return True
+
+    def release(self) -> None:
+        """End of the half-open trial call, whatever its outcome."""
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._set("closed")
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._set("open")
+
+
+class ConcurrencyLimiter:
+    """Caps in-flight LLM calls; callers queue for at most ``queue_timeout`` seconds."""
+
+    def __init__(self, limit: int, queue_timeout: float):
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives bind to the first loop that waits on them.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.limit)
+            self._loop = loop
+        return self._semaphore
+
+    async def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now."""
+        semaphore = self._get_semaphore()
+        if semaphore.locked():
+            return False
+        await semaphore.acquire()  # returns without suspending
+        LLM_IN_FLIGHT.inc()
+        return True
+
+    def release(self) -> None:
+        self._get_semaphore().release()
+        LLM_IN_FLIGHT.dec()
+
+    @asynccontextmanager
+    async def slot(self):
+        semaphore = self._get_semaphore()
+        LLM_QUEUED.inc()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise LLMUnavailable("queue_timeout") from None
+        finally:
+            LLM_QUEUED.dec()
+        LLM_IN_FLIGHT.inc()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class LLMGuard:
+    """Deadline, concurrency cap, hedging and circuit breaker for LLM calls.
+
+    ``call`` takes a factory rather than a coroutine so a hedge can start a
+    second, independent request. Hedges only use a free slot, never queue,
+    and are meant for short idempotent calls (routing).
+    """
+
+    def __init__(
+        self,
+        limiter: ConcurrencyLimiter,
+        breaker: CircuitBreaker,
+        hedge_after_ms: float,
+    ):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.hedge_after_ms = hedge_after_ms
+
+    async def call(
+        self,
+        name: str,
+        factory: Callable[[], Awaitable[T]],
+        timeout: float,
+        hedge: bool = False,
+    ) -> T:
+        if not self.breaker.allow():
+            LLM_CALLS.labels(call=name, outcome="circuit_open").inc()
+            raise LLMUnavailable("circuit_open", self.breaker.retry_after())
+        # Only the trial is let through half-open: calls started before the
+        # circuit opened must not free its slot when they finish.
+        trial = self.breaker.state == "half_open"
+
+        try:
+            async with self.limiter.slot():
+                if hedge and self.hedge_after_ms > 0:
+                    attempt = self._hedged(name, factory)
+                else:
+                    attempt = factory()
+                result = await asyncio.wait_for(attempt, timeout)
+        except LLMUnavailable as e:
+            LLM_CALLS.labels(call=name, outcome=e.reason).inc()
+            raise
+        except asyncio.TimeoutError:
+            self.breaker.record_failure()
+            LLM_CALLS.labels(call=name, outcome="timeout").inc()
+            raise LLMUnavailable("timeout", self.breaker.retry_after()) from None
+        except Exception:
+            self.breaker.record_failure()
+            LLM_CALLS.labels(call=name, outcome="error").inc()
+            raise
+        finally:
+            if trial:
+                self.breaker.release()
+
+        self.breaker.record_success()
+        LLM_CALLS.labels(call=name, outcome="ok").inc()
+        return result
+
+    async def _hedged(self, name: str, factory: Callable[[], Awaitable[T]]) -> T:
+        first = asyncio.ensure_future(factory())
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after_ms / 1000)
+        if done or not await self.limiter.try_acquire():
+            return await first
+
+        LLM_HEDGES.labels(call=name, result="sent").inc()
+        second = asyncio.ensure_future(factory())
+        second.add_done_callback(lambda _: self.limiter.release())
+        pending = {first, second}
+        try:
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            LLM_HEDGES.labels(call=name, result="won").inc()
+                        return task.result()
+                if not pending:
+                    return done.pop().result()  # both failed: raise the last error
+        finally:
+            for task in (first, second):
+                task.cancel()
+
+
+llm_guard = LLMGuard(
+    ConcurrencyLimiter(config.llm.max_concurrency, config.llm.queue_timeout_seconds),
+    CircuitBreaker(
+        config.llm.breaker_failure_threshold, config.llm.breaker_reset_seconds
+    ),
+    config.llm.hedge_after_ms,
+)
@@ -0,0 +1,190 @@
+import asyncio
+import gc
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Literal
+
+from src.ai_assistant.core.config import config
+from src.ai_assistant.core.logger import logger
+
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
+
+    from src.ai_assistant.rag.pipeline import RAGPipeline
+
+WarmupStatus = Literal["pending", "running", "done", "failed", "disabled"]
+# What a request can need: readiness waits until all of them exist.
+SERVING_RESOURCES = ("agent", "router", "rag_graph", "rag_pipeline")
+
+
+class AppResources:
+    """Process-wide heavy objects, built on first use instead of at import.
+
+    Importing the app only defines routes. The Gemini client, the agent, the
+    RAG pipeline (embedding model, reranker, Qdrant connection) and the
+    compiled graph are constructed the first time something asks for them, or
+    up front by ``warmup`` which the lifespan runs in a background thread.
+    Each resource has its own lock, so a request needing the LLM doesn't wait
+    behind the embedding model loading. Async code loads through ``aget``,
+    so a cold load (or waiting on warmup's) never blocks the event loop.
+    """
+
+    def __init__(self):
+        self._instances: dict[str, Any] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self.load_seconds: dict[str, float] = {}
+        self.warmup_status: WarmupStatus = "pending"
+        self.warmup_error: str | None = None
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._locks.setdefault(name, threading.Lock()):
+            instance = self._instances.get(name)
+            if instance is None:
+                start = time.perf_counter()
+                instance = factory()
+                self.load_seconds[name] = round(time.perf_counter() - start, 3)
+                self._instances[name] = instance
+                logger.info("Loaded {} in {:.2f}s", name, self.load_seconds[name])
+        return instance
+
+    def load(self, name: str) -> Any:
+        """The resource ``name``, built now if it isn't yet. Blocking."""
+        return getattr(self, name)
+
+    async def aget(self, name: str) -> Any:
+        """The resource ``name``, loading it (or waiting for it) in a thread."""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        return await asyncio.to_thread(self.load, name)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def override(self, name: str, instance: Any) -> None:
+        """Install a ready-made instance (tests, benchmarks)."""
+        self._instances[name] = instance
+
+    @property
+    def llm(self):
+        from src.ai_assistant.graph.graph import build_llm
+
+        return self._get("llm", build_llm)
+
+    @property
+    def agent(self):
+        from src.ai_assistant.graph.graph import build_agent
+
+        return self._get("agent", lambda: build_agent(self.llm))
+
+    @property
+    def router(self):
+        from src.ai_assistant.graph.graph import build_router
+
+        return self._get("router", lambda: build_router(self.llm))
+
+    @property
+    def rag_pipeline(self) -> "RAGPipeline":
+        from src.ai_assistant.rag.pipeline import RAGPipeline
+
+        return self._get("rag_pipeline", RAGPipeline)
+
+    @property
+    def rag_graph(self) -> "CompiledStateGraph":
+        from src.ai_assistant.graph.graph import build_rag_graph
+
+        return self._get("rag_graph", build_rag_graph)
+
+    @property
+    def ready(self) -> bool:
+        # Not the warmup status alone: with warmup disabled nothing is loaded
+        # until requests need it.
+        return self.warmup_status != "running" and all(
+            self.is_loaded(name) for name in SERVING_RESOURCES
+        )
+
+    def preload(self) -> None:
+        """Load model weights in the gunicorn master, before workers fork.
+
+        Only the torch embedding model is loaded: its weights are read-only
+        and forked workers share them copy-on-write. Everything holding
+        threads, sockets or event-loop state (batchers, Qdrant and Redis
+        clients, the Gemini client, ONNX Runtime sessions of the reranker) is
+        built per worker by ``warmup``. No inference runs here, so the
+        OpenMP thread pool is not started before the fork.
+        """
+        from src.ai_assistant.rag.embeddings import get_embedding_model
+
+        if config.inference.url:
+            return  # models live in the inference sidecar
+        start = time.perf_counter()
+        get_embedding_model()
+        gc.collect()
+        # Keep the collector from touching (and so copying) preloaded objects.
+        gc.freeze()
+        logger.info("Preloaded models in {:.2f}s", time.perf_counter() - start)
+
+    def warmup(self) -> None:
+        """Build every resource and run one embed/rerank pass. Blocking."""
+        self.warmup_status = "running"
+        start = time.perf_counter()
+        try:
+            for name in SERVING_RESOURCES:
+                self.load(name)
+            self.rag_pipeline.warmup()
+        except Exception as e:
+            self.warmup_status = "failed"
+            self.warmup_error = str(e)
+            logger.error("Warmup failed: {}", e)
+            return
+        self.warmup_status = "done"
+        logger.info("Warmup finished in {:.2f}s", time.perf_counter() - start)
+
+
+resources = AppResources()
+
+
+# Accessors for code that runs per request. Graph nodes must use these rather
+# than ``resources.<name>``: when compiling, LangGraph follows attribute chains
+# in node bytecode with getattr() looking for subgraphs, which would trigger
+# the properties and load every model. As FastAPI dependencies they are sync
+# on purpose, so a cold first load runs in the thread pool, not on the loop;
+# async code (graph nodes) uses the ``aget_*`` variants for the same reason.
+def get_llm():
+    return resources.llm
+
+
+def get_agent():
+    return resources.agent
+
+
+def get_router():
+    return resources.router
+
+
+def get_rag_pipeline() -> "RAGPipeline":
+    return resources.rag_pipeline
+
+
+def get_rag_graph() -> "CompiledStateGraph":
+    return resources.rag_graph
+
+
+async def aget_agent():
+    return await resources.aget("agent")
+
+
+async def aget_router():
+    return await resources.aget("router")
+
+
+async def aget_rag_pipeline() -> "RAGPipeline":
+    return await resources.aget("rag_pipeline")
+
+
+async def aget_rag_graph() -> "CompiledStateGraph":
+    return await resources.aget("rag_graph")
@@ -0,0 +1,183 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Literal
+
+from src.ai_assistant.core.config import config
+from src.ai_assistant.core.metrics import (
+    SCHEDULER_IN_FLIGHT,
+    SCHEDULER_QUEUED,
+    SCHEDULER_REJECTED,
+    SCHEDULER_WAIT,
+)
+
+WorkClass = Literal["chat", "ingest"]
+
+
+class Overloaded(Exception):
+    """A work queue is full or its wait ran out; the client should retry later."""
+
+    def __init__(self, work_class: WorkClass, reason: str, retry_after: float = 1.0):
+        super().__init__(f"Server busy ({work_class} {reason})")
+        self.work_class = work_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    aged: bool = False  # ingest waiter that has deferred to chat long enough
+
+
+@dataclass
+class _Queue:
+    limit: int
+    max_queue: int
+    queue_timeout: float
+    in_flight: int = 0
+    waiters: deque[_Waiter] = field(default_factory=deque)
+    hold_seconds: float = 0.5  # moving average of slot hold time, for Retry-After
+
+
+class PriorityScheduler:
+    """Admission control for CPU-bound work: chat retrieval before ingestion.
+
+    Each class has its own concurrency cap and bounded queue; a full queue or
+    an expired wait raises ``Overloaded`` (HTTP 429 with Retry-After). Ingest
+    slots are additionally held back while chat work is running or waiting,
+    for at most ``ingest_max_defer_seconds`` per slot, so steady chat traffic
+    slows indexing down instead of stopping it. Indexing takes one slot per
+    embedding batch, so chat never waits behind more than one batch.
+    """
+
+    def __init__(
+        self,
+        chat_limit: int,
+        chat_max_queue: int,
+        chat_queue_timeout: float,
+        ingest_limit: int,
+        ingest_max_queue: int,
+        ingest_queue_timeout: float,
+        ingest_max_defer_seconds: float,
+    ):
+        self._settings = {
+            "chat": (chat_limit, chat_max_queue, chat_queue_timeout),
+            "ingest": (ingest_limit, ingest_max_queue, ingest_queue_timeout),
+        }
+        self.ingest_max_defer_seconds = ingest_max_defer_seconds
+        self._queues: dict[WorkClass, _Queue] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_queues(self) -> dict[WorkClass, _Queue]:
+        # Futures bind to the loop that created them; start over on a new loop.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._queues = {name: _Queue(*s) for name, s in self._settings.items()}
+            self._loop = loop
+        return self._queues
+
+    def _chat_busy(self) -> bool:
+        chat = self._queues["chat"]
+        return chat.in_flight > 0 or bool(chat.waiters)
+
+    def _can_start(self, work_class: WorkClass, waiter: _Waiter | None = None) -> bool:
+        queue = self._queues[work_class]
+        if queue.in_flight >= queue.limit:
+            return False
+        if work_class == "ingest" and self._chat_busy():
+            return waiter is not None and waiter.aged
+        return True
+
+    def _start(self, work_class: WorkClass) -> None:
+        self._queues[work_class].in_flight += 1
+        SCHEDULER_IN_FLIGHT.labels(queue=work_class).inc()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters, chat first."""
+        for work_class in ("chat", "ingest"):
+            waiters = self._queues[work_class].waiters
+            while waiters and waiters[0].future.done():
+                waiters.popleft()  # timed out or cancelled
+            while waiters and self._can_start(work_class, waiters[0]):
+                self._start(work_class)
+                waiters.popleft().future.set_result(None)
+
+    def _age(self, waiter: _Waiter) -> None:
+        waiter.aged = True
+        self._dispatch()
+
+    def retry_after(self, work_class: WorkClass) -> float:
+        queue = self._get_queues()[work_class]
+        return max(1.0, queue.hold_seconds * (len(queue.waiters) + 1) / queue.limit)
+
+    def admit(self, work_class: WorkClass) -> None:
+        """Reject up front when the queue is full, before any work is done."""
+        queue = self._get_queues()[work_class]
+        if len(queue.waiters) >= queue.max_queue:
+            SCHEDULER_REJECTED.labels(queue=work_class, reason="queue_full").inc()
+            raise Overloaded(work_class, "queue_full", self.retry_after(work_class))
+
+    async def _acquire(self, work_class: WorkClass) -> None:
+        queue = self._get_queues()[work_class]
+        if not queue.waiters and self._can_start(work_class):
+            self._start(work_class)
+            SCHEDULER_WAIT.labels(queue=work_class).observe(0)
+            return
+
+        self.admit(work_class)
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop.create_future())
+        queue.waiters.append(waiter)
+        aging = None
+        if work_class == "ingest":
+            aging = loop.call_later(self.ingest_max_defer_seconds, self._age, waiter)
+        start = time.monotonic()
+        SCHEDULER_QUEUED.labels(queue=work_class).inc()
+        try:
+            await asyncio.wait_for(waiter.future, queue.queue_timeout)
+        except asyncio.TimeoutError:
+            SCHEDULER_REJECTED.labels(queue=work_class, reason="queue_timeout").inc()
+            raise Overloaded(
+                work_class, "queue_timeout", self.retry_after(work_class)
+            ) from None
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(work_class)  # granted as the caller went away
+            raise
+        finally:
+            SCHEDULER_QUEUED.labels(queue=work_class).dec()
+            if aging is not None:
+                aging.cancel()
+            self._dispatch()  # drop the waiter if it gave up
+        SCHEDULER_WAIT.labels(queue=work_class).observe(time.monotonic() - start)
+
+    def _release(self, work_class: WorkClass, held: float | None = None) -> None:
+        queue = self._queues[work_class]
+        queue.in_flight -= 1
+        SCHEDULER_IN_FLIGHT.labels(queue=work_class).dec()
+        if held is not None:
+            queue.hold_seconds = 0.8 * queue.hold_seconds + 0.2 * held
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, work_class: WorkClass):
+        await self._acquire(work_class)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(work_class, time.monotonic() - start)
+
+
+scheduler = PriorityScheduler(
+    config.scheduler.chat_max_concurrency,
+    config.scheduler.chat_max_queue,
+    config.scheduler.chat_queue_timeout_seconds,
+    config.scheduler.ingest_max_concurrency,
+    config.scheduler.ingest_max_queue,
+    config.scheduler.ingest_queue_timeout_seconds,
+    config.scheduler.ingest_max_defer_seconds,
+)
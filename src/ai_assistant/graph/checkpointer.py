@@ -0,0 +1,321 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Sequence
+from typing import Any
+
+import ormsgpack
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.ai_assistant.core.config import config
+from src.ai_assistant.core.logger import logger
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """In-process checkpointer that keeps only what the agent needs.
+
+    Only the latest checkpoint per thread is retained (the agent never time
+    travels), and threads are evicted least-recently-used once there are more
+    than ``max_threads`` of them or they've been idle for ``idle_ttl_seconds``.
+    """
+
+    def __init__(self, max_threads: int, idle_ttl_seconds: int):
+        super().__init__()
+        self.max_threads = max_threads
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._last_seen: OrderedDict[str, float] = OrderedDict()
+        self._blob_keys: dict[tuple[str, str], set[tuple]] = {}
+        self._lock = threading.RLock()
+
+    def _touch(self, thread_id: str) -> None:
+        now = time.monotonic()
+        self._last_seen[thread_id] = now
+        self._last_seen.move_to_end(thread_id)
+
+        while self._last_seen:
+            oldest, seen_at = next(iter(self._last_seen.items()))
+            if (
+                len(self._last_seen) <= self.max_threads
+                and now - seen_at <= self.idle_ttl_seconds
+            ):
+                break
+            self.delete_thread(oldest)
+
+    def _compact(self, thread_id: str, checkpoint_ns: str, keep_id: str) -> None:
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        for checkpoint_id in [c for c in checkpoints if c != keep_id]:
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+
+        kept: Checkpoint = self.serde.loads_typed(checkpoints[keep_id][0])
+        live = {
+            (thread_id, checkpoint_ns, channel, version)
+            for channel, version in kept["channel_versions"].items()
+        }
+        blob_keys = self._blob_keys.get((thread_id, checkpoint_ns), set())
+        for key in blob_keys - live:
+            self.blobs.pop(key, None)
+        self._blob_keys[(thread_id, checkpoint_ns)] = blob_keys & live
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            # The parent's defaultdict would create an entry for unknown
+            # threads that nothing ever evicts.
+            if thread_id not in self.storage:
+                return None
+            checkpoint_tuple = super().get_tuple(config)
+            if checkpoint_tuple is not None:
+                self._touch(thread_id)
+            return checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+            self._blob_keys.setdefault((thread_id, checkpoint_ns), set()).update(
+                (thread_id, checkpoint_ns, channel, version)
+                for channel, version in new_versions.items()
+            )
+            self._compact(thread_id, checkpoint_ns, checkpoint["id"])
+            self._touch(thread_id)
+            return result
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            super().delete_thread(thread_id)
+            self._last_seen.pop(thread_id, None)
+            for key in [k for k in self._blob_keys if k[0] == thread_id]:
+                del self._blob_keys[key]
+
+
+def _as_bytes(value: bytes | str) -> bytes:
+    return value if isinstance(value, bytes) else value.encode()
+
+
+class RedisSaver(BaseCheckpointSaver[int]):
+    """Shallow Redis checkpointer shared by all workers and replicas.
+
+    Each thread namespace is one msgpack value holding the latest checkpoint
+    plus a hash of its pending writes. Both keys expire after
+    ``idle_ttl_seconds`` without reads or writes, which is how idle threads
+    are evicted. Async-only: the agent is always invoked with ``ainvoke``.
+    """
+
+    def __init__(self, redis_url: str, key_prefix: str, idle_ttl_seconds: int):
+        super().__init__()
+        self.redis_url = redis_url
+        self.key_prefix = key_prefix
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._client: Any = None
+
+    def _get_client(self):
+        if self._client is None:
+            from src.ai_assistant.core.cache import create_redis_client
+
+            self._client = create_redis_client(self.redis_url)
+        return self._client
+
+    def _keys(self, thread_id: str, checkpoint_ns: str) -> tuple[str, str]:
+        key = f"{self.key_prefix}{thread_id}:{checkpoint_ns}"
+        return key, f"{key}:writes"
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        key, writes_key = self._keys(thread_id, checkpoint_ns)
+
+        async with self._get_client().pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.hgetall(writes_key)
+            pipe.expire(key, self.idle_ttl_seconds)
+            pipe.expire(writes_key, self.idle_ttl_seconds)
+            raw, raw_writes, *_ = await pipe.execute()
+
+        if raw is None:
+            return None
+        record = ormsgpack.unpackb(raw)
+        checkpoint_id = record["id"]
+        requested_id = get_checkpoint_id(config)
+        if requested_id and requested_id != checkpoint_id:
+            return None
+
+        writes = [ormsgpack.unpackb(v) for v in raw_writes.values()]
+        writes = sorted(
+            (w for w in writes if w[0] == checkpoint_id),
+            key=lambda w: (w[5], w[1], w[2]),
+        )
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed(tuple(record["checkpoint"])),
+            metadata=self.serde.loads_typed(tuple(record["metadata"])),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed(tuple(value)))
+                for _, task_id, _, channel, value, _ in writes
+            ],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": record["parent"],
+                    }
+                }
+                if record["parent"]
+                else None
+            ),
+        )
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if config is None or limit == 0:
+            return
+        checkpoint_tuple = await self.aget_tuple(config)
+        if checkpoint_tuple is None:
+            return
+        if before and (before_id := get_checkpoint_id(before)):
+            if checkpoint_tuple.config["configurable"]["checkpoint_id"] >= before_id:
+                return
+        if filter and any(
+            checkpoint_tuple.metadata.get(k) != v for k, v in filter.items()
+        ):
+            return
+        yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        key, writes_key = self._keys(thread_id, checkpoint_ns)
+        record = ormsgpack.packb(
+            {
+                "id": checkpoint["id"],
+                "parent": config["configurable"].get("checkpoint_id"),
+                "checkpoint": self.serde.dumps_typed(checkpoint),
+                "metadata": self.serde.dumps_typed(metadata),
+            }
+        )
+
+        client = self._get_client()
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.set(key, record, ex=self.idle_ttl_seconds)
+            pipe.hkeys(writes_key)
+            _, fields = await pipe.execute()
+
+        # Writes of earlier checkpoints were applied to this one and are never
+        # read again. Writes for this checkpoint may already be here (parallel
+        # branches, retries), so only fields of other checkpoints go.
+        current = f"{checkpoint['id']}:".encode()
+        stale = [f for f in fields if not _as_bytes(f).startswith(current)]
+        if stale:
+            await client.hdel(writes_key, *stale)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        _, writes_key = self._keys(thread_id, checkpoint_ns)
+
+        async with self._get_client().pipeline(transaction=False) as pipe:
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                field = f"{checkpoint_id}:{task_id}:{write_idx}"
+                packed = ormsgpack.packb(
+                    [
+                        checkpoint_id,
+                        task_id,
+                        write_idx,
+                        channel,
+                        self.serde.dumps_typed(value),
+                        task_path,
+                    ]
+                )
+                # Regular writes are idempotent per task; special ones overwrite.
+                if write_idx >= 0:
+                    pipe.hsetnx(writes_key, field, packed)
+                else:
+                    pipe.hset(writes_key, field, packed)
+            pipe.expire(writes_key, self.idle_ttl_seconds)
+            await pipe.execute()
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        client = self._get_client()
+        keys = [
+            k async for k in client.scan_iter(match=f"{self.key_prefix}{thread_id}:*")
+        ]
+        if keys:
+            await client.delete(*keys)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    settings = config.checkpoint
+    if settings.backend == "redis":
+        logger.info("Using Redis checkpointer ({})", config.cache.redis_url)
+        return RedisSaver(
+            config.cache.redis_url, settings.key_prefix, settings.idle_ttl_seconds
+        )
+    return BoundedMemorySaver(settings.max_threads, settings.idle_ttl_seconds)
@@ -1,177 +1,297 @@
+from dataclasses import dataclass
+
 from langgraph.graph import StateGraph, END
-from langchain.agents import create_agent
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
-from langchain.agents.middleware import SummarizationMiddleware
-from langgraph.checkpoint.memory import InMemorySaver
+from langchain_core.prompts import PromptTemplate
+from langchain.agents.middleware import (
+    ModelRequest,
+    SummarizationMiddleware,
+    dynamic_prompt,
+)
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage
 
 from src.ai_assistant.utils.prompts import load_prompt
-from src.ai_assistant.graph.state import RAGState
-from src.ai_assistant.rag import RAGPipeline
+from src.ai_assistant.graph.state import RAGState, RouteDecision
+from src.ai_assistant.graph.checkpointer import get_checkpointer
+from src.ai_assistant.rag.context import pack_context
 from src.ai_assistant.core.config import config
-from src.ai_assistant.core.logger import logger
+from src.ai_assistant.core.logger import logger, sampled
+from src.ai_assistant.core.metrics import LLMMetricsCallback, timed_node
+from src.ai_assistant.core.resilience import LLMUnavailable, llm_guard
+from src.ai_assistant.core.resources import aget_agent, aget_rag_pipeline, aget_router
+from src.ai_assistant.core.scheduler import scheduler
 from src.ai_assistant.core.cache import (
-    get_json,
-    set_json,
+    get_or_compute,
     optimize_query_cache_key,
     generate_cache_key,
+    rag_retrieve_cache_key,
 )
 
 
-llm = ChatGoogleGenerativeAI(
-    model=config.llm.model_name,
-    temperature=config.llm.temperature,
-    top_k=config.llm.top_k,
-    top_p=config.llm.top_p,
-    google_api_key=config.llm.api_key,
-)
+@dataclass
+class AgentContext:
+    """Per-turn agent input that is not persisted in the thread."""
+
+    rag_context: str | None = None
+
+
+@dynamic_prompt
+def rag_context_prompt(request: ModelRequest) -> str:
+    system_prompt = request.system_message.content if request.system_message else ""
+    context = request.runtime.context
+    if context is None or not context.rag_context:
+        return system_prompt
+    return f"{system_prompt}\n\n{context.rag_context}"
+
+
+def build_llm():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=config.llm.model_name,
+        temperature=config.llm.temperature,
+        top_k=config.llm.top_k,
+        top_p=config.llm.top_p,
+        google_api_key=config.llm.api_key,
+        timeout=config.llm.request_timeout_seconds,
+        max_retries=config.llm.max_retries,
+        callbacks=[LLMMetricsCallback(config.llm.model_name)],
+    )
+
+
+def build_agent(llm):
+    from langchain.agents import create_agent
+
+    return create_agent(
+        llm,
+        middleware=[
+            SummarizationMiddleware(
+                llm, max_tokens_before_summary=10000, messages_to_keep=20
+            ),
+            rag_context_prompt,
+        ],
+        system_prompt=load_prompt("system.txt"),
+        checkpointer=get_checkpointer(),
+        context_schema=AgentContext,
+    )
+
+
+def build_router(llm):
+    # Native JSON-schema output: the route, rewritten query, sub-queries and
+    # standalone flag come back from one call, already parsed.
+    return llm.with_structured_output(RouteDecision, method="json_schema")
 
-agent = create_agent(
-    llm,
-    middleware=[
-        SummarizationMiddleware(
-            llm, max_tokens_before_summary=10000, messages_to_keep=20
-        ),
-    ],
-    system_prompt=load_prompt("system.txt"),
-    checkpointer=InMemorySaver(),
-)
 
 rag_template = PromptTemplate(
     template=load_prompt("rag.txt"),
     input_variables=["context", "query"],
 )
 
-rewrite_prompt = PromptTemplate(
-    template=load_prompt("rag_rewrite.txt"),
-    input_variables=["query"],
+rag_context_template = PromptTemplate(
+    template=load_prompt("rag_context.txt"),
+    input_variables=["context"],
 )
 
-
-gate_prompt = ChatPromptTemplate.from_messages(
-    [
-        (
-            "system",
-            "You are a classifier. Decide if the user's question requires information from documents.\n"
-            "If the question can be answered without documents, respond ONLY with 'NO_RAG'.\n"
-            "If the question requires information from the documents, respond ONLY with 'USE_RAG'.",
-        ),
-        ("user", "{query}"),
-    ]
+route_prompt = PromptTemplate(
+    template=load_prompt("route.txt"),
+    input_variables=["query"],
 )
 
-rag_pipeline = RAGPipeline()
 
+async def thread_has_history(thread_id: str) -> bool:
+    agent = await aget_agent()
+    snapshot = await agent.aget_state({"configurable": {"thread_id": thread_id}})
+    return bool(snapshot.values.get("messages"))
 
-async def node_llm_gatekeeper(state: RAGState) -> RAGState:
-    decision = await llm.ainvoke(gate_prompt.format(query=state.query))
 
-    if decision.content.strip() == "NO_RAG":
-        state.use_rag = False
-        general_response = await agent.ainvoke(
-            {"messages": state.query}, {"configurable": {"thread_id": state.thread_id}}
-        )
-        state.answer = general_response["messages"][-1].content
-    else:
-        state.use_rag = True
+async def record_turn(thread_id: str, question: str, answer: str) -> None:
+    """Append a turn answered from cache to the thread, as the agent would.
 
-    return state
+    Without it the thread never sees the exchange: its next message would
+    count as a first turn, be answered without it and be cached as shared.
+    """
+    try:
+        agent = await aget_agent()
+        await agent.aupdate_state(
+            {"configurable": {"thread_id": thread_id}},
+            {"messages": [HumanMessage(question), AIMessage(answer)]},
+            as_node="model",
+        )
+    except Exception as e:
+        logger.warning("Could not record cached turn in thread {}: {}", thread_id, e)
 
 
-async def node_bypass_rag(state: RAGState) -> RAGState:
-    return state
+async def node_route(state: RAGState) -> RAGState:
+    """Gatekeeper and query rewrite in a single structured LLM call."""
 
+    async def route() -> dict:
+        router = await aget_router()
+        decision = await llm_guard.call(
+            "route",
+            lambda: router.ainvoke(route_prompt.format(query=state.query)),
+            config.llm.route_timeout_seconds,
+            hedge=True,
+        )
+        return {
+            "use_rag": decision.use_rag,
+            "query_optimized": decision.search_query.strip(),
+            "sub_queries": [q.strip() for q in decision.sub_queries if q.strip()][:3],
+            "standalone": decision.standalone,
+        }
 
-async def node_optimize_query(state: RAGState) -> RAGState:
-    cache_key = optimize_query_cache_key(state.query)
-    cached = await get_json(cache_key)
-    if cached is not None:
-        state.query_optimized = cached.get("query_optimized") or state.query
-        return state
     try:
-        result = await llm.ainvoke(rewrite_prompt.format(query=state.query))
-        optimized = result.content.strip()
-        state.query_optimized = optimized
-        await set_json(
-            cache_key,
-            {"query_optimized": optimized},
+        cached = await get_or_compute(
+            optimize_query_cache_key(state.query),
             config.cache.optimize_query_ttl_seconds,
+            route,
         )
+        # Entries written before routing was fused hold only the rewrite,
+        # and only RAG queries were rewritten.
+        state.use_rag = cached.get("use_rag", True)
+        state.query_optimized = cached.get("query_optimized") or state.query
+        state.sub_queries = cached.get("sub_queries", [])
     except Exception as e:
+        # Retrieving when unsure costs latency; skipping it could cost the answer.
+        state.use_rag = True
         state.query_optimized = state.query
-        logger.error(f"Query rewrite failed: {str(e)}")
+        logger.warning("Routing failed, using RAG with the original query: {}", e)
+
+    return state
+
 
+async def node_direct_answer(state: RAGState) -> RAGState:
+    agent = await aget_agent()
+    general_response = await llm_guard.call(
+        "generate",
+        lambda: agent.ainvoke(
+            {"messages": state.query},
+            {"configurable": {"thread_id": state.thread_id}},
+        ),
+        config.llm.generate_timeout_seconds,
+    )
+    state.answer = general_response["messages"][-1].content
     return state
 
 
 async def node_retrieve(state: RAGState) -> RAGState:
     q = state.query_optimized or state.query
-    docs = await rag_pipeline.retrieve(q, 4)
-    state.docs = docs
+    sub_queries = state.sub_queries if config.rag.multi_query else []
+
+    async def retrieve() -> list[dict]:
+        pipeline = await aget_rag_pipeline()
+        async with scheduler.slot("chat"):
+            if sub_queries:
+                docs = await pipeline.retrieve_multi(q, sub_queries, 4)
+            else:
+                docs = await pipeline.retrieve(q, 4)
+        return [{"page_content": d.page_content, "metadata": d.metadata} for d in docs]
+
+    # Cleared whenever documents are added or deleted (delete_documents_cache).
+    cached = await get_or_compute(
+        rag_retrieve_cache_key("\n".join([q, *sub_queries])),
+        config.cache.rag_retrieve_ttl_seconds,
+        retrieve,
+    )
+    state.docs = [Document(**doc) for doc in cached]
     return state
 
 
 async def node_build_prompt(state: RAGState) -> RAGState:
-    context = ""
-
-    for doc in state.docs:
-        context += f"Document: {doc.metadata.get('source', 'unknown').split('/')[-1]}\n\n\n{doc.page_content}\n\n"
+    packed = pack_context(state.docs)
+    state.docs = packed.documents
+    state.context_tokens = packed.tokens
+    sampled().debug(
+        "Packed {} context spans, ~{} tokens", len(packed.documents), packed.tokens
+    )
 
-    state.prompt = rag_template.format(context=context, query=state.query)
+    # The full prompt is still built: it keys the generate cache either way.
+    state.prompt = rag_template.format(context=packed.text, query=state.query)
+    state.context = rag_context_template.format(context=packed.text)
     return state
 
 
 async def node_generate(state: RAGState) -> RAGState:
-    cache_key = generate_cache_key(state.prompt)
-    cached = await get_json(cache_key)
-    if cached is not None:
-        state.answer = cached.get("answer") or ""
-        return state
-    try:
-        response = await agent.ainvoke(
-            {"messages": state.prompt}, {"configurable": {"thread_id": state.thread_id}}
+    async def invoke_agent():
+        agent = await aget_agent()
+        if config.rag.ephemeral_context:
+            return await agent.ainvoke(
+                {"messages": [HumanMessage(state.query)]},
+                {"configurable": {"thread_id": state.thread_id}},
+                context=AgentContext(rag_context=state.context),
+            )
+        return await agent.ainvoke(
+            {"messages": state.prompt},
+            {"configurable": {"thread_id": state.thread_id}},
         )
-        state.answer = response["messages"][-1].content
-        await set_json(
-            cache_key,
-            {"answer": state.answer},
+
+    computed = False
+
+    async def generate() -> dict:
+        nonlocal computed
+        computed = True
+        response = await llm_guard.call(
+            "generate", invoke_agent, config.llm.generate_timeout_seconds
+        )
+        return {"answer": response["messages"][-1].content}
+
+    try:
+        cached = await get_or_compute(
+            generate_cache_key(state.prompt, state.cache_scope),
             config.cache.generate_ttl_seconds,
+            generate,
         )
+        state.answer = cached.get("answer") or ""
+        if not computed:
+            await record_turn(state.thread_id, state.query, state.answer)
+    except LLMUnavailable:
+        raise  # answered with 503 by the app, and never cached
     except Exception as e:
         state.answer = f"Error generating response: {str(e)}"
-        logger.error(f"Error in node_generate: {str(e)}")
+        logger.error("Error in node_generate: {}", e)
 
     return state
 
 
+async def run_conversation(
+    rag_graph, prompt: str, thread_id: str, scope: str | None
+) -> dict:
+    """One turn through the graph, as ``ConversationResponse`` fields."""
+    final_state = await rag_graph.ainvoke(
+        RAGState(query=prompt, thread_id=thread_id, cache_scope=scope)
+    )
+
+    documents_sources = []
+    for doc in final_state["docs"]:
+        source = doc.metadata.get("source", "unknown").split("/")[-1]
+        if source not in documents_sources:
+            documents_sources.append(source)
+
+    return {"answer": final_state["answer"], "document_sources": documents_sources}
+
+
 def build_rag_graph():
     graph = StateGraph(RAGState)
 
-    graph.add_node("gatekeeper", node_llm_gatekeeper)
-    graph.add_node("optimize_query", node_optimize_query)
-    graph.add_node("retrieve", node_retrieve)
-    graph.add_node("build_prompt", node_build_prompt)
-    graph.add_node("generate", node_generate)
-    graph.add_node("bypass", node_bypass_rag)
+    graph.add_node("route", timed_node("route", node_route))
+    graph.add_node("retrieve", timed_node("retrieve", node_retrieve))
+    graph.add_node("build_prompt", timed_node("build_prompt", node_build_prompt))
+    graph.add_node("generate", timed_node("generate", node_generate))
+    graph.add_node("direct_answer", timed_node("direct_answer", node_direct_answer))
 
-    graph.set_entry_point("gatekeeper")
+    graph.set_entry_point("route")
 
     graph.add_conditional_edges(
-        "gatekeeper",
+        "route",
         lambda state: "rag" if state.use_rag else "no_rag",
         {
-            "rag": "optimize_query",
-            "no_rag": "bypass",
+            "rag": "retrieve",
+            "no_rag": "direct_answer",
         },
     )
 
-    graph.add_edge("optimize_query", "retrieve")
     graph.add_edge("retrieve", "build_prompt")
     graph.add_edge("build_prompt", "generate")
     graph.add_edge("generate", END)
-    graph.add_edge("bypass", END)
+    graph.add_edge("direct_answer", END)
 
     return graph.compile()
-
-
-rag_graph = build_rag_graph()
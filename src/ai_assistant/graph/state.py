@@ -2,11 +2,34 @@ from pydantic import BaseModel, Field
 from langchain_core.documents import Document
 
 
+class RouteDecision(BaseModel):
+    """Structured output of the routing call (gatekeeper and query rewrite in one)."""
+
+    use_rag: bool = Field(
+        description="True if answering needs information from the user's documents"
+    )
+    search_query: str = Field(
+        description="Keyword-rich search string for the vector database, in the user's language"
+    )
+    sub_queries: list[str] = Field(
+        default_factory=list,
+        description="One search string per distinct part of a multi-part question (max 3), else empty",
+    )
+    standalone: bool = Field(
+        default=False,
+        description="True if the input can be understood without the earlier conversation",
+    )
+
+
 class RAGState(BaseModel):
     query: str | None = None
     thread_id: str | None = None
+    cache_scope: str | None = None
     query_optimized: str | None = None
+    sub_queries: list[str] = Field(default_factory=list)
     use_rag: bool = True
     docs: list[Document] = Field(default_factory=list)
     prompt: str | None = None
+    context: str | None = None
+    context_tokens: int = 0
     answer: str = None
@@ -0,0 +1,131 @@
+import asyncio
+import uuid
+from collections import Counter
+
+from src.ai_assistant.core.cache import (
+    conversation_cache_key,
+    count_popular_queries,
+    get_popular_queries,
+    set_json,
+)
+from src.ai_assistant.core.config import config
+from src.ai_assistant.core.logger import logger
+from src.ai_assistant.core.metrics import CACHE_WARMED
+from src.ai_assistant.core.resources import aget_agent, aget_rag_graph
+from src.ai_assistant.graph.graph import node_retrieve, node_route, run_conversation
+from src.ai_assistant.graph.state import RAGState
+
+
+class CacheWarmer:
+    """Keeps the most asked questions warm across document changes.
+
+    ``record`` counts normalized first-turn prompts in process and adds them
+    to a Redis sorted set every ``flush_every`` prompts, so all workers feed
+    one ranking without a write per request. ``schedule``, called after an
+    upload or delete, re-runs the top ``top_n`` in the background, one at a
+    time and at most ``rate_per_second``. Routing and retrieval are always
+    re-run; with ``generate``, the answer is regenerated as well and replaces
+    the shared conversation entry. A run requested while one is in progress
+    is coalesced into a single extra run.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        top_n: int,
+        rate_per_second: float,
+        generate: bool,
+        flush_every: int,
+        max_tracked: int,
+    ):
+        self.enabled = enabled
+        self.top_n = top_n
+        self.rate_per_second = rate_per_second
+        self.generate = generate
+        self.flush_every = flush_every
+        self.max_tracked = max_tracked
+        self._counts: Counter[str] = Counter()
+        self._pending = 0
+        self._task: asyncio.Task | None = None
+        self._rerun = False
+        self._flushes: set[asyncio.Task] = set()
+
+    def record(self, prompt: str) -> None:
+        if not self.enabled:
+            return
+        self._counts[prompt.strip().lower()] += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            task = asyncio.ensure_future(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def flush(self) -> None:
+        counts, self._counts, self._pending = self._counts, Counter(), 0
+        await count_popular_queries(counts, self.max_tracked)
+
+    def schedule(self) -> None:
+        if not self.enabled:
+            return
+        if self._task is not None and not self._task.done():
+            self._rerun = True
+            return
+        self._rerun = False
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await self.flush()
+            queries = await get_popular_queries(self.top_n)
+            logger.info("[Warmer] Re-running {} popular queries", len(queries))
+            for query in queries:
+                await self.warm(query)
+                await asyncio.sleep(1 / self.rate_per_second)
+            if not self._rerun:
+                return
+            self._rerun = False
+
+    async def warm(self, query: str) -> None:
+        try:
+            state = await node_route(RAGState(query=query))
+            if not state.use_rag:
+                # Answered without documents: a document change can't affect it.
+                CACHE_WARMED.labels(result="skipped").inc()
+                return
+            if self.generate:
+                await self._regenerate(query)
+            else:
+                await node_retrieve(state)
+            CACHE_WARMED.labels(result="ok").inc()
+        except Exception as e:
+            CACHE_WARMED.labels(result="error").inc()
+            logger.warning("[Warmer] Failed for {!r}: {}", query, e)
+
+    async def _regenerate(self, query: str) -> None:
+        # A throwaway thread: the answer must not depend on earlier turns.
+        thread_id = f"cache-warmer:{uuid.uuid4().hex}"
+        try:
+            value = await run_conversation(
+                await aget_rag_graph(), query, thread_id, None
+            )
+        finally:
+            agent = await aget_agent()
+            await agent.checkpointer.adelete_thread(thread_id)
+        await set_json(
+            conversation_cache_key(query), value, config.cache.conversation_ttl_seconds
+        )
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        await self.flush()
+
+
+cache_warmer = CacheWarmer(
+    config.warmer.enabled and config.cache.enabled,
+    config.warmer.top_n,
+    config.warmer.rate_per_second,
+    config.warmer.generate,
+    config.warmer.flush_every,
+    config.warmer.max_tracked,
+)
@@ -0,0 +1,32 @@
+"""Run the inference sidecar: ``python -m src.ai_assistant.inference``.
+
+Listens on ``INFERENCE__URL`` (``unix:///path/to.sock`` or ``http://host:port``),
+the same setting the API workers use to reach it.
+"""
+
+from urllib.parse import urlparse
+
+import uvicorn
+
+from src.ai_assistant.core.config import config
+from src.ai_assistant.core.logger import logger
+
+
+def main() -> None:
+    url = config.inference.url or "http://127.0.0.1:8001"
+    if config.inference.threads > 0:
+        import torch
+
+        torch.set_num_threads(config.inference.threads)
+
+    if url.startswith("unix://"):
+        listen = {"uds": url.removeprefix("unix://")}
+    else:
+        parsed = urlparse(url)
+        listen = {"host": parsed.hostname or "127.0.0.1", "port": parsed.port or 8001}
+    logger.info("[Inference] Listening on {}", url)
+    uvicorn.run("src.ai_assistant.inference.server:app", **listen)
+
+
+if __name__ == "__main__":
+    main()
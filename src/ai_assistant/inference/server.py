@@ -0,0 +1,83 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import ormsgpack
+from fastapi import FastAPI, HTTPException, Request, Response
+
+from src.ai_assistant.api.metrics import router as metrics_router
+from src.ai_assistant.core.logger import logger
+from src.ai_assistant.rag.embeddings import BatchedEmbeddings, get_local_embeddings
+from src.ai_assistant.rag.reranker import BatchedReranker
+
+MSGPACK = "application/msgpack"
+
+
+def _packed(payload: dict) -> Response:
+    return Response(ormsgpack.packb(payload), media_type=MSGPACK)
+
+
+async def _unpacked(request: Request) -> dict:
+    try:
+        return ormsgpack.unpackb(await request.body())
+    except ormsgpack.MsgpackDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"invalid msgpack body: {e}")
+
+
+def create_app(
+    embeddings: BatchedEmbeddings | None = None,
+    reranker: BatchedReranker | None = None,
+) -> FastAPI:
+    """Embedding and rerank server shared by the API workers of one host.
+
+    Requests from all workers meet in the same micro-batchers, so batches are
+    fuller than any single worker could make them, and the models exist once.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if app.state.embeddings is None:
+            app.state.embeddings = get_local_embeddings()
+            app.state.reranker = BatchedReranker()
+            app.state.embeddings.embed_query("warmup")
+            app.state.reranker.warmup()
+        logger.info("[Inference] Ready")
+        yield
+        app.state.embeddings.close()
+        app.state.reranker.close()
+
+    app = FastAPI(title="Inference", lifespan=lifespan)
+    app.state.embeddings = embeddings
+    app.state.reranker = reranker
+    app.include_router(metrics_router)
+
+    @app.get("/healthz")
+    async def healthz() -> dict:
+        return {"ok": True}
+
+    @app.post("/embed")
+    async def embed(request: Request) -> Response:
+        body = await _unpacked(request)
+        texts: list[str] = body["texts"]
+        if body.get("kind") == "passage":
+            # Indexing batches are already large; run them beside the query batcher.
+            vectors = await asyncio.to_thread(
+                app.state.embeddings.embed_documents, texts
+            )
+        else:
+            vectors = await asyncio.gather(
+                *(app.state.embeddings.aembed_query(text) for text in texts)
+            )
+        return _packed({"vectors": [list(map(float, v)) for v in vectors]})
+
+    @app.post("/rerank")
+    async def rerank(request: Request) -> Response:
+        body = await _unpacked(request)
+        scores = await app.state.reranker.batcher.submit(
+            (body["query"], body["passages"])
+        )
+        return _packed({"scores": [float(s) for s in scores]})
+
+    return app
+
+
+app = create_app()
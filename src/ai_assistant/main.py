@@ -1,13 +1,22 @@
+import asyncio
+import math
 import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from src.ai_assistant.api.v1 import router as api_v1_router
 from src.ai_assistant.api.health import router as health_router
+from src.ai_assistant.api.metrics import router as metrics_router
 from src.ai_assistant.core.config import config
 from src.ai_assistant.core.logger import logger
 from src.ai_assistant.core.cache import close_redis
+from src.ai_assistant.core.middleware import MetricsMiddleware
+from src.ai_assistant.core.resilience import LLMUnavailable
+from src.ai_assistant.core.resources import resources
+from src.ai_assistant.core.scheduler import Overloaded
+from src.ai_assistant.graph.warmer import cache_warmer
 
 
 def _setup_langsmith() -> None:
@@ -19,12 +28,37 @@ def _setup_langsmith() -> None:
         logger.info(f"LangSmith tracing enabled (project: {config.langchain.project})")
 
 
+async def llm_unavailable_handler(
+    request: Request, exc: LLMUnavailable
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
+async def overloaded_handler(request: Request, exc: Overloaded) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     config.rag.create_docs_folder()
     _setup_langsmith()
+    app.state.resources = resources
+    if config.app.warmup:
+        # Serve /healthz right away; /healthz/ready flips once models are loaded.
+        app.state.warmup = asyncio.create_task(asyncio.to_thread(resources.warmup))
+    else:
+        resources.warmup_status = "disabled"
     logger.info("[LLM Service] Started")
     yield
+    await cache_warmer.close()
     await close_redis()
 
 
@@ -37,6 +71,11 @@ def get_app():
         allow_headers=config.app.cors_headers,
         allow_methods=config.app.cors_methods,
     )
+    app.add_exception_handler(LLMUnavailable, llm_unavailable_handler)
+    app.add_exception_handler(Overloaded, overloaded_handler)
+    if config.app.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics_router)
 
     app.include_router(api_v1_router)
     app.include_router(health_router)
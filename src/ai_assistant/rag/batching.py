@@ -0,0 +1,107 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from src.ai_assistant.core.logger import logger
+from src.ai_assistant.core.metrics import BATCH_DURATION, BATCH_SIZE
+
+
+class MicroBatcher:
+    """Coalesce concurrent async submissions into batches run on one worker thread.
+
+    Items submitted within ``max_wait_ms`` of the first queued item (up to
+    ``max_batch_size``) are handed to ``process_batch`` together; the results
+    are fanned back out to the awaiting callers in submission order.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list[Any]], list[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        name: str = "batcher",
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._duration = BATCH_DURATION.labels(batcher=name)
+        self._size = BATCH_SIZE.labels(batcher=name)
+
+    async def submit(self, item: Any) -> Any:
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((item, future))
+        return await future
+
+    @property
+    def depth(self) -> int:
+        """Items waiting for a batch slot."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def _collect(self, queue: asyncio.Queue) -> list[tuple[Any, asyncio.Future]]:
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect(queue)
+            items = [item for item, _ in batch]
+            self._size.observe(len(items))
+
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self._process, items
+                )
+            except Exception as e:
+                logger.error("[{}] batch of {} failed: {}", self.name, len(items), e)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _process(self, items: list[Any]) -> list[Any]:
+        start = time.perf_counter()
+        try:
+            return self.process_batch(items)
+        finally:
+            self._duration.observe(time.perf_counter() - start)
+
+    def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,135 @@
+import math
+from dataclasses import dataclass, field
+
+from langchain_core.documents import Document
+
+from src.ai_assistant.core.config import config
+
+
+MIN_TEXT_OVERLAP = 20  # shorter suffix/prefix matches are treated as coincidence
+MIN_TRUNCATED_TOKENS = 64  # don't bother sending a tail smaller than this
+
+
+@dataclass
+class PackedContext:
+    text: str = ""
+    tokens: int = 0
+    documents: list[Document] = field(default_factory=list)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / config.rag.chars_per_token)
+
+
+def _score(doc: Document) -> float:
+    return float(doc.metadata.get("relevance_score", 0.0))
+
+
+def _text_overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``."""
+    for size in range(min(len(left), len(right)), MIN_TEXT_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _join(first: Document, second: Document) -> str | None:
+    """Merged text if ``second`` continues ``first``, otherwise None."""
+    a, b = first.page_content, second.page_content
+    a_start, b_start = (
+        first.metadata.get("start_index"),
+        second.metadata.get("start_index"),
+    )
+
+    if a_start is not None and b_start is not None:
+        a_end = a_start + len(a)
+        if a_start <= b_start <= a_end:
+            return a + b[a_end - b_start :]
+        return None
+
+    overlap = _text_overlap(a, b)
+    return a + b[overlap:] if overlap else None
+
+
+def _merge(first: Document, second: Document) -> Document | None:
+    if second.page_content in first.page_content:
+        text = first.page_content
+    elif first.page_content in second.page_content:
+        text = second.page_content
+    else:
+        text = _join(first, second)
+        if text is None:
+            return None
+
+    metadata = {**first.metadata}
+    metadata["relevance_score"] = max(_score(first), _score(second))
+    if "start_index" in first.metadata and "start_index" in second.metadata:
+        metadata["start_index"] = min(
+            first.metadata["start_index"], second.metadata["start_index"]
+        )
+    return Document(page_content=text, metadata=metadata)
+
+
+def merge_chunks(docs: list[Document]) -> list[Document]:
+    """Drop duplicates and stitch overlapping/adjacent chunks of the same source page."""
+    spans: list[Document] = []
+
+    for doc in docs:
+        key = (doc.metadata.get("source"), doc.metadata.get("page"))
+        current = doc
+        merged = True
+        while merged:
+            merged = False
+            for i, span in enumerate(spans):
+                if (span.metadata.get("source"), span.metadata.get("page")) != key:
+                    continue
+                combined = _merge(span, current) or _merge(current, span)
+                if combined is not None:
+                    spans.pop(i)
+                    current = combined
+                    merged = True
+                    break
+        spans.append(current)
+
+    return spans
+
+
+def _format(doc: Document, content: str) -> str:
+    source = doc.metadata.get("source", "unknown").split("/")[-1]
+    return f"Document: {source}\n\n\n{content}\n\n"
+
+
+def pack_context(
+    docs: list[Document], token_budget: int | None = None
+) -> PackedContext:
+    """Fill ``token_budget`` with merged chunks, highest reranker score first."""
+    budget = (
+        token_budget if token_budget is not None else config.rag.context_token_budget
+    )
+    packed = PackedContext()
+    parts = []
+
+    for doc in sorted(merge_chunks(docs), key=_score, reverse=True):
+        block = _format(doc, doc.page_content)
+        tokens = estimate_tokens(block)
+        remaining = budget - packed.tokens
+
+        if tokens > remaining:
+            if remaining < MIN_TRUNCATED_TOKENS:
+                continue
+            overhead = len(_format(doc, ""))
+            max_chars = int(remaining * config.rag.chars_per_token) - overhead
+            content = doc.page_content[:max_chars].rsplit(" ", 1)[0]
+            block = _format(doc, content)
+            doc = Document(page_content=content, metadata=doc.metadata)
+            tokens = estimate_tokens(block)
+
+        parts.append(block)
+        packed.documents.append(doc)
+        packed.tokens += tokens
+
+        if packed.tokens >= budget:
+            break
+
+    packed.text = "".join(parts)
+    return packed
@@ -1,8 +1,132 @@
-from langchain_huggingface import HuggingFaceEmbeddings
-from src.ai_assistant.core.config import config
+from typing import Any
 
+from langchain_core.embeddings import Embeddings
 
-def get_embeddings():
-    return HuggingFaceEmbeddings(
-        model_name=config.rag.embedding_model,
+from src.ai_assistant.rag.batching import MicroBatcher
+from src.ai_assistant.core.config import config, EmbeddingProfile
+
+
+class BatchedEmbeddings(Embeddings):
+    """Embeddings wrapper that applies the embedding profile and batches queries.
+
+    Query and passage prefixes are added here so indexing and retrieval always
+    agree. Sync calls (used by the vector store when indexing) go straight to
+    the wrapped model; ``aembed_query`` calls queued within the batching window
+    run as one forward pass on a dedicated inference thread.
+    """
+
+    def __init__(self, embeddings: Embeddings, profile: EmbeddingProfile | None = None):
+        self.embeddings = embeddings
+        self.profile = profile or EmbeddingProfile(query_prefix="", passage_prefix="")
+        # The wrapped model encodes queries and documents with the same
+        # kwargs, so a batch of prefixed queries is just a document batch.
+        self.batcher = MicroBatcher(
+            self.embeddings.embed_documents,
+            max_batch_size=config.rag.embed_batch_size,
+            max_wait_ms=config.rag.embed_batch_wait_ms,
+            name="embed",
+        )
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        prefix = self.profile.passage_prefix
+        return self.embeddings.embed_documents([f"{prefix}{t}" for t in texts])
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_documents([f"{self.profile.query_prefix}{text}"])[
+            0
+        ]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.batcher.submit(f"{self.profile.query_prefix}{text}")
+
+    @property
+    def depth(self) -> int:
+        return self.batcher.depth
+
+    def close(self) -> None:
+        self.batcher.close()
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """A loaded ``SentenceTransformer`` encoding with the profile's settings.
+
+    The model is held as ``model``, so its sequence length and tokenizer are
+    set and read through the public ``SentenceTransformer`` API.
+    """
+
+    def __init__(self, model: Any, profile: EmbeddingProfile):
+        self.model = model
+        self.profile = profile
+        # Longer inputs are truncated by the tokenizer instead of costing more
+        # attention compute; e5 is trained on at most 512 tokens.
+        self.model.max_seq_length = profile.max_seq_length
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.model.encode(
+            # As HuggingFaceEmbeddings did, so existing vectors stay comparable.
+            [t.replace("\n", " ") for t in texts],
+            batch_size=self.profile.batch_size,
+            normalize_embeddings=self.profile.normalize,
+            show_progress_bar=False,
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+def get_model_kwargs() -> dict:
+    model_kwargs: dict = {"backend": config.rag.embedding_backend}
+    if config.rag.embedding_model_file:
+        model_kwargs["model_kwargs"] = {"file_name": config.rag.embedding_model_file}
+    return model_kwargs
+
+
+_model: Any = None
+
+
+def get_embedding_model() -> Embeddings:
+    """Process-wide embedding model, loaded on first use.
+
+    Only weights are held here (no batcher thread, no sockets), so it can be
+    loaded in the gunicorn master and shared copy-on-write by forked workers.
+    """
+    global _model
+    if _model is None:
+        _model = load_embedding_model()
+    return _model
+
+
+def get_tokenizer() -> Any:
+    """Tokenizer of the embedding model if it is loaded in this process, else None."""
+    model = getattr(_model, "model", None)
+    return getattr(model, "tokenizer", None)
+
+
+def load_embedding_model() -> Embeddings:
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(config.rag.embedding_model, **get_model_kwargs())
+    return SentenceTransformerEmbeddings(model, config.rag.embedding_profile)
+
+
+def get_embeddings(profile: EmbeddingProfile | None = None) -> Embeddings:
+    """Query/passage embeddings; ``profile`` overrides the configured prefixes.
+
+    The sidecar applies its own configured profile, so ``profile`` only
+    affects in-process embeddings.
+    """
+    if config.inference.url:
+        from src.ai_assistant.inference.client import (
+            RemoteEmbeddings,
+            get_inference_client,
+        )
+
+        return RemoteEmbeddings(get_inference_client())
+    return get_local_embeddings(profile)
+
+
+def get_local_embeddings(profile: EmbeddingProfile | None = None) -> BatchedEmbeddings:
+    return BatchedEmbeddings(
+        get_embedding_model(), profile or config.rag.embedding_profile
     )
@@ -0,0 +1,107 @@
+import re
+import zipfile
+from typing import Iterator
+from xml.etree import ElementTree
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+BODY_TEXT_OUTLINE_LEVEL = 9  # w:outlineLvl 9 means "not a heading"
+
+
+def _text(element: ElementTree.Element) -> str:
+    parts = []
+    for node in element.iter():
+        if node.tag == f"{W}t":
+            parts.append(node.text or "")
+        elif node.tag == f"{W}tab":
+            parts.append("\t")
+        elif node.tag in (f"{W}br", f"{W}cr"):
+            parts.append("\n")
+    return "".join(parts)
+
+
+def _outline_level(properties: ElementTree.Element | None) -> int | None:
+    if properties is None:
+        return None
+    outline = properties.find(f"{W}outlineLvl")
+    if outline is None:
+        return None
+    level = int(outline.get(f"{W}val", BODY_TEXT_OUTLINE_LEVEL))
+    return level + 1 if level < BODY_TEXT_OUTLINE_LEVEL else None
+
+
+def _heading_styles(archive: zipfile.ZipFile) -> dict[str, int]:
+    """Heading level per paragraph style ID.
+
+    Style IDs are localized ("Heading1", "berschrift1", ...), so levels come
+    from the built-in style name or the style's outline level.
+    """
+    if "word/styles.xml" not in archive.namelist():
+        return {}
+    levels = {}
+    for style in ElementTree.fromstring(archive.read("word/styles.xml")).iter(
+        f"{W}style"
+    ):
+        name = style.find(f"{W}name")
+        name = (name.get(f"{W}val", "") if name is not None else "").lower()
+        heading = re.fullmatch(r"heading (\d)", name)
+        if name == "title":
+            level = 1
+        elif heading:
+            level = int(heading.group(1))
+        else:
+            level = _outline_level(style.find(f"{W}pPr"))
+        if level:
+            levels[style.get(f"{W}styleId")] = level
+    return levels
+
+
+def _paragraph_level(
+    paragraph: ElementTree.Element, styles: dict[str, int]
+) -> int | None:
+    properties = paragraph.find(f"{W}pPr")
+    level = _outline_level(properties)
+    if level is None and properties is not None:
+        style = properties.find(f"{W}pStyle")
+        if style is not None:
+            level = styles.get(style.get(f"{W}val"))
+    return min(level, 6) if level else None
+
+
+class DocxLoader(BaseLoader):
+    """Text of a .docx with its structure kept for the splitter.
+
+    Reads the OOXML directly (no extra dependency). Heading paragraphs become
+    Markdown ``#`` lines at their outline level, table rows become
+    ``cell | cell`` lines, and other paragraphs are separated by blank lines.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def lazy_load(self) -> Iterator[Document]:
+        with zipfile.ZipFile(self.file_path) as archive:
+            styles = _heading_styles(archive)
+            root = ElementTree.fromstring(archive.read("word/document.xml"))
+
+        blocks = []
+        for element in root.find(f"{W}body"):
+            if element.tag == f"{W}p":
+                text = _text(element).strip()
+                if text:
+                    level = _paragraph_level(element, styles)
+                    blocks.append(f"{'#' * level} {text}" if level else text)
+            elif element.tag == f"{W}tbl":
+                rows = [
+                    " | ".join(
+                        " ".join(_text(cell).split()) for cell in row.findall(f"{W}tc")
+                    )
+                    for row in element.iter(f"{W}tr")
+                ]
+                blocks.append("\n".join(rows))
+
+        yield Document(
+            page_content="\n\n".join(blocks), metadata={"source": self.file_path}
+        )
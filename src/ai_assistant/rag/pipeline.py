@@ -1,113 +1,170 @@
+import asyncio
 import os
 import hashlib
 import uuid
 from datetime import datetime, timezone
 from typing import Any
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader
 from langchain_core.documents import Document
-from langchain_classic.retrievers.contextual_compression import (
-    ContextualCompressionRetriever,
-)
-from langchain_community.document_compressors import FlashrankRerank
-from qdrant_client.http import models
 
-from src.ai_assistant.rag.splitter import get_splitter
-from src.ai_assistant.rag.vector_store import get_vector_store
+from src.ai_assistant.rag.loaders import DocxLoader
+from src.ai_assistant.rag.reranker import BatchedReranker
+from src.ai_assistant.rag.splitter import get_child_splitter, get_splitter
+from src.ai_assistant.rag.vector_store import (
+    ParentStore,
+    existing_ids,
+    get_vector_store,
+)
 from src.ai_assistant.core.logger import logger
 from src.ai_assistant.core.config import config
+from src.ai_assistant.core.metrics import VECTOR_STORE_DURATION
+from src.ai_assistant.core.scheduler import Overloaded, scheduler
+
+
+def point_id(chunk_id: str) -> str:
+    """Qdrant point ID of a chunk: stable across re-indexing of the same text."""
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, chunk_id))
 
 
 class RAGPipeline:
     def __init__(self, store=None):
         self.splitter = get_splitter()
         self.vector_store = store or get_vector_store()
-        self.re_ranker = FlashrankRerank()
+        self.child_splitter = get_child_splitter()
+        self.parent_store = ParentStore(self.vector_store.client)
+        if config.inference.url:
+            from src.ai_assistant.inference.client import (
+                RemoteReranker,
+                get_inference_client,
+            )
+
+            self.re_ranker = RemoteReranker(get_inference_client())
+        else:
+            self.re_ranker = BatchedReranker()
 
     async def extract_document(
         self, filename: str, file_path: str
     ) -> list[Document] | None:
+        # The PDF loader pulls in image parsers; only pay for it on upload.
+        from langchain_community.document_loaders import PyPDFLoader, TextLoader
+
         try:
             if filename.endswith(".pdf"):
                 loader = PyPDFLoader(file_path)
             elif filename.endswith(".docx"):
-                loader = Docx2txtLoader(file_path)
+                loader = DocxLoader(file_path)
             elif filename.endswith(".txt"):
                 loader = TextLoader(file_path)
             else:
                 loader = None
             return await loader.aload()
         except Exception as e:
-            logger.error(f"Error extracting document {filename}: {str(e)}")
+            logger.error("Error extracting document {}: {}", filename, e)
             return None
 
     async def get_documents(self, limit: int = 10) -> list[dict[str, Any]]:
-        try:
-            records, _ = self.vector_store.client.scroll(
-                collection_name=self.vector_store.collection_name,
-                limit=limit * 5,
-                with_payload=True,
-                with_vectors=False,
-            )
+        from qdrant_client.http import models
 
+        try:
             seen_sources = set()
             unique_documents = []
 
-            for record in records:
-                payload = record.payload or {}
-                metadata = payload.get("metadata", {})
+            # Each page skips sources already listed, so documents with many
+            # chunks (children in parent mode) can't crowd out the others.
+            # Points without a source are skipped too: every page then adds
+            # at least one document, until the collection is exhausted.
+            while len(unique_documents) < limit:
+                exclude = [
+                    models.IsEmptyCondition(
+                        is_empty=models.PayloadField(key="metadata.source")
+                    ),
+                    models.FieldCondition(
+                        key="metadata.source",
+                        match=models.MatchAny(any=["", *seen_sources]),
+                    ),
+                ]
+                with VECTOR_STORE_DURATION.labels(operation="scroll").time():
+                    records, _ = self.vector_store.client.scroll(
+                        collection_name=self.vector_store.collection_name,
+                        scroll_filter=models.Filter(must_not=exclude),
+                        limit=limit * 5,
+                        with_payload=True,
+                        with_vectors=False,
+                    )
+                if not records:
+                    break
+
+                for record in records:
+                    payload = record.payload or {}
+                    metadata = payload.get("metadata", {})
 
-                source = metadata.get("source")
+                    source = metadata.get("source")
 
-                if source and source not in seen_sources:
-                    seen_sources.add(source)
-                    unique_documents.append(
-                        {
-                            "id": record.id,
-                            "metadata": metadata,
-                        }
-                    )
+                    if source and source not in seen_sources:
+                        seen_sources.add(source)
+                        unique_documents.append(
+                            {
+                                "id": record.id,
+                                "metadata": metadata,
+                            }
+                        )
 
-                if len(unique_documents) >= limit:
-                    break
+                    if len(unique_documents) >= limit:
+                        break
 
             return unique_documents
 
         except Exception as e:
-            logger.error(f"Error getting documents: {str(e)}")
+            logger.error("Error getting documents: {}", e)
             return []
 
     async def delete_documents_by_name(self, name: str) -> bool:
+        from qdrant_client.http import models
+
         file_path = f"{config.rag.docs_folder}/{name}"
+        source_filter = models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="metadata.source",
+                    match=models.MatchValue(value=file_path),
+                )
+            ]
+        )
         try:
-            delete_result = self.vector_store.client.delete(
-                collection_name=self.vector_store.collection_name,
-                points_selector=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="metadata.source",
-                            match=models.MatchValue(value=file_path),
-                        )
-                    ]
-                ),
-            )
+            with VECTOR_STORE_DURATION.labels(operation="delete").time():
+                self.vector_store.client.delete(
+                    collection_name=self.vector_store.collection_name,
+                    points_selector=source_filter,
+                )
+                # Parents too, whatever the current mode: they may predate it.
+                self.parent_store.delete(source_filter)
 
             if os.path.exists(file_path):
                 os.remove(file_path)
-                logger.info(f"File {file_path} deleted from file system.")
+                logger.info("File {} deleted from file system.", file_path)
             else:
                 logger.warning(
-                    f"File {file_path} not found on disk, but cleanup continued."
+                    "File {} not found on disk, but cleanup continued.", file_path
                 )
 
             return True
 
         except Exception as e:
-            logger.error(f"Error during deletion process for {name}: {str(e)}")
+            logger.error("Error during deletion process for {}: {}", name, e)
             return False
 
     async def index_documents(self, docs: list[Document], batch_size: int = 30) -> bool:
+        """Split, embed and store ``docs``; all or nothing.
+
+        On failure the points this call added are deleted again. Points that
+        were there before (same source and text) are left alone, so a failed
+        re-upload keeps the previously indexed version.
+        """
+        added: list[str] = []
+        added_parents: list[str] = []
         try:
-            texts = self.splitter.split_documents(docs)
+            # Splitting is CPU work too: off the event loop, behind chat.
+            async with scheduler.slot("ingest"):
+                texts = await asyncio.to_thread(self.splitter.split_documents, docs)
             current_time = datetime.now(timezone.utc).isoformat()
 
             final_docs = []
@@ -117,7 +174,6 @@ class RAGPipeline:
                 content_hash = hashlib.md5(chunk.page_content.encode()).hexdigest()
                 source_path = chunk.metadata.get("source", "unknown")
                 chunk_id = f"{source_path}_{content_hash}"
-                deterministic_uuid = str(uuid.uuid5(uuid.NAMESPACE_DNS, chunk_id))
 
                 if source_path and os.path.exists(source_path):
                     file_size_bytes = os.path.getsize(source_path)
@@ -130,35 +186,285 @@ class RAGPipeline:
                 chunk.metadata["created_at"] = current_time
 
                 final_docs.append(chunk)
-                ids.append(deterministic_uuid)
+                ids.append(point_id(chunk_id))
+
+            # Neighbor pointers: retrieval can widen a hit by ID (expand_neighbors).
+            for previous, chunk in zip(final_docs, final_docs[1:]):
+                if previous.metadata.get("source") == chunk.metadata.get("source"):
+                    previous.metadata["next_chunk_id"] = chunk.metadata["chunk_id"]
+                    chunk.metadata["prev_chunk_id"] = previous.metadata["chunk_id"]
 
+            if config.rag.parent_documents:
+                # The chunks become parents; their small children are embedded.
+                async with scheduler.slot("ingest"):
+                    children = await asyncio.to_thread(self._split_children, final_docs)
+                    existing = await asyncio.to_thread(self.parent_store.existing, ids)
+                    added_parents = [id_ for id_ in ids if id_ not in existing]
+                    with VECTOR_STORE_DURATION.labels(operation="parent_upsert").time():
+                        await asyncio.to_thread(self.parent_store.add, final_docs, ids)
+                logger.debug("Stored {} parent spans", len(final_docs))
+                final_docs = children
+                ids = [point_id(child.metadata["chunk_id"]) for child in children]
+
+            existing = await asyncio.to_thread(
+                existing_ids,
+                self.vector_store.client,
+                self.vector_store.collection_name,
+                ids,
+            )
             for i in range(0, len(final_docs), batch_size):
                 batch_docs = final_docs[i : i + batch_size]
                 batch_ids = ids[i : i + batch_size]
 
-                await self.vector_store.aadd_documents(
-                    documents=batch_docs, ids=batch_ids
-                )
-                logger.info(f"Indexed batch {i // batch_size + 1}")
+                # One slot per batch: chat retrievals get in between batches.
+                async with scheduler.slot("ingest"):
+                    added.extend(id_ for id_ in batch_ids if id_ not in existing)
+                    await self.vector_store.aadd_documents(
+                        documents=batch_docs, ids=batch_ids
+                    )
+                logger.debug("Indexed batch {}", i // batch_size + 1)
 
+            logger.info(
+                "Indexed {} chunks from {} document(s)", len(final_docs), len(docs)
+            )
             return True
 
+        except Overloaded:
+            # Each batch takes its own ingest slot, so a busy server can
+            # reject the upload halfway; a retry must not find partial chunks.
+            self._discard_points(added, added_parents)
+            raise
         except Exception as e:
-            logger.error(f"Error indexing documents: {str(e)}")
+            logger.error("Error indexing documents: {}", e)
+            self._discard_points(added, added_parents)
             return False
 
+    def _discard_points(self, ids: list[str], parent_ids: list[str]) -> None:
+        from qdrant_client.http import models
+
+        try:
+            with VECTOR_STORE_DURATION.labels(operation="delete").time():
+                if ids:
+                    self.vector_store.client.delete(
+                        collection_name=self.vector_store.collection_name,
+                        points_selector=models.PointIdsList(points=ids),
+                    )
+                if parent_ids:
+                    self.parent_store.delete(models.PointIdsList(points=parent_ids))
+            if ids or parent_ids:
+                logger.info("Discarded {} chunks of a failed indexing run", len(ids))
+        except Exception as e:
+            logger.error("Error discarding partially indexed chunks: {}", e)
+
+    def _split_children(self, parents: list[Document]) -> list[Document]:
+        children = []
+        for parent in parents:
+            parent_id = parent.metadata["chunk_id"]
+            metadata = {
+                key: value
+                for key, value in parent.metadata.items()
+                if key not in ("chunk_id", "prev_chunk_id", "next_chunk_id")
+            }
+            pieces = self.child_splitter.split_text(parent.page_content)
+            offset = 0
+            for i, piece in enumerate(pieces):
+                offset = parent.page_content.find(piece, offset)
+                child = Document(page_content=piece, metadata={**metadata})
+                child.metadata["chunk_id"] = f"{parent_id}_{i}"
+                child.metadata["parent_id"] = parent_id
+                child.metadata["start_index"] = (
+                    parent.metadata.get("start_index", 0) + offset
+                )
+                children.append(child)
+        return children
+
+    def warmup(self) -> None:
+        """Run one embedding and one rerank so first requests don't pay for it."""
+        self.vector_store.embeddings.embed_query("warmup")
+        self.re_ranker.warmup()
+
+    def queue_depths(self) -> dict[str, int]:
+        return {
+            "embed": self.vector_store.embeddings.depth,
+            "rerank": self.re_ranker.depth,
+        }
+
     async def retrieve(self, query: str, k: int = 3) -> list[Document]:
-        base_retriever = self.vector_store.as_retriever(
-            search_type="mmr", search_kwargs={"k": 20, "fetch_k": 50}
+        embedding = await self.vector_store.embeddings.aembed_query(query)
+        with VECTOR_STORE_DURATION.labels(operation="mmr_search").time():
+            candidates = (
+                await self.vector_store.amax_marginal_relevance_search_by_vector(
+                    embedding,
+                    k=config.rag.retrieve_mmr_k,
+                    fetch_k=config.rag.retrieve_fetch_k,
+                )
+            )
+
+        return await self._select(query, candidates, k)
+
+    async def retrieve_multi(
+        self, query: str, sub_queries: list[str], k: int = 3
+    ) -> list[Document]:
+        """Retrieve for a multi-part question at roughly the cost of one query.
+
+        The query embeddings are submitted together, so the micro-batcher runs
+        them as one forward pass. All MMR searches go to Qdrant in a single
+        batch request. Candidates are merged by ``chunk_id``, round-robin
+        across queries, and reranked once against ``query``.
+        """
+        queries = list(dict.fromkeys([query, *sub_queries]))
+        if len(queries) == 1:
+            return await self.retrieve(query, k)
+
+        embeddings = await asyncio.gather(
+            *(self.vector_store.embeddings.aembed_query(q) for q in queries)
         )
+        with VECTOR_STORE_DURATION.labels(operation="mmr_batch_search").time():
+            # The client is sync; keep the round trip off the event loop.
+            results = await asyncio.to_thread(self._mmr_batch_search, embeddings)
+
+        merged: dict[str, Document] = {}
+        for rank in range(max(map(len, results), default=0)):
+            for documents in results:
+                if rank < len(documents):
+                    doc = documents[rank]
+                    merged.setdefault(
+                        doc.metadata.get("chunk_id", doc.page_content), doc
+                    )
+
+        return await self._select(query, list(merged.values()), k)
+
+    async def _select(
+        self, query: str, candidates: list[Document], k: int
+    ) -> list[Document]:
+        """Rerank candidates into the top ``k`` results: parents in parent mode."""
+        if not config.rag.parent_documents:
+            return await self._expand(await self.re_ranker.rerank(query, candidates, k))
+        # Children are short: scoring all of them costs about what k chunks did.
+        children = await self.re_ranker.rerank(query, candidates, len(candidates))
+        return await self._expand(await self.get_parents(children, k))
+
+    async def get_parents(self, children: list[Document], k: int) -> list[Document]:
+        """Parents of the ranked children, deduplicated, best ``k`` in rank order.
 
-        self.re_ranker.top_n = k
-        compression_retriever = ContextualCompressionRetriever(
-            base_compressor=self.re_ranker, base_retriever=base_retriever
+        A parent takes the score of its best child. Chunks indexed before
+        parent mode was enabled have no parent and stand in for one.
+        """
+        ranked: dict[str, Document] = {}
+        for child in children:
+            key = child.metadata.get("parent_id") or child.metadata.get(
+                "chunk_id", child.page_content
+            )
+            ranked.setdefault(key, child)
+            if len(ranked) == k:
+                break
+
+        parents = await self._fetch(
+            [
+                c.metadata["parent_id"]
+                for c in ranked.values()
+                if c.metadata.get("parent_id")
+            ]
         )
+        results = []
+        for child in ranked.values():
+            parent = parents.get(child.metadata.get("parent_id"))
+            if parent is None:
+                results.append(child)
+                continue
+            parent.metadata["relevance_score"] = child.metadata.get(
+                "relevance_score", 0.0
+            )
+            results.append(parent)
+        return results
+
+    async def _fetch(self, chunk_ids: list[str]) -> dict[str, Document]:
+        """Chunks by ``chunk_id``: parent spans in parent mode, else indexed chunks."""
+        if not chunk_ids:
+            return {}
+        ids = [point_id(chunk_id) for chunk_id in chunk_ids]
+        if config.rag.parent_documents:
+            with VECTOR_STORE_DURATION.labels(operation="parent_fetch").time():
+                docs = list(
+                    (await asyncio.to_thread(self.parent_store.get, ids)).values()
+                )
+        else:
+            store = self.vector_store
+            with VECTOR_STORE_DURATION.labels(operation="retrieve").time():
+                records = await asyncio.to_thread(
+                    store.client.retrieve,
+                    store.collection_name,
+                    ids=ids,
+                    with_payload=True,
+                    with_vectors=False,
+                )
+            docs = [
+                store._document_from_point(
+                    record,
+                    store.collection_name,
+                    store.content_payload_key,
+                    store.metadata_payload_key,
+                )
+                for record in records
+            ]
+        return {doc.metadata.get("chunk_id"): doc for doc in docs}
+
+    async def _expand(self, docs: list[Document]) -> list[Document]:
+        if not config.rag.expand_neighbors:
+            return docs
+        return docs + await self.get_neighbors(docs)
 
-        # documents = await self.vector_store.amax_marginal_relevance_search(
-        #     query, k=k, fetch_k=k * 5
-        # )
+    async def get_neighbors(self, docs: list[Document]) -> list[Document]:
+        """The previous and next chunk (or parent) of each hit, fetched by ID.
 
-        return await compression_retriever.ainvoke(query)
+        Neighbors take their hit's relevance score, so context packing keeps
+        them next to it and stitches them into one span (same source page).
+        """
+        retrieved = {doc.metadata.get("chunk_id") for doc in docs}
+        scores: dict[str, float] = {}
+        for doc in docs:
+            for key in ("prev_chunk_id", "next_chunk_id"):
+                chunk_id = doc.metadata.get(key)
+                if chunk_id and chunk_id not in retrieved:
+                    scores.setdefault(
+                        chunk_id, doc.metadata.get("relevance_score", 0.0)
+                    )
+        neighbors = await self._fetch(list(scores))
+        for chunk_id, doc in neighbors.items():
+            doc.metadata["relevance_score"] = scores[chunk_id]
+        return list(neighbors.values())
+
+    def _mmr_batch_search(self, embeddings: list[list[float]]) -> list[list[Document]]:
+        from qdrant_client.http import models
+
+        store = self.vector_store
+        requests = [
+            models.QueryRequest(
+                query=models.NearestQuery(
+                    nearest=embedding,
+                    # Same diversity as the single-query path (lambda_mult=0.5).
+                    mmr=models.Mmr(
+                        diversity=0.5, candidates_limit=config.rag.retrieve_fetch_k
+                    ),
+                ),
+                limit=config.rag.retrieve_multi_k_per_query,
+                with_payload=True,
+                using=store.vector_name,
+            )
+            for embedding in embeddings
+        ]
+        responses = store.client.query_batch_points(
+            store.collection_name, requests=requests
+        )
+        return [
+            [
+                store._document_from_point(
+                    point,
+                    store.collection_name,
+                    store.content_payload_key,
+                    store.metadata_payload_key,
+                )
+                for point in response.points
+            ]
+            for response in responses
+        ]
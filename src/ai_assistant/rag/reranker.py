@@ -0,0 +1,113 @@
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.ai_assistant.rag.batching import MicroBatcher
+from src.ai_assistant.core.config import config
+
+if TYPE_CHECKING:
+    from flashrank import Ranker
+
+
+def ranked_documents(
+    documents: list[Document], scores: list[float], top_n: int
+) -> list[Document]:
+    """Top ``top_n`` documents by score, with ``relevance_score`` in metadata."""
+    ranked = sorted(zip(scores, range(len(documents))), key=lambda x: -x[0])
+    return [
+        Document(
+            page_content=documents[i].page_content,
+            metadata={
+                **documents[i].metadata,
+                "id": i,
+                "relevance_score": float(score),
+            },
+        )
+        for score, i in ranked[:top_n]
+    ]
+
+
+class BatchedReranker:
+    """Flashrank cross-encoder shared by concurrent ``retrieve`` calls.
+
+    Each call contributes one ``(query, documents)`` pair; pairs queued within
+    the batching window are scored in a single ONNX session run.
+    """
+
+    def __init__(self, ranker: "Ranker | None" = None):
+        if ranker is None:
+            from flashrank import Ranker
+
+            ranker = Ranker(model_name=config.rag.rerank_model)
+        self.ranker = ranker
+        self.batcher = MicroBatcher(
+            self._score_batch,
+            max_batch_size=config.rag.rerank_batch_size,
+            max_wait_ms=config.rag.rerank_batch_wait_ms,
+            name="rerank",
+        )
+
+    async def rerank(
+        self, query: str, documents: list[Document], top_n: int
+    ) -> list[Document]:
+        if not documents:
+            return []
+
+        scores = await self.batcher.submit((query, [d.page_content for d in documents]))
+        return ranked_documents(documents, scores, top_n)
+
+    @property
+    def depth(self) -> int:
+        return self.batcher.depth
+
+    def _score_batch(self, items: list[tuple[str, list[str]]]) -> list[list[float]]:
+        if self.ranker.llm_model is not None:
+            return [self._score_single(query, passages) for query, passages in items]
+
+        pairs = [[query, text] for query, passages in items for text in passages]
+        scores = self._score_pairs(pairs)
+
+        results, offset = [], 0
+        for _, passages in items:
+            results.append(scores[offset : offset + len(passages)].tolist())
+            offset += len(passages)
+        return results
+
+    def _score_pairs(self, pairs: list[list[str]]) -> np.ndarray:
+        encoded = self.ranker.tokenizer.encode_batch(pairs)
+        input_ids = np.array([e.ids for e in encoded], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        token_type_ids = np.array([e.type_ids for e in encoded], dtype=np.int64)
+
+        onnx_input = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if not np.all(token_type_ids == 0):
+            onnx_input["token_type_ids"] = token_type_ids
+
+        logits = self.ranker.session.run(None, onnx_input)[0]
+
+        if logits.shape[1] == 1:
+            return 1 / (1 + np.exp(-logits.flatten()))
+        exp_logits = np.exp(logits)
+        return exp_logits[:, 1] / np.sum(exp_logits, axis=1)
+
+    def _score_single(self, query: str, passages: list[str]) -> list[float]:
+        from flashrank import RerankRequest
+
+        request = RerankRequest(
+            query=query,
+            passages=[{"id": i, "text": text} for i, text in enumerate(passages)],
+        )
+        # Listwise LLM rankers only return an ordering, so fall back to rank.
+        scores: dict[Any, float] = {
+            r["id"]: float(r.get("score", 1 / (rank + 1)))
+            for rank, r in enumerate(self.ranker.rerank(request))
+        }
+        return [scores.get(i, 0.0) for i in range(len(passages))]
+
+    def warmup(self) -> None:
+        """Score one pair so the ONNX session is initialised before traffic."""
+        self._score_batch([("warmup", ["warmup"])])
+
+    def close(self) -> None:
+        self.batcher.close()
@@ -1,10 +1,298 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter, TextSplitter
+
 from src.ai_assistant.core.config import config
+from src.ai_assistant.rag.context import estimate_tokens
+from src.ai_assistant.rag.embeddings import get_tokenizer
+
+SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+MAX_HEADING_CHARS = 80
+MAX_HEADING_WORDS = 10
+# A heading only closes the current chunk once it holds this share of
+# chunk_size, so runs of short sections (or list items that look like
+# headings) don't turn into tiny chunks.
+MIN_SECTION_FRACTION = 0.25
+
+_MARKDOWN_HEADING = re.compile(r"(#{1,6})\s+\S")
+_NUMBERED_HEADING = re.compile(r"(\d{1,2}(?:\.\d{1,2}){0,3})\.?\s+[A-ZÀ-ÖØ-ÞА-ЯЁ]")
+_COLUMN_GAP = re.compile(r"\S(?: {2,}|\t)(?=\S)")
+
+
+class TokenCounter:
+    """Token length with the embedding model's tokenizer, once it is loaded.
+
+    The tokenizer is never loaded just for splitting: a worker that talks to
+    the inference sidecar, or one that hasn't loaded the model yet, falls
+    back to the ``chars_per_token`` estimate used for the context budget.
+    """
+
+    def __call__(self, text: str) -> int:
+        tokenizer = get_tokenizer()
+        if tokenizer is None:
+            return estimate_tokens(text)
+        return len(
+            tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"]
+        )
+
+
+def heading_level(line: str) -> int | None:
+    """Level of a heading line (Markdown, numbered or all caps), else None."""
+    line = line.strip()
+    if not line or len(line) > MAX_HEADING_CHARS:
+        return None
+    markdown = _MARKDOWN_HEADING.match(line)
+    if markdown:
+        return len(markdown.group(1))
+    if (
+        line[-1] in ".,;:"
+        or len(line.split()) > MAX_HEADING_WORDS
+        or is_table_row(line)
+    ):
+        return None
+    numbered = _NUMBERED_HEADING.match(line)
+    if numbered:
+        return numbered.group(1).count(".") + 1
+    letters = [c for c in line if c.isalpha()]
+    if len(letters) >= 3 and all(c.isupper() for c in letters):
+        return 1
+    return None
+
+
+def is_table_row(line: str) -> bool:
+    """Pipe-separated cells, 3+ space/tab-aligned columns, or mostly numbers."""
+    line = line.strip()
+    if line.startswith("|") or " | " in line:
+        return True
+    if len(_COLUMN_GAP.findall(line)) >= 2:
+        return True
+    fields = line.split()
+    numeric = sum(any(c.isdigit() for c in f) for f in fields)
+    return len(fields) >= 3 and numeric * 2 > len(fields) and line[-1] != "."
+
+
+@dataclass
+class _Atom:
+    """A span of text that is only split when it can't fit in one chunk."""
+
+    start: int
+    end: int
+    tokens: int
+    heading: tuple[int, str] | None = None  # (level, title) for heading lines
+
+
+class StructureSplitter(TextSplitter):
+    """Token-sized chunks cut at headings, paragraphs and table boundaries.
+
+    Text is first cut into atoms: heading lines, paragraphs, and runs of
+    table rows. Atoms are packed into chunks of at most ``chunk_size``
+    tokens, with whole trailing atoms of up to ``chunk_overlap`` tokens
+    repeated at the start of the next chunk. A heading starts a new chunk,
+    without overlap, so chunks don't straddle sections, unless the current
+    chunk holds less than ``MIN_SECTION_FRACTION`` of ``chunk_size``: then
+    the heading joins it and the chunk is labelled with the new section.
+    Only atoms longer than a chunk are split further, by line and then by
+    the recursive character splitter.
+
+    The heading path is carried across the pages of one source (PDF pages
+    arrive as separate documents), and every chunk records ``section``,
+    ``section_index``, ``chunk_index`` and ``start_index`` (in its page).
+    """
+
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int,
+        length_function: Callable[[str], int],
+    ):
+        super().__init__(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=length_function,
+            add_start_index=True,
+        )
+        self._fallback = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=length_function,
+            separators=SEPARATORS,
+            add_start_index=True,
+        )
+
+    def split_text(self, text: str) -> list[str]:
+        return [text[start:end] for start, end, _ in self._spans(text, _Sections())]
+
+    def split_documents(self, documents: Iterable[Document]) -> list[Document]:
+        chunks: list[Document] = []
+        source: Any = object()
+        for doc in documents:
+            if doc.metadata.get("source") != source:
+                source = doc.metadata.get("source")
+                sections, chunk_index = _Sections(), 0
+            for start, end, (section, section_index) in self._spans(
+                doc.page_content, sections
+            ):
+                metadata = {
+                    **doc.metadata,
+                    "start_index": start,
+                    "section": section,
+                    "section_index": section_index,
+                    "chunk_index": chunk_index,
+                }
+                chunks.append(
+                    Document(
+                        page_content=doc.page_content[start:end], metadata=metadata
+                    )
+                )
+                chunk_index += 1
+        return chunks
+
+    def _spans(
+        self, text: str, sections: "_Sections"
+    ) -> list[tuple[int, int, tuple[str, int]]]:
+        spans = []
+        current: list[_Atom] = []
+        tokens = 0
+        label = sections.label()
+        min_section = self._chunk_size * MIN_SECTION_FRACTION
+
+        def emit() -> None:
+            spans.append((current[0].start, current[-1].end, label))
+
+        for atom in self._atoms(text):
+            if atom.heading is not None:
+                if current and tokens >= min_section:
+                    emit()
+                    current, tokens = [], 0
+                sections.enter(*atom.heading)
+                # Also when the heading joins a short chunk: label it by the
+                # section it now introduces.
+                label = sections.label()
+            elif current and tokens + atom.tokens > self._chunk_size:
+                # Keep a heading with the text it introduces.
+                moved = (
+                    [current.pop()] if len(current) > 1 and current[-1].heading else []
+                )
+                emit()
+                current = moved or self._overlap(current)
+                tokens = sum(a.tokens for a in current)
+            if not current:
+                label = sections.label()
+            current.append(atom)
+            tokens += atom.tokens
+        if current:
+            emit()
+        return spans
+
+    def _overlap(self, atoms: list[_Atom]) -> list[_Atom]:
+        carried: list[_Atom] = []
+        tokens = 0
+        for atom in reversed(atoms[1:]):
+            tokens += atom.tokens
+            if tokens > self._chunk_overlap:
+                break
+            carried.insert(0, atom)
+        return carried
+
+    def _atoms(self, text: str) -> list[_Atom]:
+        atoms: list[_Atom] = []
+        block: list[tuple[int, int]] = []  # line spans of the paragraph or table
+        block_is_table = False
+
+        def close() -> None:
+            if block:
+                atoms.extend(self._fit(text, block))
+                block.clear()
+
+        offset = 0
+        for line in text.split("\n"):
+            start, end = offset, offset + len(line)
+            offset = end + 1
+            if not line.strip():
+                close()
+                continue
+            level = heading_level(line)
+            if level is not None:
+                close()
+                title = line.strip().lstrip("#").strip()
+                atoms.append(
+                    _Atom(start, end, self._length_function(line), (level, title))
+                )
+                continue
+            table = is_table_row(line)
+            if block and table != block_is_table:
+                close()
+            block_is_table = table
+            block.append((start, end))
+        close()
+        return atoms
+
+    def _fit(self, text: str, lines: list[tuple[int, int]]) -> list[_Atom]:
+        """One atom for the whole block, or smaller ones if it exceeds a chunk."""
+        start, end = lines[0][0], lines[-1][1]
+        tokens = self._length_function(text[start:end])
+        if tokens <= self._chunk_size:
+            return [_Atom(start, end, tokens)]
+        if len(lines) > 1:
+            return [atom for line in lines for atom in self._fit(text, [line])]
+        return [
+            _Atom(
+                start + piece.metadata["start_index"],
+                start + piece.metadata["start_index"] + len(piece.page_content),
+                self._length_function(piece.page_content),
+            )
+            for piece in self._fallback.create_documents([text[start:end]])
+        ]
+
+
+class _Sections:
+    """Heading path of the current position in a source."""
+
+    def __init__(self):
+        self.path: list[tuple[int, str]] = []
+        self.index = 0
+
+    def enter(self, level: int, title: str) -> None:
+        while self.path and self.path[-1][0] >= level:
+            self.path.pop()
+        self.path.append((level, title))
+        self.index += 1
+
+    def label(self) -> tuple[str, int]:
+        return " > ".join(title for _, title in self.path), self.index
+
+
+def chunk_tokens() -> int:
+    """Chunk size in tokens: the configured one, or what the embedding model reads."""
+    if config.rag.chunk_tokens:
+        return config.rag.chunk_tokens
+    profile = config.rag.embedding_profile
+    # The passage prefix and the [CLS]/[SEP] tokens share the sequence.
+    return profile.max_seq_length - estimate_tokens(profile.passage_prefix) - 2
+
+
+def get_child_splitter() -> StructureSplitter:
+    """Cuts parent spans into the small chunks that are embedded in parent mode."""
+    return StructureSplitter(
+        chunk_size=config.rag.child_chunk_tokens,
+        chunk_overlap=config.rag.child_chunk_overlap_tokens,
+        length_function=TokenCounter(),
+    )
 
 
-def get_splitter():
-    return RecursiveCharacterTextSplitter(
-        chunk_size=config.rag.chunk_size,
-        chunk_overlap=config.rag.chunk_overlap,
-        separators=["\n\n", "\n", ". ", " ", ""],
+def get_splitter() -> TextSplitter:
+    if config.rag.splitter == "recursive":
+        return RecursiveCharacterTextSplitter(
+            chunk_size=config.rag.chunk_size,
+            chunk_overlap=config.rag.chunk_overlap,
+            separators=SEPARATORS,
+            add_start_index=True,
+        )
+    return StructureSplitter(
+        chunk_size=chunk_tokens(),
+        chunk_overlap=config.rag.chunk_overlap_tokens,
+        length_function=TokenCounter(),
     )
@@ -1,27 +1,121 @@
-from langchain_qdrant import QdrantVectorStore
-from qdrant_client import QdrantClient
-from qdrant_client.http import models
-from src.ai_assistant.rag.embeddings import get_embeddings
-from src.ai_assistant.core.config import config
+from typing import TYPE_CHECKING, Any
+
+from src.ai_assistant.rag.embeddings import BatchedEmbeddings, get_embeddings
+from src.ai_assistant.core.config import EmbeddingProfile, config
 from src.ai_assistant.core.logger import logger
 
-client = QdrantClient(config.rag.db_url)
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+    from langchain_qdrant import QdrantVectorStore
+
+COLLECTION_NAME = "rag_store"
+
+_client: Any = None
+
+
+def get_qdrant_client():
+    """Process-wide Qdrant client, created on first use."""
+    global _client
+    if _client is None:
+        from qdrant_client import QdrantClient
+
+        _client = QdrantClient(config.rag.db_url)
+    return _client
+
+
+PROFILE_METADATA_KEY = "embedding_profile"
+
+
+def _profile_record(profile: EmbeddingProfile) -> dict:
+    return {
+        "model": config.rag.embedding_model,
+        "query_prefix": profile.query_prefix,
+        "passage_prefix": profile.passage_prefix,
+    }
+
+
+def _create_collection(client: Any, collection_name: str) -> None:
+    from qdrant_client.http import models
+
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=models.VectorParams(size=768, distance=models.Distance.COSINE),
+        metadata={PROFILE_METADATA_KEY: _profile_record(config.rag.embedding_profile)},
+    )
+    logger.info("Created new collection: {}", collection_name)
+
+
+def collection_profile(client: Any, collection_name: str) -> EmbeddingProfile:
+    """The embedding profile that matches the vectors already in the collection.
+
+    The collection metadata records the model and prefixes it was indexed
+    with. A collection without the record was indexed before embedding
+    profiles existed, without prefixes. When the record differs from the
+    configuration, its prefixes are kept so queries still match the stored
+    vectors; an empty collection takes the configured profile, so deleting
+    and re-uploading the documents switches to it.
+    """
+    configured = config.rag.embedding_profile
+    wanted = _profile_record(configured)
+    try:
+        metadata = client.get_collection(collection_name).config.metadata or {}
+        stored = metadata.get(PROFILE_METADATA_KEY)
+        if stored != wanted and client.count(collection_name).count == 0:
+            stored = wanted
+        elif stored is None:
+            stored = {**wanted, "query_prefix": "", "passage_prefix": ""}
+        if stored != metadata.get(PROFILE_METADATA_KEY):
+            client.update_collection(
+                collection_name, metadata={PROFILE_METADATA_KEY: stored}
+            )
+    except Exception as e:
+        logger.warning(
+            "Could not check the embedding profile of {}: {}", collection_name, e
+        )
+        return configured
+
+    if stored["model"] != wanted["model"]:
+        logger.error(
+            "Collection {} was indexed with {}, not {}: re-index the documents",
+            collection_name,
+            stored["model"],
+            wanted["model"],
+        )
+    prefixes = (stored["query_prefix"], stored["passage_prefix"])
+    if prefixes == (configured.query_prefix, configured.passage_prefix):
+        return configured
+    logger.warning(
+        "Collection {} was indexed with prefixes {!r}/{!r}, not the configured {!r}/{!r}; "
+        "keeping the collection's until its documents are re-indexed",
+        collection_name,
+        *prefixes,
+        configured.query_prefix,
+        configured.passage_prefix,
+    )
+    if config.inference.url:
+        logger.error(
+            "The inference sidecar applies its own RAG__EMBEDDING_PROFILE: set its "
+            "prefixes to {!r}/{!r} or re-index the documents",
+            *prefixes,
+        )
+    return configured.model_copy(
+        update={"query_prefix": prefixes[0], "passage_prefix": prefixes[1]}
+    )
+
 
+def get_vector_store() -> "QdrantVectorStore":
+    from langchain_qdrant import QdrantVectorStore
 
-def get_vector_store() -> QdrantVectorStore:
-    embeddings = get_embeddings()
-    collection_name = "rag_store"
+    client = get_qdrant_client()
+    collection_name = COLLECTION_NAME
 
     collection_exists = client.collection_exists(collection_name)
 
     if not collection_exists:
-        client.create_collection(
-            collection_name=collection_name,
-            vectors_config=models.VectorParams(
-                size=768, distance=models.Distance.COSINE
-            ),
-        )
-        logger.info(f"Created new collection: {collection_name}")
+        _create_collection(client, collection_name)
+
+    profile = collection_profile(client, collection_name)
+    embeddings = get_embeddings(profile)
 
     try:
         return QdrantVectorStore(
@@ -32,15 +126,95 @@ def get_vector_store() -> QdrantVectorStore:
     except Exception as e:
         if "does not contain dense vector" in str(e):
             client.delete_collection(collection_name)
-            client.create_collection(
-                collection_name=collection_name,
-                vectors_config=models.VectorParams(
-                    size=768, distance=models.Distance.COSINE
-                ),
-            )
+            _create_collection(client, collection_name)
+            if isinstance(embeddings, BatchedEmbeddings):
+                # Recreated empty: it takes the configured profile.
+                embeddings.profile = config.rag.embedding_profile
             return QdrantVectorStore(
                 collection_name=collection_name,
                 embedding=embeddings,
                 client=client,
             )
         raise e
+
+
+def existing_ids(client: Any, collection_name: str, ids: list[str]) -> set[str]:
+    """The IDs among ``ids`` that already have a point in the collection."""
+    if not ids:
+        return set()
+    records = client.retrieve(
+        collection_name, ids=ids, with_payload=False, with_vectors=False
+    )
+    return {str(record.id) for record in records}
+
+
+PARENT_COLLECTION_NAME = f"{COLLECTION_NAME}_parents"
+
+
+class ParentStore:
+    """Parent spans for small-to-big retrieval, keyed by point ID.
+
+    A Qdrant collection without vectors: payloads only, in the same format as
+    the vector store's (``page_content`` and ``metadata``), so parents live,
+    persist and are deleted by source next to their children.
+    """
+
+    def __init__(self, client: Any, collection_name: str = PARENT_COLLECTION_NAME):
+        self.client = client
+        self.collection_name = collection_name
+        self._exists: bool | None = None
+
+    def _ensure(self) -> bool:
+        if not self._exists:
+            self._exists = self.client.collection_exists(self.collection_name)
+        return self._exists
+
+    def add(self, docs: list["Document"], ids: list[str]) -> None:
+        from qdrant_client.http import models
+
+        if not docs:
+            return
+        if not self._ensure():
+            self.client.create_collection(self.collection_name, vectors_config={})
+            self._exists = True
+            logger.info("Created new collection: {}", self.collection_name)
+        self.client.upsert(
+            self.collection_name,
+            points=[
+                models.PointStruct(
+                    id=point_id,
+                    vector={},
+                    payload={
+                        "page_content": doc.page_content,
+                        "metadata": doc.metadata,
+                    },
+                )
+                for point_id, doc in zip(ids, docs)
+            ],
+        )
+
+    def get(self, ids: list[str]) -> dict[str, "Document"]:
+        """Parents by point ID; missing IDs are left out."""
+        from langchain_core.documents import Document
+
+        if not ids or not self._ensure():
+            return {}
+        records = self.client.retrieve(
+            self.collection_name, ids=ids, with_payload=True, with_vectors=False
+        )
+        return {
+            str(record.id): Document(
+                page_content=record.payload["page_content"],
+                metadata=record.payload["metadata"],
+            )
+            for record in records
+        }
+
+    def existing(self, ids: list[str]) -> set[str]:
+        if not self._ensure():
+            return set()
+        return existing_ids(self.client, self.collection_name, ids)
+
+    def delete(self, points_selector: Any) -> None:
+        if self._ensure():
+            self.client.delete(self.collection_name, points_selector=points_selector)
@@ -19,3 +19,13 @@ class DocumentUploadResponse(BaseModel):
 class DocumentDeleteResponse(BaseModel):
     success: bool
     deleted: str
+
+
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class CacheStatsResponse(BaseModel):
+    prefixes: dict[str, CacheStats]
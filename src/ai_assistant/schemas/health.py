@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+
+
+class ProbeStatus(BaseModel):
+    ok: bool
+    detail: str | None = None
+    latency_ms: float
+    age_seconds: float
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    warmup: str
+    error: str | None = None
+    loaded: dict[str, float]
+    checks: dict[str, ProbeStatus] = {}
+    queue_depth: dict[str, int] = {}
+
+
+class LivenessResponse(BaseModel):
+    alive: bool
+    uptime_seconds: float
@@ -2,15 +2,21 @@
 
 import pytest
 import httpx
+from fastapi import FastAPI
 from httpx import ASGITransport
 
 from src.ai_assistant.main import get_app
 
 
 @pytest.fixture
-async def client() -> httpx.AsyncClient:
+def app() -> FastAPI:
+    """Application instance; use ``app.dependency_overrides`` to swap resources."""
+    return get_app()
+
+
+@pytest.fixture
+async def client(app: FastAPI) -> httpx.AsyncClient:
     """FastAPI async test client."""
-    app = get_app()
     transport = ASGITransport(app=app)
     async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
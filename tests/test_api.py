@@ -1,11 +1,44 @@
 """Tests for API endpoints (async)."""
 
-from unittest.mock import AsyncMock, patch
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 import httpx
+from fastapi import FastAPI
 from langchain_core.documents import Document
 
+from src.ai_assistant.core.probes import ProbeResult
+from src.ai_assistant.core.resilience import LLMUnavailable
+from src.ai_assistant.core.scheduler import Overloaded
+from src.ai_assistant.core.resources import (
+    SERVING_RESOURCES,
+    aget_agent,
+    get_rag_graph,
+    get_rag_pipeline,
+    resources,
+)
+
+
+@pytest.fixture
+def mock_rag_graph(app: FastAPI) -> MagicMock:
+    graph = MagicMock()
+    app.dependency_overrides[get_rag_graph] = lambda: graph
+    with patch(
+        "src.ai_assistant.api.v1.chat.thread_has_history",
+        AsyncMock(return_value=False),
+    ):
+        yield graph
+
+
+@pytest.fixture
+def mock_pipeline(app: FastAPI) -> MagicMock:
+    pipeline = MagicMock()
+    pipeline.get_documents = AsyncMock(return_value=[])
+    app.dependency_overrides[get_rag_pipeline] = lambda: pipeline
+    return pipeline
+
 
 class TestApp:
     async def test_openapi_available(self, client: httpx.AsyncClient) -> None:
@@ -23,11 +56,141 @@ class TestApp:
         r = await client.get("/healthz")
         assert r.status_code in (200, 404, 405)
 
+    async def test_import_does_not_load_models(self, client: httpx.AsyncClient) -> None:
+        await client.get("/openapi.json")
+        assert not resources.is_loaded("rag_pipeline")
+        assert not resources.is_loaded("llm")
+
+    async def test_cold_load_does_not_block_event_loop(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        def slow_build():
+            time.sleep(0.2)
+            return "agent"
+
+        monkeypatch.setattr(resources, "_instances", {})
+        monkeypatch.setattr(
+            type(resources),
+            "agent",
+            property(lambda self: self._get("agent", slow_build)),
+        )
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        assert await aget_agent() == "agent"
+        ticker.cancel()
+        assert ticks >= 5
+
+    def test_compiling_graph_does_not_load_models(self) -> None:
+        get_rag_graph()
+        assert not resources.is_loaded("rag_pipeline")
+        assert not resources.is_loaded("agent")
+
+
+def _loaded_resources() -> dict[str, MagicMock]:
+    instances = {name: MagicMock() for name in SERVING_RESOURCES}
+    instances["rag_pipeline"].queue_depths.return_value = {"embed": 0, "rerank": 0}
+    return instances
+
+
+@pytest.fixture
+def loaded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(resources, "_instances", _loaded_resources())
+
+
+@pytest.fixture
+def probe_results() -> dict[str, ProbeResult]:
+    results = {"qdrant": ProbeResult(ok=True), "redis": ProbeResult(ok=True)}
+    with patch(
+        "src.ai_assistant.api.health.run_probes", AsyncMock(return_value=results)
+    ):
+        yield results
+
+
+class TestHealth:
+    async def test_liveness(self, client: httpx.AsyncClient) -> None:
+        r = await client.get("/healthz/live")
+        assert r.status_code == 200
+        assert r.json()["alive"] is True
+
+    async def test_not_ready_during_warmup(
+        self,
+        client: httpx.AsyncClient,
+        probe_results: dict,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(resources, "warmup_status", "running")
+        r = await client.get("/healthz/ready")
+        assert r.status_code == 503
+        assert r.json()["ready"] is False
+
+    async def test_ready_after_warmup(
+        self,
+        client: httpx.AsyncClient,
+        probe_results: dict,
+        loaded: None,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(resources, "warmup_status", "done")
+        r = await client.get("/healthz/ready")
+        assert r.status_code == 200
+        data = r.json()
+        assert data["warmup"] == "done"
+        assert data["checks"]["qdrant"]["ok"] is True
+
+    async def test_not_ready_until_loaded_without_warmup(
+        self,
+        client: httpx.AsyncClient,
+        probe_results: dict,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(resources, "warmup_status", "disabled")
+        r = await client.get("/healthz/ready")
+        assert r.status_code == 503
+
+        monkeypatch.setattr(resources, "_instances", _loaded_resources())
+        r = await client.get("/healthz/ready")
+        assert r.status_code == 200
+
+    async def test_not_ready_when_dependency_down(
+        self,
+        client: httpx.AsyncClient,
+        probe_results: dict,
+        loaded: None,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(resources, "warmup_status", "done")
+        probe_results["redis"] = ProbeResult(ok=False, detail="Connection refused")
+        r = await client.get("/healthz/ready")
+        assert r.status_code == 503
+        assert r.json()["checks"]["redis"]["detail"] == "Connection refused"
+
+    async def test_not_ready_when_queue_backed_up(
+        self,
+        client: httpx.AsyncClient,
+        probe_results: dict,
+        loaded: None,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(resources, "warmup_status", "done")
+        monkeypatch.setattr(
+            "src.ai_assistant.api.health.queue_depths",
+            lambda: {"embed": 1000, "rerank": 0},
+        )
+        r = await client.get("/healthz/ready")
+        assert r.status_code == 503
+        assert r.json()["queue_depth"]["embed"] == 1000
+
 
 class TestConversationEndpoint:
-    @patch("src.ai_assistant.api.v1.chat.rag_graph")
     async def test_conversation_success(
-        self, mock_rag_graph: AsyncMock, client: httpx.AsyncClient
+        self, mock_rag_graph: MagicMock, client: httpx.AsyncClient
     ) -> None:
         mock_rag_graph.ainvoke = AsyncMock(
             return_value={
@@ -47,9 +210,8 @@ class TestConversationEndpoint:
         assert data["answer"] == "Hello!"
         mock_rag_graph.ainvoke.assert_called_once()
 
-    @patch("src.ai_assistant.api.v1.chat.rag_graph")
     async def test_conversation_with_document_sources(
-        self, mock_rag_graph: AsyncMock, client: httpx.AsyncClient
+        self, mock_rag_graph: MagicMock, client: httpx.AsyncClient
     ) -> None:
         mock_rag_graph.ainvoke = AsyncMock(
             return_value={
@@ -72,11 +234,75 @@ class TestConversationEndpoint:
         data = r.json()
         assert data["document_sources"] == ["file.pdf"]
 
+    async def test_llm_unavailable_returns_503(
+        self, mock_rag_graph: MagicMock, client: httpx.AsyncClient
+    ) -> None:
+        mock_rag_graph.ainvoke = AsyncMock(
+            side_effect=LLMUnavailable("circuit_open", retry_after=12.5)
+        )
+        r = await client.post(
+            "/api/v1/chat/conversation",
+            json={"prompt": "What is Y?", "thread_id": "t1"},
+        )
+        assert r.status_code == 503
+        assert r.headers["retry-after"] == "13"
+
+    async def test_cache_hit_is_recorded_in_thread(
+        self, mock_rag_graph: MagicMock, client: httpx.AsyncClient
+    ) -> None:
+        cached = {"answer": "Cached!", "document_sources": []}
+        with (
+            patch(
+                "src.ai_assistant.api.v1.chat.get_or_compute",
+                AsyncMock(return_value=cached),
+            ),
+            patch("src.ai_assistant.api.v1.chat.record_turn", AsyncMock()) as record,
+        ):
+            r = await client.post(
+                "/api/v1/chat/conversation",
+                json={"prompt": "Hi", "thread_id": "t1"},
+            )
+        assert r.json()["answer"] == "Cached!"
+        mock_rag_graph.ainvoke.assert_not_called()
+        record.assert_awaited_once_with("t1", "Hi", "Cached!")
+
+    async def test_standalone_later_turn_reuses_shared_answer(
+        self, mock_rag_graph: MagicMock, client: httpx.AsyncClient
+    ) -> None:
+        from src.ai_assistant.core.cache import conversation_cache_key
+
+        shared = {"answer": "Shared", "document_sources": []}
+        get_json = AsyncMock(return_value=shared)
+        compute = AsyncMock()
+        with (
+            patch(
+                "src.ai_assistant.api.v1.chat.thread_has_history",
+                AsyncMock(return_value=True),
+            ),
+            patch(
+                "src.ai_assistant.api.v1.chat.reuses_shared_answers",
+                AsyncMock(return_value=True),
+            ),
+            patch("src.ai_assistant.api.v1.chat.get_json", get_json),
+            patch("src.ai_assistant.api.v1.chat.get_or_compute", compute),
+            patch("src.ai_assistant.api.v1.chat.record_turn", AsyncMock()) as record,
+        ):
+            r = await client.post(
+                "/api/v1/chat/conversation",
+                json={"prompt": "What is X?", "thread_id": "t1"},
+            )
+        assert r.json()["answer"] == "Shared"
+        get_json.assert_awaited_once_with(conversation_cache_key("What is X?"))
+        compute.assert_not_called()
+        record.assert_awaited_once_with("t1", "What is X?", "Shared")
+
     async def test_conversation_missing_body(self, client: httpx.AsyncClient) -> None:
         r = await client.post("/api/v1/chat/conversation", json={})
         assert r.status_code == 422
 
-    async def test_conversation_validation_error(self, client: httpx.AsyncClient) -> None:
+    async def test_conversation_validation_error(
+        self, client: httpx.AsyncClient
+    ) -> None:
         r = await client.post(
             "/api/v1/chat/conversation",
             json={"prompt": "Hi"},
@@ -86,7 +312,7 @@ class TestConversationEndpoint:
 
 class TestDocumentsEndpoint:
     async def test_get_documents_empty_or_cached(
-        self, client: httpx.AsyncClient
+        self, mock_pipeline: MagicMock, client: httpx.AsyncClient
     ) -> None:
         r = await client.get("/api/v1/admin/documents?limit=5")
         assert r.status_code == 200
@@ -95,14 +321,13 @@ class TestDocumentsEndpoint:
         assert isinstance(data["documents"], list)
 
     async def test_get_documents_limit_validation(
-        self, client: httpx.AsyncClient
+        self, mock_pipeline: MagicMock, client: httpx.AsyncClient
     ) -> None:
         r = await client.get("/api/v1/admin/documents?limit=0")
         assert r.status_code == 422
 
-    @patch("src.ai_assistant.api.v1.admin.pipeline")
     async def test_delete_document_not_found(
-        self, mock_pipeline: AsyncMock, client: httpx.AsyncClient
+        self, mock_pipeline: MagicMock, client: httpx.AsyncClient
     ) -> None:
         mock_pipeline.delete_documents_by_name = AsyncMock(return_value=False)
         r = await client.delete("/api/v1/admin/documents/nonexistent.pdf")
@@ -110,9 +335,8 @@ class TestDocumentsEndpoint:
         data = r.json()
         assert "detail" in data
 
-    @patch("src.ai_assistant.api.v1.admin.pipeline")
     async def test_delete_document_success(
-        self, mock_pipeline: AsyncMock, client: httpx.AsyncClient
+        self, mock_pipeline: MagicMock, client: httpx.AsyncClient
     ) -> None:
         mock_pipeline.delete_documents_by_name = AsyncMock(return_value=True)
         r = await client.delete("/api/v1/admin/documents/test.pdf")
@@ -120,3 +344,76 @@ class TestDocumentsEndpoint:
         data = r.json()
         assert data["success"] is True
         assert data["deleted"] == "test.pdf"
+
+    async def test_upload_rejected_when_ingest_queue_full(
+        self,
+        mock_pipeline: MagicMock,
+        client: httpx.AsyncClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        def full(work_class):
+            raise Overloaded(work_class, "queue_full", retry_after=4.2)
+
+        monkeypatch.setattr("src.ai_assistant.api.v1.admin.scheduler.admit", full)
+        r = await client.post(
+            "/api/v1/admin/documents", files={"file": ("a.txt", b"hello", "text/plain")}
+        )
+        assert r.status_code == 429
+        assert r.headers["retry-after"] == "5"
+        mock_pipeline.extract_document.assert_not_called()
+
+    async def test_upload_rejected_partway_is_rolled_back(
+        self,
+        mock_pipeline: MagicMock,
+        client: httpx.AsyncClient,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path,
+    ) -> None:
+        monkeypatch.setattr(
+            "src.ai_assistant.api.v1.admin.config.rag.docs_folder", str(tmp_path)
+        )
+        mock_pipeline.extract_document = AsyncMock(return_value=[Document("hello")])
+        mock_pipeline.index_documents = AsyncMock(
+            side_effect=Overloaded("ingest", "timeout", retry_after=2.0)
+        )
+        mock_pipeline.delete_documents_by_name = AsyncMock(return_value=True)
+        r = await client.post(
+            "/api/v1/admin/documents", files={"file": ("a.txt", b"hello", "text/plain")}
+        )
+        assert r.status_code == 429
+        assert not (tmp_path / "a.txt").exists()
+        mock_pipeline.delete_documents_by_name.assert_not_called()
+
+    async def test_failed_reupload_keeps_previous_file(
+        self,
+        mock_pipeline: MagicMock,
+        client: httpx.AsyncClient,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path,
+    ) -> None:
+        monkeypatch.setattr(
+            "src.ai_assistant.api.v1.admin.config.rag.docs_folder", str(tmp_path)
+        )
+        (tmp_path / "a.txt").write_bytes(b"old")
+        mock_pipeline.extract_document = AsyncMock(return_value=[Document("new")])
+        mock_pipeline.index_documents = AsyncMock(return_value=False)
+        mock_pipeline.delete_documents_by_name = AsyncMock(return_value=True)
+        r = await client.post(
+            "/api/v1/admin/documents", files={"file": ("a.txt", b"new", "text/plain")}
+        )
+        assert r.status_code == 500
+        assert (tmp_path / "a.txt").read_bytes() == b"old"
+        mock_pipeline.delete_documents_by_name.assert_not_called()
+
+
+class TestCacheStatsEndpoint:
+    @patch("src.ai_assistant.api.v1.admin.get_cache_stats")
+    async def test_cache_stats(
+        self, mock_stats: AsyncMock, client: httpx.AsyncClient
+    ) -> None:
+        mock_stats.return_value = {"generate:": {"hits": 3, "misses": 1}}
+        r = await client.get("/api/v1/admin/cache/stats")
+        assert r.status_code == 200
+        data = r.json()["prefixes"]["generate:"]
+        assert data["hits"] == 3
+        assert data["hit_ratio"] == 0.75
@@ -0,0 +1,249 @@
+"""Tests for micro-batching of concurrent inference calls."""
+
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.ai_assistant.rag.batching import MicroBatcher
+from src.ai_assistant.core.config import EmbeddingProfile, config
+from src.ai_assistant.rag import embeddings as embeddings_mod
+from src.ai_assistant.rag.embeddings import BatchedEmbeddings
+from src.ai_assistant.rag.reranker import BatchedReranker
+
+
+class TestMicroBatcher:
+    async def test_concurrent_submissions_share_batch(self) -> None:
+        batches: list[list[int]] = []
+
+        def process(items: list[int]) -> list[int]:
+            batches.append(items)
+            return [i * 2 for i in items]
+
+        batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        assert results == [0, 2, 4, 6, 8]
+        assert batches == [[0, 1, 2, 3, 4]]
+        batcher.close()
+
+    async def test_max_batch_size_respected(self) -> None:
+        batches: list[list[int]] = []
+
+        def process(items: list[int]) -> list[int]:
+            batches.append(items)
+            return items
+
+        batcher = MicroBatcher(process, max_batch_size=2, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        assert results == [0, 1, 2, 3, 4]
+        assert all(len(b) <= 2 for b in batches)
+        batcher.close()
+
+    async def test_batch_error_propagates_to_callers(self) -> None:
+        def process(items: list[int]) -> list[int]:
+            raise RuntimeError("boom")
+
+        batcher = MicroBatcher(process, max_wait_ms=1)
+        with pytest.raises(RuntimeError, match="boom"):
+            await batcher.submit(1)
+        batcher.close()
+
+
+class _ListwiseRanker:
+    """Stand-in for a flashrank ranker without an ONNX session."""
+
+    llm_model = object()
+
+    def rerank(self, request):
+        return sorted(request.passages, key=lambda p: -len(p["text"]))
+
+
+class TestBatchedReranker:
+    async def test_rerank_orders_and_trims(self) -> None:
+        reranker = BatchedReranker(ranker=_ListwiseRanker())
+        docs = [
+            Document(page_content="a", metadata={"source": "x.pdf"}),
+            Document(page_content="aaa", metadata={"source": "y.pdf"}),
+            Document(page_content="aa", metadata={"source": "z.pdf"}),
+        ]
+
+        ranked = await reranker.rerank("q", docs, top_n=2)
+
+        assert [d.page_content for d in ranked] == ["aaa", "aa"]
+        assert ranked[0].metadata["source"] == "y.pdf"
+        assert (
+            ranked[0].metadata["relevance_score"]
+            > ranked[1].metadata["relevance_score"]
+        )
+        reranker.close()
+
+    async def test_rerank_empty(self) -> None:
+        reranker = BatchedReranker(ranker=_ListwiseRanker())
+        assert await reranker.rerank("q", [], top_n=3) == []
+        reranker.close()
+
+
+class _DigitTokenizer:
+    """Encodes each (query, passage) pair as the passage's number."""
+
+    def encode_batch(self, pairs):
+        return [
+            SimpleNamespace(ids=[int(text)], attention_mask=[1], type_ids=[0])
+            for _, text in pairs
+        ]
+
+
+class _IdentitySession:
+    """ONNX session stand-in whose logit is the input ID."""
+
+    def __init__(self) -> None:
+        self.batch_sizes: list[int] = []
+
+    def run(self, output_names, inputs):
+        self.batch_sizes.append(len(inputs["input_ids"]))
+        return [inputs["input_ids"].astype(np.float32)]
+
+
+class TestBatchedRerankerOnnx:
+    async def test_concurrent_requests_get_their_own_scores(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(config.rag, "rerank_batch_wait_ms", 50.0)
+        session = _IdentitySession()
+        ranker = SimpleNamespace(
+            llm_model=None, tokenizer=_DigitTokenizer(), session=session
+        )
+        reranker = BatchedReranker(ranker=ranker)
+
+        first, second = await asyncio.gather(
+            reranker.batcher.submit(("q1", ["3", "1", "2"])),
+            reranker.batcher.submit(("q2", ["-1", "4"])),
+        )
+
+        assert session.batch_sizes == [5]
+        sigmoid = lambda x: 1 / (1 + np.exp(-x))  # noqa: E731
+        assert first == pytest.approx([sigmoid(3), sigmoid(1), sigmoid(2)])
+        assert second == pytest.approx([sigmoid(-1), sigmoid(4)])
+        reranker.close()
+
+
+class _RecordingEmbeddings(Embeddings):
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(texts)
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+class TestBatchedEmbeddings:
+    async def test_concurrent_queries_single_forward_pass(self) -> None:
+        base = _RecordingEmbeddings()
+        embeddings = BatchedEmbeddings(base)
+
+        vectors = await asyncio.gather(
+            *(embeddings.aembed_query(q) for q in ["a", "bb", "ccc"])
+        )
+
+        assert vectors == [[1.0], [2.0], [3.0]]
+        assert base.calls == [["a", "bb", "ccc"]]
+        embeddings.close()
+
+    def test_sync_calls_bypass_batcher(self) -> None:
+        base = _RecordingEmbeddings()
+        embeddings = BatchedEmbeddings(base)
+
+        assert embeddings.embed_query("abcd") == [4.0]
+        assert embeddings.embed_documents(["a", "b"]) == [[1.0], [1.0]]
+        embeddings.close()
+
+    async def test_profile_prefixes_applied(self) -> None:
+        base = _RecordingEmbeddings()
+        embeddings = BatchedEmbeddings(base, EmbeddingProfile())
+
+        embeddings.embed_documents(["chunk"])
+        embeddings.embed_query("sync")
+        await embeddings.aembed_query("async")
+
+        assert base.calls == [["passage: chunk"], ["query: sync"], ["query: async"]]
+        embeddings.close()
+
+
+class _FakeSentenceTransformer:
+    max_seq_length = 8192
+
+    def encode(self, texts, **kwargs):
+        self.texts, self.kwargs = texts, kwargs
+        return np.ones((len(texts), 2))
+
+
+class TestSentenceTransformerEmbeddings:
+    def test_applies_profile_to_model(self) -> None:
+        from src.ai_assistant.rag.embeddings import SentenceTransformerEmbeddings
+
+        model = _FakeSentenceTransformer()
+        embeddings = SentenceTransformerEmbeddings(
+            model, EmbeddingProfile(max_seq_length=256, batch_size=4)
+        )
+
+        assert model.max_seq_length == 256
+        assert embeddings.embed_documents(["a\nb"]) == [[1.0, 1.0]]
+        assert model.texts == ["a b"]
+        assert model.kwargs["batch_size"] == 4
+        assert model.kwargs["normalize_embeddings"] is True
+
+
+class TestModelKwargs:
+    @pytest.mark.parametrize("backend", ["torch", "onnx", "openvino"])
+    def test_backend_without_model_file(
+        self, monkeypatch: pytest.MonkeyPatch, backend: str
+    ) -> None:
+        monkeypatch.setattr(config.rag, "embedding_backend", backend)
+        monkeypatch.setattr(config.rag, "embedding_model_file", None)
+
+        assert embeddings_mod.get_model_kwargs() == {"backend": backend}
+
+    def test_model_file_is_selected(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(config.rag, "embedding_backend", "onnx")
+        monkeypatch.setattr(
+            config.rag, "embedding_model_file", "onnx/model_qint8_avx512_vnni.onnx"
+        )
+
+        assert embeddings_mod.get_model_kwargs() == {
+            "backend": "onnx",
+            "model_kwargs": {"file_name": "onnx/model_qint8_avx512_vnni.onnx"},
+        }
+
+    def test_loader_passes_kwargs_to_sentence_transformer(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        import sentence_transformers
+
+        created = {}
+
+        def fake_model(name, **kwargs):
+            created.update(name=name, kwargs=kwargs)
+            return _FakeSentenceTransformer()
+
+        monkeypatch.setattr(sentence_transformers, "SentenceTransformer", fake_model)
+        monkeypatch.setattr(config.rag, "embedding_backend", "openvino")
+        monkeypatch.setattr(config.rag, "embedding_model_file", None)
+
+        embeddings = embeddings_mod.load_embedding_model()
+
+        assert created == {
+            "name": config.rag.embedding_model,
+            "kwargs": {"backend": "openvino"},
+        }
+        assert (
+            embeddings.model.max_seq_length
+            == config.rag.embedding_profile.max_seq_length
+        )
@@ -0,0 +1,49 @@
+"""Smoke test for the offline benchmark harness."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# ``install()`` has to run before the app is imported, which the test session
+# has already done, so the harness is exercised in a fresh interpreter.
+SCRIPT = """
+import asyncio
+
+from benchmarks.fakes import FakeLatency, install
+
+install(FakeLatency(llm_ms=1, llm_jitter_ms=0, embed_ms=0, rerank_ms=0))
+
+import httpx
+
+from src.ai_assistant.main import get_app
+
+
+async def main():
+    transport = httpx.ASGITransport(app=get_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        files = {"file": ("notes.txt", b"Redis caches answers for repeated prompts.", "text/plain")}
+        upload = await client.post("/api/v1/admin/documents", files=files)
+        assert upload.status_code == 200, upload.text
+        payload = {"prompt": "How are answers cached?", "thread_id": "smoke"}
+        response = await client.post("/api/v1/chat/conversation", json=payload)
+        assert response.status_code == 200, response.text
+        print(response.json()["answer"])
+
+
+asyncio.run(main())
+"""
+
+
+def test_install_serves_a_request():
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip()
@@ -1,6 +1,8 @@
 """Tests for cache module (key builders and async helpers with mocked Redis)."""
 
+import asyncio
 import hashlib
+import json
 
 import pytest
 
@@ -14,9 +16,14 @@ from src.ai_assistant.core.cache import (
     rag_retrieve_cache_key,
     optimize_query_cache_key,
     generate_cache_key,
+    cache_scope,
+    get_cache_stats,
     get_json,
+    get_or_compute,
     set_json,
     delete_key,
+    decode_value,
+    encode_value,
 )
 
 
@@ -58,31 +65,259 @@ class TestCacheKeyFunctions:
         assert k1 != k2
 
 
+class TestCacheScope:
+    def test_first_turn_is_shared(self) -> None:
+        assert cache_scope("t1", has_history=False) is None
+        assert conversation_cache_key("Hi", None) == conversation_cache_key("Hi")
+
+    def test_history_isolates_threads(self) -> None:
+        s1 = cache_scope("t1", has_history=True)
+        s2 = cache_scope("t2", has_history=True)
+        assert s1 != s2
+        assert conversation_cache_key("Hi", s1) != conversation_cache_key("Hi", s2)
+        assert conversation_cache_key("Hi", s1) != conversation_cache_key("Hi")
+
+    def test_scoped_keys_keep_prefix(self) -> None:
+        scope = cache_scope("t1", has_history=True)
+        assert conversation_cache_key("Hi", scope).startswith(CONVERSATION_KEY_PREFIX)
+        assert generate_cache_key("p", scope).startswith(GENERATE_KEY_PREFIX)
+        assert generate_cache_key("p", scope) != generate_cache_key("p")
+
+
+class TestValueCodec:
+    def test_small_value_is_plain_msgpack(self) -> None:
+        value = {"answer": "short", "document_sources": ["a.pdf"]}
+        raw = encode_value(value)
+        assert raw[0] == 1
+        assert len(raw) < len(json.dumps(value))
+        assert decode_value(raw) == value
+
+    @pytest.mark.parametrize("compression", ["zstd", "zlib"])
+    def test_large_value_is_compressed(
+        self, compression: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        import src.ai_assistant.core.cache as cache_mod
+
+        monkeypatch.setattr(cache_mod.config.cache, "compression", compression)
+        value = {
+            "answer": "The refund policy allows returns. " * 100,
+            "n": [1.5, None, True],
+        }
+        raw = encode_value(value)
+        assert raw[0] in (2, 3)
+        assert len(raw) < len(json.dumps(value)) // 5
+        assert decode_value(raw) == value
+
+    def test_reads_plain_json_entries(self) -> None:
+        assert decode_value(b'{"answer": "x"}') == {"answer": "x"}
+        assert decode_value("[1, 2]") == [1, 2]
+
+
+class _FakeRedis:
+    def __init__(self, data: dict) -> None:
+        self.data = data
+
+    async def get(self, key: str):
+        return self.data.get(key)
+
+
+class TestCacheStats:
+    async def test_hits_and_misses_per_prefix(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        import src.ai_assistant.core.cache as cache_mod
+
+        monkeypatch.setattr(cache_mod, "_stats", {})
+        monkeypatch.setattr(
+            cache_mod,
+            "_get_client",
+            lambda: _FakeRedis({"generate:a": '{"answer": "x"}'}),
+        )
+
+        assert await get_json("generate:a") == {"answer": "x"}
+        assert await get_json("generate:b") is None
+        assert await get_json(f"{CONVERSATION_KEY_PREFIX}thread:abc:c") is None
+
+        stats = get_cache_stats()
+        assert stats[GENERATE_KEY_PREFIX] == {"hits": 1, "misses": 1}
+        assert stats[CONVERSATION_KEY_PREFIX] == {"hits": 0, "misses": 1}
+
+
 class TestCacheAsync:
-    async def test_get_json_no_client_returns_none(self, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def test_get_json_no_client_returns_none(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
         from src.ai_assistant import core
+
         monkeypatch.setattr(core.config.config.cache, "enabled", False)
         # Reset client so _get_client returns None
         import src.ai_assistant.core.cache as cache_mod
+
         cache_mod._redis_client = None
         result = await get_json("any_key")
         assert result is None
         monkeypatch.setattr(core.config.config.cache, "enabled", True)
 
-    async def test_set_json_no_client_returns_false(self, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def test_set_json_no_client_returns_false(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
         from src.ai_assistant import core
+
         monkeypatch.setattr(core.config.config.cache, "enabled", False)
         import src.ai_assistant.core.cache as cache_mod
+
         cache_mod._redis_client = None
         result = await set_json("key", {"a": 1}, 60)
         assert result is False
         monkeypatch.setattr(core.config.config.cache, "enabled", True)
 
-    async def test_delete_key_no_client_returns_false(self, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def test_delete_key_no_client_returns_false(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
         from src.ai_assistant import core
+
         monkeypatch.setattr(core.config.config.cache, "enabled", False)
         import src.ai_assistant.core.cache as cache_mod
+
         cache_mod._redis_client = None
         result = await delete_key("key")
         assert result is False
         monkeypatch.setattr(core.config.config.cache, "enabled", True)
+
+
+class TestSingleFlight:
+    async def test_concurrent_callers_share_one_computation(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        import src.ai_assistant.core.cache as cache_mod
+
+        monkeypatch.setattr(cache_mod, "_get_client", lambda: None)
+        calls = 0
+
+        async def compute() -> dict:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"answer": "x"}
+
+        results = await asyncio.gather(
+            *(get_or_compute("generate:k", 60, compute) for _ in range(5))
+        )
+        assert results == [{"answer": "x"}] * 5
+        assert calls == 1
+
+    async def test_error_propagates_and_is_not_sticky(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        import src.ai_assistant.core.cache as cache_mod
+
+        monkeypatch.setattr(cache_mod, "_get_client", lambda: None)
+
+        async def fail() -> dict:
+            raise RuntimeError("llm down")
+
+        async def ok() -> dict:
+            return {"answer": "y"}
+
+        with pytest.raises(RuntimeError):
+            await get_or_compute("generate:e", 60, fail)
+        assert await get_or_compute("generate:e", 60, ok) == {"answer": "y"}
+
+    async def test_redis_lock_elects_single_worker(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        fakeredis = pytest.importorskip("fakeredis")
+        import src.ai_assistant.core.cache as cache_mod
+
+        redis = fakeredis.aioredis.FakeRedis()
+        monkeypatch.setattr(cache_mod, "_get_client", lambda: redis)
+        monkeypatch.setattr(cache_mod.config.cache, "single_flight_poll_ms", 5)
+        calls = 0
+
+        async def compute() -> dict:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"answer": "z"}
+
+        # Call the cross-worker path directly, as two workers would.
+        results = await asyncio.gather(
+            cache_mod._compute_once("generate:w", 60, compute),
+            cache_mod._compute_once("generate:w", 60, compute),
+        )
+        assert results == [{"answer": "z"}] * 2
+        assert calls == 1
+
+
+class TestBatchedCache:
+    @pytest.fixture
+    def redis(self, monkeypatch: pytest.MonkeyPatch):
+        fakeredis = pytest.importorskip("fakeredis")
+        import src.ai_assistant.core.cache as cache_mod
+
+        redis = fakeredis.aioredis.FakeRedis()
+        monkeypatch.setattr(cache_mod, "_get_client", lambda: redis)
+        monkeypatch.setattr(cache_mod, "_stats", {})
+        return redis
+
+    async def test_set_many_and_get_many(self, redis) -> None:
+        from src.ai_assistant.core.cache import get_many, set_many
+
+        assert await set_many({"generate:a": {"answer": "a"}, "documents:b": [1]}, 60)
+        assert await get_many(["generate:a", "generate:missing", "documents:b"]) == [
+            {"answer": "a"},
+            None,
+            [1],
+        ]
+        assert 0 < await redis.ttl("generate:a") <= 60
+        assert get_cache_stats()[GENERATE_KEY_PREFIX] == {"hits": 1, "misses": 1}
+
+    async def test_prefetch_serves_reads_once(self, redis, monkeypatch) -> None:
+        from src.ai_assistant.core.cache import prefetch
+
+        await set_json("generate:a", {"answer": "a"}, 60)
+        gets = 0
+        original_get = redis.get
+
+        async def counting_get(key):
+            nonlocal gets
+            gets += 1
+            return await original_get(key)
+
+        monkeypatch.setattr(redis, "get", counting_get)
+        async with prefetch("generate:a", "generate:b"):
+            assert await get_json("generate:a") == {"answer": "a"}
+            assert await get_json("generate:b") is None
+            assert gets == 0
+            assert await get_json("generate:a") == {"answer": "a"}  # read again
+            assert gets == 1
+        assert await get_json("generate:b") is None
+        assert gets == 2
+
+    async def test_shared_answers_only_for_standalone_prompts(self, redis) -> None:
+        from src.ai_assistant.core.cache import (
+            optimize_query_cache_key,
+            reuses_shared_answers,
+        )
+
+        await set_json(optimize_query_cache_key("What is X?"), {"standalone": True}, 60)
+        await set_json(optimize_query_cache_key("And why?"), {"standalone": False}, 60)
+        # Entries from before the flag, and unrouted prompts, depend on history.
+        await set_json(optimize_query_cache_key("Old"), {"use_rag": True}, 60)
+
+        assert await reuses_shared_answers("What is X?")
+        assert not await reuses_shared_answers("And why?")
+        assert not await reuses_shared_answers("Old")
+        assert not await reuses_shared_answers("Never routed")
+
+    def test_client_uses_configured_pool(self) -> None:
+        from src.ai_assistant.core.cache import create_redis_client, config
+
+        client = create_redis_client("redis://localhost:6379/0")
+        pool = client.connection_pool
+        assert pool.max_connections == config.cache.max_connections
+        assert pool.timeout == config.cache.pool_timeout_seconds
+        assert (
+            pool.connection_kwargs["socket_timeout"]
+            == config.cache.socket_timeout_seconds
+        )
@@ -0,0 +1,116 @@
+"""Tests for bounded/persistent conversation checkpointers."""
+
+import time
+from typing import Annotated, TypedDict
+
+import pytest
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langgraph.graph import END, StateGraph
+from langgraph.graph.message import add_messages
+
+from src.ai_assistant.graph.checkpointer import BoundedMemorySaver, RedisSaver
+
+
+class _State(TypedDict):
+    messages: Annotated[list[AnyMessage], add_messages]
+
+
+def _build(checkpointer):
+    graph = StateGraph(_State)
+    graph.add_node(
+        "reply", lambda state: {"messages": [AIMessage(f"#{len(state['messages'])}")]}
+    )
+    graph.set_entry_point("reply")
+    graph.add_edge("reply", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def _cfg(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+class TestBoundedMemorySaver:
+    async def test_history_survives_turns(self) -> None:
+        app = _build(BoundedMemorySaver(max_threads=10, idle_ttl_seconds=60))
+        await app.ainvoke({"messages": [HumanMessage("a")]}, _cfg("t1"))
+        result = await app.ainvoke({"messages": [HumanMessage("b")]}, _cfg("t1"))
+        assert len(result["messages"]) == 4
+        assert result["messages"][-1].content == "#3"
+
+    async def test_keeps_only_latest_checkpoint(self) -> None:
+        saver = BoundedMemorySaver(max_threads=10, idle_ttl_seconds=60)
+        app = _build(saver)
+        for i in range(5):
+            await app.ainvoke({"messages": [HumanMessage(str(i))]}, _cfg("t1"))
+
+        assert len(saver.storage["t1"][""]) == 1
+        # One live blob per channel, not one per step.
+        assert len(saver.blobs) <= 3
+
+    async def test_lru_eviction(self) -> None:
+        saver = BoundedMemorySaver(max_threads=2, idle_ttl_seconds=60)
+        app = _build(saver)
+        for thread_id in ("t1", "t2", "t3"):
+            await app.ainvoke({"messages": [HumanMessage("hi")]}, _cfg(thread_id))
+
+        assert set(saver.storage) == {"t2", "t3"}
+        assert all(key[0] != "t1" for key in saver.blobs)
+
+    async def test_idle_eviction(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        saver = BoundedMemorySaver(max_threads=10, idle_ttl_seconds=1)
+        app = _build(saver)
+        await app.ainvoke({"messages": [HumanMessage("hi")]}, _cfg("old"))
+
+        later = time.monotonic() + 5
+        monkeypatch.setattr(time, "monotonic", lambda: later)
+        await app.ainvoke({"messages": [HumanMessage("hi")]}, _cfg("new"))
+
+        assert "old" not in saver.storage
+
+    def test_unknown_thread_not_materialized(self) -> None:
+        saver = BoundedMemorySaver(max_threads=10, idle_ttl_seconds=60)
+        assert saver.get_tuple(_cfg("missing")) is None
+        assert "missing" not in saver.storage
+
+
+class TestRedisSaver:
+    async def test_roundtrip_and_delete(self) -> None:
+        fakeredis = pytest.importorskip("fakeredis")
+        saver = RedisSaver("redis://fake", "checkpoint:", idle_ttl_seconds=60)
+        saver._client = fakeredis.aioredis.FakeRedis()
+        app = _build(saver)
+
+        await app.ainvoke({"messages": [HumanMessage("a")]}, _cfg("t1"))
+        result = await app.ainvoke({"messages": [HumanMessage("b")]}, _cfg("t1"))
+        assert [m.content for m in result["messages"]] == ["a", "#1", "b", "#3"]
+
+        ttl = await saver._client.ttl("checkpoint:t1:")
+        assert 0 < ttl <= 60
+
+        await saver.adelete_thread("t1")
+        assert await saver.aget_tuple(_cfg("t1")) is None
+
+    async def test_put_keeps_writes_of_new_checkpoint(self) -> None:
+        fakeredis = pytest.importorskip("fakeredis")
+        saver = RedisSaver("redis://fake", "checkpoint:", idle_ttl_seconds=60)
+        saver._client = fakeredis.aioredis.FakeRedis()
+        app = _build(saver)
+        await app.ainvoke({"messages": [HumanMessage("a")]}, _cfg("t1"))
+        first = await saver.aget_tuple(_cfg("t1"))
+
+        # Writes for the next checkpoint landing before it is put.
+        checkpoint = {**first.checkpoint, "id": "next-checkpoint"}
+        await saver.aput_writes(
+            {"configurable": {"thread_id": "t1", "checkpoint_id": "next-checkpoint"}},
+            [("messages", [HumanMessage("b")])],
+            "task-1",
+        )
+        await saver.aput_writes(first.config, [("messages", [])], "task-0")
+        await saver.aput(first.config, checkpoint, first.metadata, {})
+
+        latest = await saver.aget_tuple(_cfg("t1"))
+        assert latest.config["configurable"]["checkpoint_id"] == "next-checkpoint"
+        assert [(task, channel) for task, channel, _ in latest.pending_writes] == [
+            ("task-1", "messages")
+        ]
+        assert await saver._client.hlen("checkpoint:t1::writes") == 1
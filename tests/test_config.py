@@ -10,6 +10,7 @@ from src.ai_assistant.core.config import (
     Config,
     LLMConfig,
     RAGConfig,
+    EmbeddingProfile,
     CacheConfig,
     AppConfig,
 )
@@ -39,6 +40,14 @@ class TestRAGConfig:
         assert c.docs_folder == "docs"
         assert c.chunk_size == 1500
         assert c.chunk_overlap == 150
+        assert isinstance(c.embedding_profile, EmbeddingProfile)
+
+    def test_embedding_profile_defaults_match_e5(self) -> None:
+        p = EmbeddingProfile()
+        assert p.query_prefix == "query: "
+        assert p.passage_prefix == "passage: "
+        assert p.normalize is True
+        assert p.max_seq_length == 512
 
     def test_create_docs_folder(self, tmp_path: Path) -> None:
         folder = tmp_path / "my_docs"
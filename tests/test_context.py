@@ -0,0 +1,63 @@
+"""Tests for token-budget context packing."""
+
+from langchain_core.documents import Document
+
+from src.ai_assistant.rag.context import estimate_tokens, merge_chunks, pack_context
+
+
+def _doc(text: str, score: float = 0.5, **metadata) -> Document:
+    return Document(
+        page_content=text,
+        metadata={"source": "docs/a.pdf", "relevance_score": score, **metadata},
+    )
+
+
+class TestMergeChunks:
+    def test_drops_exact_duplicates(self) -> None:
+        merged = merge_chunks([_doc("same text"), _doc("same text")])
+        assert len(merged) == 1
+
+    def test_merges_by_start_index(self) -> None:
+        first = _doc("abcdefghij", start_index=0)
+        second = _doc("hijklmnop", start_index=7)
+        merged = merge_chunks([second, first])
+        assert [d.page_content for d in merged] == ["abcdefghijklmnop"]
+        assert merged[0].metadata["start_index"] == 0
+
+    def test_merges_textual_overlap_without_start_index(self) -> None:
+        overlap = "x" * 30
+        merged = merge_chunks([_doc("head " + overlap), _doc(overlap + " tail")])
+        assert [d.page_content for d in merged] == ["head " + overlap + " tail"]
+
+    def test_keeps_best_score(self) -> None:
+        merged = merge_chunks(
+            [_doc("abc", 0.2, start_index=0), _doc("cde", 0.9, start_index=2)]
+        )
+        assert merged[0].metadata["relevance_score"] == 0.9
+
+    def test_different_sources_not_merged(self) -> None:
+        a = _doc("abcdef", start_index=0)
+        b = Document(
+            page_content="defgh", metadata={"source": "b.pdf", "start_index": 3}
+        )
+        assert len(merge_chunks([a, b])) == 2
+
+
+class TestPackContext:
+    def test_orders_by_score(self) -> None:
+        packed = pack_context(
+            [_doc("low", 0.1, page=1), _doc("high", 0.9, page=2)], 1000
+        )
+        assert packed.text.index("high") < packed.text.index("low")
+        assert packed.tokens == estimate_tokens(packed.text)
+
+    def test_respects_budget(self) -> None:
+        docs = [_doc(("word " * 400).strip(), 1 - i / 10, page=i) for i in range(5)]
+        packed = pack_context(docs, 600)
+        assert packed.tokens <= 600
+        assert 1 <= len(packed.documents) < 5
+
+    def test_empty(self) -> None:
+        packed = pack_context([], 100)
+        assert packed.text == ""
+        assert packed.tokens == 0
@@ -0,0 +1,151 @@
+"""Tests for the fused routing node and for turns answered from cache."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from langchain.agents import create_agent
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.ai_assistant.core import cache as cache_mod
+from src.ai_assistant.graph import graph as graph_mod
+from src.ai_assistant.graph.state import RAGState, RouteDecision
+
+
+@pytest.fixture
+def router(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    router = MagicMock()
+    monkeypatch.setattr(graph_mod, "aget_router", AsyncMock(return_value=router))
+    monkeypatch.setattr(cache_mod, "_get_client", lambda: None)
+    return router
+
+
+class TestRouteNode:
+    async def test_one_call_sets_route_and_queries(self, router: MagicMock) -> None:
+        router.ainvoke = AsyncMock(
+            return_value=RouteDecision(
+                use_rag=True,
+                search_query=" vacation policy 2024 ",
+                sub_queries=["vacation days", " ", "carry over rules"],
+            )
+        )
+        state = await graph_mod.node_route(
+            RAGState(query="Hi! What's our vacation policy?")
+        )
+
+        router.ainvoke.assert_awaited_once()
+        assert state.use_rag is True
+        assert state.query_optimized == "vacation policy 2024"
+        assert state.sub_queries == ["vacation days", "carry over rules"]
+
+    async def test_no_rag_route(self, router: MagicMock) -> None:
+        router.ainvoke = AsyncMock(
+            return_value=RouteDecision(use_rag=False, search_query="thanks")
+        )
+        state = await graph_mod.node_route(RAGState(query="thanks!"))
+        assert state.use_rag is False
+
+    async def test_failure_defaults_to_rag_with_original_query(
+        self, router: MagicMock
+    ) -> None:
+        router.ainvoke = AsyncMock(side_effect=ValueError("invalid JSON"))
+        state = await graph_mod.node_route(RAGState(query="What is X?"))
+        assert state.use_rag is True
+        assert state.query_optimized == "What is X?"
+        assert state.sub_queries == []
+
+
+@pytest.fixture
+def agent(monkeypatch: pytest.MonkeyPatch):
+    llm = GenericFakeChatModel(messages=iter([AIMessage("from the model")]))
+    agent = create_agent(llm, checkpointer=InMemorySaver())
+    monkeypatch.setattr(graph_mod, "aget_agent", AsyncMock(return_value=agent))
+    return agent
+
+
+class TestCachedTurns:
+    async def test_generate_cache_hit_is_recorded_in_thread(
+        self, agent, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(
+            graph_mod, "get_or_compute", AsyncMock(return_value={"answer": "cached"})
+        )
+        assert not await graph_mod.thread_has_history("t1")
+
+        state = await graph_mod.node_generate(
+            RAGState(query="What is X?", thread_id="t1", prompt="context + What is X?")
+        )
+
+        assert state.answer == "cached"
+        assert await graph_mod.thread_has_history("t1")
+        snapshot = await agent.aget_state({"configurable": {"thread_id": "t1"}})
+        assert [m.content for m in snapshot.values["messages"]] == [
+            "What is X?",
+            "cached",
+        ]
+        assert not snapshot.next
+
+    async def test_recorded_turn_is_history_for_the_agent(self, agent) -> None:
+        await graph_mod.record_turn("t1", "What is X?", "cached")
+        result = await agent.ainvoke(
+            {"messages": "And Y?"}, {"configurable": {"thread_id": "t1"}}
+        )
+        assert [m.content for m in result["messages"]] == [
+            "What is X?",
+            "cached",
+            "And Y?",
+            "from the model",
+        ]
+
+
+class _RecordingChatModel(GenericFakeChatModel):
+    """Fake chat model that keeps the messages of every call."""
+
+    calls: list = []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append(messages)
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+class TestEphemeralContext:
+    async def test_context_reaches_the_model_but_not_the_thread(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(graph_mod.config.rag, "ephemeral_context", True)
+        monkeypatch.setattr(graph_mod, "get_checkpointer", InMemorySaver)
+        monkeypatch.setattr(cache_mod, "_get_client", lambda: None)
+        llm = _RecordingChatModel(
+            messages=iter([AIMessage("X is a policy.")]), calls=[]
+        )
+        agent = graph_mod.build_agent(llm)
+        monkeypatch.setattr(graph_mod, "aget_agent", AsyncMock(return_value=agent))
+
+        context = graph_mod.rag_context_template.format(
+            context="X is the vacation policy."
+        )
+        state = await graph_mod.node_generate(
+            RAGState(
+                query="What is X?",
+                thread_id="t1",
+                prompt="X is the vacation policy. What is X?",
+                context=context,
+            )
+        )
+
+        assert state.answer == "X is a policy."
+        [messages] = llm.calls
+        assert isinstance(messages[0], SystemMessage)
+        assert messages[0].content.endswith(context)
+        assert [(type(m), m.content) for m in messages[1:]] == [
+            (HumanMessage, "What is X?")
+        ]
+
+        snapshot = await agent.aget_state({"configurable": {"thread_id": "t1"}})
+        history = snapshot.values["messages"]
+        assert [(type(m), m.content) for m in history] == [
+            (HumanMessage, "What is X?"),
+            (AIMessage, "X is a policy."),
+        ]
+        assert all("vacation policy" not in str(m.content) for m in history)
@@ -0,0 +1,86 @@
+"""Tests for the inference sidecar and its client, over an in-process transport."""
+
+import httpx
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.ai_assistant.core.config import EmbeddingProfile
+from src.ai_assistant.inference.client import (
+    InferenceClient,
+    RemoteEmbeddings,
+    RemoteReranker,
+)
+from src.ai_assistant.inference.server import create_app
+from src.ai_assistant.rag.embeddings import BatchedEmbeddings
+from src.ai_assistant.rag.reranker import BatchedReranker
+
+
+class _LengthEmbeddings(Embeddings):
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+class _LengthRanker:
+    llm_model = object()
+
+    def rerank(self, request):
+        return sorted(request.passages, key=lambda p: -len(p["text"]))
+
+
+@pytest.fixture
+def sidecar():
+    base = _LengthEmbeddings()
+    embeddings = BatchedEmbeddings(
+        base, EmbeddingProfile(query_prefix="query: ", passage_prefix="passage: ")
+    )
+    reranker = BatchedReranker(ranker=_LengthRanker())
+    app = create_app(embeddings, reranker)
+    client = InferenceClient("http://inference", transport=httpx.ASGITransport(app=app))
+    yield client, base
+    embeddings.close()
+    reranker.close()
+
+
+class TestInferenceSidecar:
+    async def test_queries_are_prefixed_and_batched(self, sidecar) -> None:
+        client, base = sidecar
+        vectors = (await client.call("embed", {"texts": ["a", "bb"], "kind": "query"}))[
+            "vectors"
+        ]
+
+        assert vectors == [[8.0, 1.0], [9.0, 1.0]]
+        assert base.calls == [["query: a", "query: bb"]]
+
+    async def test_remote_embeddings_passages(self, sidecar) -> None:
+        client, base = sidecar
+        vectors = await RemoteEmbeddings(client).aembed_documents(["abc"])
+
+        assert vectors == [[12.0, 1.0]]
+        assert base.calls == [["passage: abc"]]
+
+    async def test_remote_reranker_orders_and_trims(self, sidecar) -> None:
+        client, _ = sidecar
+        docs = [
+            Document("a", metadata={"source": "x"}),
+            Document("aaa", metadata={"source": "y"}),
+        ]
+
+        ranked = await RemoteReranker(client).rerank("q", docs, top_n=1)
+
+        assert [d.page_content for d in ranked] == ["aaa"]
+        assert ranked[0].metadata["source"] == "y"
+        assert client.in_flight == 0
+
+    async def test_invalid_body_is_rejected(self, sidecar) -> None:
+        client, _ = sidecar
+        response = await client._get_client().post("/embed", content=b"\xc1")
+
+        assert response.status_code == 400
@@ -0,0 +1,55 @@
+"""Tests for logger setup, sampling and the background stdout sink."""
+
+import io
+import json
+
+import pytest
+
+from src.ai_assistant.core import logger as logging_setup
+from src.ai_assistant.core.config import LogConfig
+
+
+@pytest.fixture
+def restore_logger():
+    yield
+    logging_setup.setup_logger()
+
+
+class TestSampled:
+    def test_rate_one_keeps_every_call(self, restore_logger) -> None:
+        logging_setup.setup_logger(LogConfig(file_enabled=False, sample_rate=1.0))
+        assert all(
+            logging_setup.sampled() is logging_setup.loguru_logger for _ in range(100)
+        )
+
+    def test_rate_zero_drops_every_call(self, restore_logger) -> None:
+        logging_setup.setup_logger(LogConfig(file_enabled=False, sample_rate=0.0))
+        assert all(
+            logging_setup.sampled() is logging_setup._null_logger for _ in range(100)
+        )
+        logging_setup.sampled().debug("dropped {}", object())
+
+
+class TestBackgroundStream:
+    def test_lines_written_in_order_on_stop(self) -> None:
+        out = io.StringIO()
+        stream = logging_setup.BackgroundStream(out)
+        for i in range(1000):
+            stream.write(f"{i}\n")
+        stream.stop()
+        assert out.getvalue().splitlines() == [str(i) for i in range(1000)]
+
+    def test_json_records_through_setup(self, restore_logger, monkeypatch) -> None:
+        out = io.StringIO()
+        monkeypatch.setattr(logging_setup.sys, "stdout", out)
+        logger = logging_setup.setup_logger(
+            LogConfig(level="INFO", file_enabled=False, json_format=True)
+        )
+        logger.debug("filtered out")
+        logger.info("indexed {} chunks", 3)
+        logger.remove()
+
+        records = [json.loads(line)["record"] for line in out.getvalue().splitlines()]
+        messages = [record["message"] for record in records]
+        assert "indexed 3 chunks" in messages
+        assert "filtered out" not in messages
@@ -0,0 +1,106 @@
+"""Tests for Prometheus instrumentation."""
+
+import uuid
+
+import httpx
+from fastapi import FastAPI
+from httpx import ASGITransport
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from prometheus_client import REGISTRY
+
+from src.ai_assistant.api import metrics as metrics_api
+from src.ai_assistant.api.metrics import router as metrics_router
+from src.ai_assistant.core.metrics import LLMMetricsCallback, timed_node
+from src.ai_assistant.core.middleware import MetricsMiddleware
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str) -> dict:
+        return {"id": item_id}
+
+    return app
+
+
+class TestMetricsMiddleware:
+    async def test_labels_by_route_template(self) -> None:
+        labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+        before = _sample("http_request_duration_seconds_count", **labels)
+
+        transport = ASGITransport(app=_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            await ac.get("/items/a")
+            await ac.get("/items/b")
+            response = await ac.get("/metrics")
+
+        assert _sample("http_request_duration_seconds_count", **labels) == before + 2
+        assert response.status_code == 200
+        assert "http_request_duration_seconds_bucket" in response.text
+
+    async def test_unmatched_route_is_collapsed(self) -> None:
+        labels = {"method": "GET", "route": "unmatched", "status": "404"}
+        before = _sample("http_request_duration_seconds_count", **labels)
+
+        transport = ASGITransport(app=_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            await ac.get("/nope/1")
+            await ac.get("/nope/2")
+
+        assert _sample("http_request_duration_seconds_count", **labels) == before + 2
+
+
+class TestInstrumentation:
+    async def test_timed_node_records_duration(self) -> None:
+        async def node(state: dict) -> dict:
+            return state
+
+        before = _sample("rag_graph_node_duration_seconds_count", node="test_node")
+        assert await timed_node("test_node", node)({"a": 1}) == {"a": 1}
+        assert (
+            _sample("rag_graph_node_duration_seconds_count", node="test_node")
+            == before + 1
+        )
+
+    def test_llm_callback_records_tokens(self) -> None:
+        callback = LLMMetricsCallback("test-model")
+        run_id = uuid.uuid4()
+        message = AIMessage(
+            "hi",
+            usage_metadata={
+                "input_tokens": 120,
+                "output_tokens": 30,
+                "total_tokens": 150,
+            },
+        )
+
+        callback.on_chat_model_start({}, [[]], run_id=run_id)
+        callback.on_llm_end(
+            LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id
+        )
+
+        assert _sample("llm_tokens_sum", model="test-model", kind="input") == 120
+        assert _sample("llm_tokens_sum", model="test-model", kind="output") == 30
+        assert _sample("llm_request_duration_seconds_count", model="test-model") == 1
+
+
+class TestMultiprocessRegistry:
+    def test_single_process_uses_default_registry(self, monkeypatch) -> None:
+        monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+        assert metrics_api._registry() is REGISTRY
+
+    def test_gunicorn_workers_aggregate_from_directory(
+        self, monkeypatch, tmp_path
+    ) -> None:
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        registry = metrics_api._registry()
+        assert registry is not REGISTRY
+        assert list(registry.collect()) == []  # no worker has written samples yet
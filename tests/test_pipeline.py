@@ -0,0 +1,286 @@
+"""Tests for multi-query retrieval against an in-memory Qdrant."""
+
+import uuid
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.ai_assistant.core.scheduler import Overloaded
+from src.ai_assistant.rag import pipeline as pipeline_mod
+from src.ai_assistant.rag.embeddings import BatchedEmbeddings
+from src.ai_assistant.rag.reranker import BatchedReranker
+from src.ai_assistant.rag.splitter import StructureSplitter
+
+TOPICS = ["vacation", "salary", "parking", "security"]
+
+
+class _TopicEmbeddings(Embeddings):
+    """One dimension per topic word, so each query finds its own chunks."""
+
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(texts)
+        return [[float(topic in t) + 0.01 for topic in TOPICS] for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+class _KeepOrderRanker:
+    llm_model = object()
+
+    def rerank(self, request):
+        return request.passages
+
+
+@pytest.fixture
+def pipeline(monkeypatch: pytest.MonkeyPatch):
+    base = _TopicEmbeddings()
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        "test",
+        vectors_config=models.VectorParams(
+            size=len(TOPICS), distance=models.Distance.COSINE
+        ),
+    )
+    store = QdrantVectorStore(
+        client=client, collection_name="test", embedding=BatchedEmbeddings(base)
+    )
+    store.add_documents(
+        [
+            Document(f"{topic} rule {i}", metadata={"chunk_id": f"{topic}-{i}"})
+            for topic in TOPICS
+            for i in range(3)
+        ],
+        ids=[
+            pipeline_mod.point_id(f"{topic}-{i}") for topic in TOPICS for i in range(3)
+        ],
+    )
+    base.calls.clear()
+
+    monkeypatch.setattr(
+        pipeline_mod,
+        "BatchedReranker",
+        lambda: BatchedReranker(ranker=_KeepOrderRanker()),
+    )
+    rag = pipeline_mod.RAGPipeline(store=store)
+    yield rag, base
+    rag.re_ranker.close()
+    store.embeddings.close()
+
+
+class TestRetrieveMulti:
+    async def test_covers_every_sub_query_with_one_embedding_batch(
+        self, pipeline
+    ) -> None:
+        rag, base = pipeline
+        docs = await rag.retrieve_multi(
+            "vacation salary", ["vacation days", "salary payment"], k=20
+        )
+
+        topics = {doc.metadata["chunk_id"].split("-")[0] for doc in docs}
+        assert {"vacation", "salary"} <= topics
+        assert len(base.calls) == 1 and len(base.calls[0]) == 3
+
+    async def test_merged_candidates_are_unique(self, pipeline) -> None:
+        rag, _ = pipeline
+        docs = await rag.retrieve_multi("parking", ["parking", "parking spots"], k=20)
+
+        ids = [doc.metadata["chunk_id"] for doc in docs]
+        assert len(ids) == len(set(ids))
+
+    async def test_without_sub_queries_uses_single_retrieve(self, pipeline) -> None:
+        rag, base = pipeline
+        docs = await rag.retrieve_multi("security", [], k=2)
+
+        assert len(docs) == 2
+        assert base.calls == [["security"]]
+
+
+class TestNeighbors:
+    async def test_index_links_neighbors_and_expands_by_id(
+        self, pipeline, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        rag, _ = pipeline
+        rag.splitter = StructureSplitter(8, 0, lambda text: len(text.split()))
+        paragraphs = [f"vacation part {i} of the long policy text" for i in range(3)]
+        await rag.index_documents(
+            [Document("\n\n".join(paragraphs), metadata={"source": "policy.txt"})]
+        )
+
+        records, _ = rag.vector_store.client.scroll(
+            "test", limit=100, with_payload=True
+        )
+        chunks = sorted(
+            (
+                r.payload["metadata"]
+                for r in records
+                if r.payload["metadata"].get("source")
+            ),
+            key=lambda m: m["chunk_index"],
+        )
+        assert len(chunks) == 3
+        assert "prev_chunk_id" not in chunks[0] and "next_chunk_id" not in chunks[2]
+        assert chunks[1]["prev_chunk_id"] == chunks[0]["chunk_id"]
+        assert chunks[1]["next_chunk_id"] == chunks[2]["chunk_id"]
+
+        hit = Document(paragraphs[1], metadata={**chunks[1], "relevance_score": 0.9})
+        neighbors = await rag.get_neighbors([hit])
+        assert sorted(d.page_content for d in neighbors) == [
+            paragraphs[0],
+            paragraphs[2],
+        ]
+        assert all(d.metadata["relevance_score"] == 0.9 for d in neighbors)
+
+        monkeypatch.setattr(pipeline_mod.config.rag, "expand_neighbors", True)
+        assert len(await rag._expand([hit])) == 3
+
+
+class TestFailedIndexing:
+    @pytest.mark.parametrize(
+        "error",
+        [RuntimeError("qdrant down"), Overloaded("ingest", "timeout", retry_after=1.0)],
+    )
+    async def test_reupload_failure_keeps_previous_chunks(
+        self, pipeline, monkeypatch: pytest.MonkeyPatch, error: Exception
+    ) -> None:
+        rag, _ = pipeline
+        rag.splitter = StructureSplitter(8, 0, lambda text: len(text.split()))
+
+        def policy(*parts: str) -> list[Document]:
+            text = "\n\n".join(f"{part} paragraph of the policy text" for part in parts)
+            return [Document(text, metadata={"source": "policy.txt"})]
+
+        def policy_chunks() -> set[str]:
+            records, _ = rag.vector_store.client.scroll(
+                "test", limit=100, with_payload=True
+            )
+            return {
+                r.payload["page_content"]
+                for r in records
+                if r.payload["metadata"].get("source") == "policy.txt"
+            }
+
+        assert await rag.index_documents(policy("first", "second"))
+        before = policy_chunks()
+
+        add = rag.vector_store.aadd_documents
+        calls = 0
+
+        async def fail_on_third_batch(**kwargs):
+            nonlocal calls
+            calls += 1
+            if calls == 3:
+                raise error
+            return await add(**kwargs)
+
+        monkeypatch.setattr(rag.vector_store, "aadd_documents", fail_on_third_batch)
+        # Same text as before for the first chunk, new text for the rest.
+        if isinstance(error, Overloaded):
+            with pytest.raises(Overloaded):
+                await rag.index_documents(
+                    policy("first", "third", "fourth"), batch_size=1
+                )
+        else:
+            assert not await rag.index_documents(
+                policy("first", "third", "fourth"), batch_size=1
+            )
+
+        assert calls == 3
+        assert policy_chunks() == before
+
+
+class TestParentDocuments:
+    @pytest.fixture
+    def parent_mode(self, pipeline, monkeypatch: pytest.MonkeyPatch, tmp_path):
+        rag, _ = pipeline
+        monkeypatch.setattr(pipeline_mod.config.rag, "parent_documents", True)
+        monkeypatch.setattr(pipeline_mod.config.rag, "docs_folder", str(tmp_path))
+        words = lambda text: len(text.split())  # noqa: E731
+        rag.splitter = StructureSplitter(24, 0, words)
+        rag.child_splitter = StructureSplitter(8, 0, words)
+        return rag
+
+    async def test_children_are_searched_and_parents_returned(
+        self, parent_mode
+    ) -> None:
+        rag = parent_mode
+        parents = [
+            "\n\n".join(f"{topic} detail {i} of the handbook text" for i in range(3))
+            for topic in ("parking", "security")
+        ]
+        source = f"{pipeline_mod.config.rag.docs_folder}/handbook.txt"
+        await rag.index_documents(
+            [Document("\n\n".join(parents), metadata={"source": source})]
+        )
+
+        records, _ = rag.vector_store.client.scroll(
+            "test", limit=100, with_payload=True
+        )
+        children = [
+            r.payload for r in records if r.payload["metadata"].get("parent_id")
+        ]
+        assert len(children) == 6
+        assert all(len(c["page_content"].split()) <= 8 for c in children)
+
+        docs = await rag.retrieve("parking", k=6)
+        contents = [d.page_content for d in docs]
+        assert contents.count(parents[0]) == 1  # three matching children, one parent
+        assert parents[1] not in contents
+        parent = docs[contents.index(parents[0])]
+        assert "relevance_score" in parent.metadata
+
+        assert await rag.delete_documents_by_name("handbook.txt")
+        assert (
+            rag.parent_store.get([pipeline_mod.point_id(parent.metadata["chunk_id"])])
+            == {}
+        )
+        records, _ = rag.vector_store.client.scroll(
+            "test", limit=100, with_payload=True
+        )
+        assert not [r for r in records if r.payload["metadata"].get("parent_id")]
+
+    async def test_chunks_without_parent_stand_in(self, parent_mode) -> None:
+        docs = await parent_mode.retrieve("vacation", k=2)
+        assert [d.metadata["chunk_id"].split("-")[0] for d in docs] == [
+            "vacation",
+            "vacation",
+        ]
+
+    async def test_document_list_is_not_crowded_out(self, parent_mode) -> None:
+        rag = parent_mode
+        folder = pipeline_mod.config.rag.docs_folder
+        await rag.index_documents(
+            [
+                Document(
+                    "\n\n".join(
+                        f"{name} part {i} of a long text" for i in range(parts)
+                    ),
+                    metadata={"source": f"{folder}/{name}.txt"},
+                )
+                for name, parts in (("big", 200), ("other", 1))
+            ]
+        )
+
+        # Source-less points sorted first fill the whole first page.
+        rag.vector_store.client.upsert(
+            "test",
+            [
+                models.PointStruct(
+                    id=str(uuid.UUID(int=i)), vector=[0.0] * len(TOPICS), payload={}
+                )
+                for i in range(10)
+            ],
+        )
+
+        documents = await rag.get_documents(limit=2)
+        assert {d["metadata"]["source"].split("/")[-1] for d in documents} == {
+            "big.txt",
+            "other.txt",
+        }
@@ -0,0 +1,53 @@
+"""Tests for cached dependency probes."""
+
+import asyncio
+
+from src.ai_assistant.core.probes import CachedProbe
+
+
+def _counting_probe(ttl: float, delay: float = 0.0, fail: bool = False):
+    calls = 0
+
+    async def check() -> str | None:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(delay)
+        if fail:
+            raise ConnectionError("refused")
+        return None
+
+    probe = CachedProbe("test", check, ttl_seconds=ttl, timeout_seconds=0.5)
+    return probe, lambda: calls
+
+
+class TestCachedProbe:
+    async def test_result_reused_within_ttl(self) -> None:
+        probe, calls = _counting_probe(ttl=60)
+        for _ in range(5):
+            assert (await probe.result()).ok
+        assert calls() == 1
+
+    async def test_concurrent_callers_share_check(self) -> None:
+        probe, calls = _counting_probe(ttl=60, delay=0.02)
+        results = await asyncio.gather(*(probe.result() for _ in range(10)))
+        assert all(r.ok for r in results)
+        assert calls() == 1
+
+    async def test_rechecks_after_ttl(self) -> None:
+        probe, calls = _counting_probe(ttl=0)
+        await probe.result()
+        await probe.result()
+        assert calls() == 2
+
+    async def test_failure_reported(self) -> None:
+        probe, _ = _counting_probe(ttl=60, fail=True)
+        result = await probe.result()
+        assert not result.ok
+        assert result.detail == "refused"
+
+    async def test_timeout_reported(self) -> None:
+        probe, _ = _counting_probe(ttl=60, delay=5)
+        probe.timeout_seconds = 0.01
+        result = await probe.result()
+        assert not result.ok
+        assert "timed out" in result.detail
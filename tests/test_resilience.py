@@ -0,0 +1,139 @@
+"""Tests for the LLM call guard: deadlines, concurrency cap, hedging, breaker."""
+
+import asyncio
+
+import pytest
+
+from src.ai_assistant.core.resilience import (
+    CircuitBreaker,
+    ConcurrencyLimiter,
+    LLMGuard,
+    LLMUnavailable,
+)
+
+
+def _guard(
+    limit: int = 4,
+    queue_timeout: float = 1.0,
+    failure_threshold: int = 2,
+    reset_seconds: float = 60.0,
+    hedge_after_ms: float = 0.0,
+) -> LLMGuard:
+    return LLMGuard(
+        ConcurrencyLimiter(limit, queue_timeout),
+        CircuitBreaker(failure_threshold, reset_seconds),
+        hedge_after_ms,
+    )
+
+
+async def _fail() -> str:
+    raise ConnectionError("upstream 503")
+
+
+class TestLLMGuard:
+    async def test_deadline_raises_unavailable(self) -> None:
+        guard = _guard()
+        with pytest.raises(LLMUnavailable) as exc:
+            await guard.call("gate", lambda: asyncio.sleep(1), timeout=0.01)
+        assert exc.value.reason == "timeout"
+
+    async def test_queue_timeout_when_all_slots_busy(self) -> None:
+        guard = _guard(limit=1, queue_timeout=0.01)
+        release = asyncio.Event()
+        busy = asyncio.create_task(guard.call("generate", release.wait, timeout=5))
+        await asyncio.sleep(0)
+
+        with pytest.raises(LLMUnavailable) as exc:
+            await guard.call("gate", lambda: asyncio.sleep(0), timeout=5)
+        assert exc.value.reason == "queue_timeout"
+        assert guard.breaker.state == "closed"  # rejections are not upstream failures
+
+        release.set()
+        await busy
+
+    async def test_breaker_opens_and_rejects_without_calling(self) -> None:
+        guard = _guard(failure_threshold=2)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await guard.call("rewrite", _fail, timeout=1)
+        assert guard.breaker.state == "open"
+
+        calls = 0
+
+        async def counted() -> str:
+            nonlocal calls
+            calls += 1
+            return "ok"
+
+        with pytest.raises(LLMUnavailable) as exc:
+            await guard.call("rewrite", counted, timeout=1)
+        assert exc.value.reason == "circuit_open"
+        assert calls == 0
+
+    async def test_half_open_trial_closes_breaker(self) -> None:
+        guard = _guard(failure_threshold=1, reset_seconds=0.01)
+        with pytest.raises(ConnectionError):
+            await guard.call("gate", _fail, timeout=1)
+        await asyncio.sleep(0.02)
+
+        async def ok() -> str:
+            return "USE_RAG"
+
+        assert await guard.call("gate", ok, timeout=1) == "USE_RAG"
+        assert guard.breaker.state == "closed"
+
+    async def test_older_call_does_not_free_trial_slot(self) -> None:
+        guard = _guard(failure_threshold=1, reset_seconds=0.01)
+        older_done, trial_done = asyncio.Event(), asyncio.Event()
+
+        async def fail_later() -> str:
+            await older_done.wait()
+            raise ConnectionError("upstream 503")
+
+        older = asyncio.create_task(guard.call("generate", fail_later, timeout=5))
+        await asyncio.sleep(0)
+        with pytest.raises(ConnectionError):
+            await guard.call("gate", _fail, timeout=1)
+        await asyncio.sleep(0.02)
+        trial = asyncio.create_task(guard.call("gate", trial_done.wait, timeout=5))
+        await asyncio.sleep(0)
+        assert guard.breaker.state == "half_open"
+
+        older_done.set()
+        with pytest.raises(ConnectionError):
+            await older
+        await asyncio.sleep(0.02)
+        with pytest.raises(LLMUnavailable) as exc:
+            await guard.call("gate", lambda: asyncio.sleep(0), timeout=1)
+        assert exc.value.reason == "circuit_open"  # the trial is still running
+
+        trial_done.set()
+        await trial
+
+    async def test_hedge_answers_when_first_request_stalls(self) -> None:
+        guard = _guard(hedge_after_ms=10)
+        attempts = 0
+
+        async def flaky() -> str:
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                await asyncio.sleep(5)
+            return f"attempt {attempts}"
+
+        assert await guard.call("gate", flaky, timeout=1, hedge=True) == "attempt 2"
+        await asyncio.sleep(0)
+        assert guard.limiter._get_semaphore()._value == 4  # both slots returned
+
+    async def test_no_hedge_without_free_slot(self) -> None:
+        guard = _guard(limit=1, hedge_after_ms=1)
+        attempts = 0
+
+        async def slow() -> str:
+            nonlocal attempts
+            attempts += 1
+            await asyncio.sleep(0.02)
+            return "done"
+
+        assert await guard.call("rewrite", slow, timeout=1, hedge=True) == "done"
+        assert attempts == 1
@@ -0,0 +1,108 @@
+"""Tests for admission control and chat-over-ingest priority."""
+
+import asyncio
+
+import pytest
+
+from src.ai_assistant.core.scheduler import Overloaded, PriorityScheduler
+
+
+def _scheduler(
+    chat_limit: int = 2,
+    chat_max_queue: int = 4,
+    ingest_limit: int = 1,
+    ingest_max_queue: int = 2,
+    queue_timeout: float = 1.0,
+    ingest_max_defer_seconds: float = 10.0,
+) -> PriorityScheduler:
+    return PriorityScheduler(
+        chat_limit,
+        chat_max_queue,
+        queue_timeout,
+        ingest_limit,
+        ingest_max_queue,
+        queue_timeout,
+        ingest_max_defer_seconds,
+    )
+
+
+async def _hold(
+    scheduler: PriorityScheduler, work_class, release: asyncio.Event, log: list
+):
+    async with scheduler.slot(work_class):
+        log.append(work_class)
+        await release.wait()
+
+
+class TestPriorityScheduler:
+    async def test_ingest_waits_while_chat_runs(self) -> None:
+        scheduler = _scheduler()
+        release_chat, release_ingest, log = asyncio.Event(), asyncio.Event(), []
+        chat = asyncio.create_task(_hold(scheduler, "chat", release_chat, log))
+        await asyncio.sleep(0)
+        ingest = asyncio.create_task(_hold(scheduler, "ingest", release_ingest, log))
+        await asyncio.sleep(0.01)
+        assert log == ["chat"]
+
+        release_chat.set()
+        await chat
+        await asyncio.sleep(0)
+        assert log == ["chat", "ingest"]
+        release_ingest.set()
+        await ingest
+
+    async def test_chat_waiter_goes_before_earlier_ingest_waiter(self) -> None:
+        scheduler = _scheduler(chat_limit=1)
+        release, log = asyncio.Event(), []
+        first = asyncio.create_task(_hold(scheduler, "chat", release, log))
+        await asyncio.sleep(0)
+        ingest = asyncio.create_task(_hold(scheduler, "ingest", release, log))
+        await asyncio.sleep(0)
+        chat = asyncio.create_task(_hold(scheduler, "chat", release, log))
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(first, ingest, chat)
+        assert log == ["chat", "chat", "ingest"]
+
+    async def test_ingest_is_not_starved(self) -> None:
+        scheduler = _scheduler(ingest_max_defer_seconds=0.02)
+        release, log = asyncio.Event(), []
+        chat = asyncio.create_task(_hold(scheduler, "chat", release, log))
+        await asyncio.sleep(0)
+
+        async with scheduler.slot("ingest"):
+            assert log == ["chat"]  # admitted while chat still runs
+        release.set()
+        await chat
+
+    async def test_full_queue_is_rejected(self) -> None:
+        scheduler = _scheduler(ingest_max_queue=1)
+        release, log = asyncio.Event(), []
+        running = asyncio.create_task(_hold(scheduler, "ingest", release, log))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(_hold(scheduler, "ingest", release, log))
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded) as exc:
+            scheduler.admit("ingest")
+        assert exc.value.reason == "queue_full"
+        assert exc.value.retry_after >= 1
+        release.set()
+        await asyncio.gather(running, queued)
+
+    async def test_queue_timeout_frees_the_place(self) -> None:
+        scheduler = _scheduler(chat_limit=1, queue_timeout=0.01)
+        release, log = asyncio.Event(), []
+        running = asyncio.create_task(_hold(scheduler, "chat", release, log))
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded) as exc:
+            async with scheduler.slot("chat"):
+                pass
+        assert exc.value.reason == "queue_timeout"
+
+        release.set()
+        await running
+        async with scheduler.slot("chat"):
+            pass  # slot count intact after the timeout
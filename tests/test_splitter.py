@@ -1,8 +1,29 @@
 """Tests for RAG splitter."""
 
+import zipfile
+
+import pytest
 from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.ai_assistant.rag import splitter as splitter_mod
+from src.ai_assistant.rag.loaders import DocxLoader
+from src.ai_assistant.rag.splitter import (
+    StructureSplitter,
+    TokenCounter,
+    get_splitter,
+    heading_level,
+    is_table_row,
+)
+
+
+def _words(n: int, word: str = "lorem") -> str:
+    return " ".join([word] * n)
+
 
-from src.ai_assistant.rag.splitter import get_splitter
+def _small_splitter(chunk_size: int = 40, chunk_overlap: int = 0) -> StructureSplitter:
+    # One token per word keeps sizes easy to reason about.
+    return StructureSplitter(chunk_size, chunk_overlap, lambda text: len(text.split()))
 
 
 def test_get_splitter_returns_splitter() -> None:
@@ -15,12 +36,12 @@ def test_get_splitter_returns_splitter() -> None:
 def test_split_documents_respects_chunk_size() -> None:
     splitter = get_splitter()
     # Create a document longer than chunk_size
-    long_text = "a " * 800  # ~1600 chars
+    long_text = "a " * 4000
     docs = [Document(page_content=long_text, metadata={"source": "test.txt"})]
     chunks = splitter.split_documents(docs)
-    assert len(chunks) >= 1
+    assert len(chunks) > 1
     for chunk in chunks:
-        assert len(chunk.page_content) <= splitter._chunk_size + splitter._chunk_overlap
+        assert splitter._length_function(chunk.page_content) <= splitter._chunk_size
 
 
 def test_split_documents_preserves_metadata() -> None:
@@ -44,3 +65,162 @@ def test_split_short_document_single_chunk() -> None:
     chunks = splitter.split_documents([short])
     assert len(chunks) == 1
     assert chunks[0].page_content == "Short text."
+
+
+def test_recursive_splitter_setting(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(splitter_mod.config.rag, "splitter", "recursive")
+    splitter = get_splitter()
+    assert isinstance(splitter, RecursiveCharacterTextSplitter)
+    assert splitter._chunk_size == splitter_mod.config.rag.chunk_size
+
+
+def test_chunk_size_fits_embedding_model(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(splitter_mod.config.rag, "chunk_tokens", None)
+    profile = splitter_mod.config.rag.embedding_profile
+    assert splitter_mod.chunk_tokens() < profile.max_seq_length
+
+    monkeypatch.setattr(splitter_mod.config.rag, "chunk_tokens", 200)
+    assert get_splitter()._chunk_size == 200
+
+
+class TestStructure:
+    @pytest.mark.parametrize(
+        ("line", "level"),
+        [
+            ("## Vacation policy", 2),
+            ("3 Travel expenses", 1),
+            ("2.1 Carry-over rules", 2),
+            ("GENERAL TERMS", 1),
+            ("The policy applies to everyone.", None),
+            ("2024 was a good year", None),
+            ("Note: see below:", None),
+        ],
+    )
+    def test_heading_level(self, line: str, level: int | None) -> None:
+        assert heading_level(line) == level
+
+    @pytest.mark.parametrize(
+        ("line", "table"),
+        [
+            ("EU | 25 | 5", True),
+            ("Region   Days   Carry-over", True),
+            ("Q1 2024 1,200 3.4%", True),
+            ("Employees get 25 days of leave in 2024.", False),
+        ],
+    )
+    def test_table_row(self, line: str, table: bool) -> None:
+        assert is_table_row(line) is table
+
+    def test_chunks_start_at_headings(self) -> None:
+        text = f"1 Intro\n{_words(30)}\n\n2 Vacation\n{_words(30)}"
+        chunks = _small_splitter().split_documents(
+            [Document(text, metadata={"source": "a"})]
+        )
+
+        assert [c.page_content.split("\n")[0] for c in chunks] == [
+            "1 Intro",
+            "2 Vacation",
+        ]
+        assert [c.metadata["section"] for c in chunks] == ["1 Intro", "2 Vacation"]
+        assert [c.metadata["section_index"] for c in chunks] == [1, 2]
+        assert [c.metadata["chunk_index"] for c in chunks] == [0, 1]
+
+    def test_short_sections_share_a_chunk(self) -> None:
+        text = "1 Intro\nShort.\n2 Scope\nAlso short."
+        chunks = _small_splitter().split_documents([Document(text)])
+        assert len(chunks) == 1
+        # Labelled by the last heading it holds, not the one before it.
+        assert chunks[0].metadata["section"] == "2 Scope"
+        assert chunks[0].metadata["section_index"] == 2
+
+    def test_table_is_not_split(self) -> None:
+        table = "\n".join(f"Row{i} | {i} | {i * 2}" for i in range(8))
+        text = f"{_words(30)}\n{table}\n{_words(10)}"
+        chunks = _small_splitter().split_text(text)
+
+        assert any(table in chunk for chunk in chunks)
+
+    def test_overlap_repeats_whole_paragraphs(self) -> None:
+        paragraphs = [_words(15, f"p{i}") for i in range(4)]
+        chunks = _small_splitter(chunk_overlap=15).split_text("\n\n".join(paragraphs))
+
+        assert chunks[0].endswith(paragraphs[1])
+        assert chunks[1].startswith(paragraphs[1])
+
+    def test_oversized_paragraph_falls_back(self) -> None:
+        splitter = _small_splitter(chunk_size=10)
+        text = _words(35)
+        chunks = splitter.split_documents([Document(text)])
+
+        assert len(chunks) == 4
+        for chunk in chunks:
+            assert splitter._length_function(chunk.page_content) <= 10
+            start = chunk.metadata["start_index"]
+            assert text[start : start + len(chunk.page_content)] == chunk.page_content
+
+    def test_section_carries_across_pages(self) -> None:
+        pages = [
+            Document(
+                f"1 Intro\n{_words(5)}\n1.1 Scope\n{_words(30)}",
+                metadata={"source": "a", "page": 0},
+            ),
+            Document(_words(20), metadata={"source": "a", "page": 1}),
+            Document(_words(20), metadata={"source": "b", "page": 0}),
+        ]
+        chunks = _small_splitter().split_documents(pages)
+
+        # "1.1 Scope" joins the short first chunk, so both chunks are labelled by it.
+        scope = "1 Intro > 1.1 Scope"
+        assert [c.metadata["section"] for c in chunks] == [scope, scope, ""]
+        assert [c.metadata["chunk_index"] for c in chunks] == [0, 1, 0]
+        assert (
+            chunks[1].metadata["page"] == 1 and chunks[1].metadata["start_index"] == 0
+        )
+
+
+class TestTokenCounter:
+    def test_uses_loaded_tokenizer(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        def tokenizer(text: str, **kwargs) -> dict:
+            return {"input_ids": list(text)}
+
+        monkeypatch.setattr(splitter_mod, "get_tokenizer", lambda: tokenizer)
+        assert TokenCounter()("abc") == 3
+
+    def test_estimates_without_model(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(splitter_mod, "get_tokenizer", lambda: None)
+        assert TokenCounter()("a" * 40) == splitter_mod.estimate_tokens("a" * 40)
+
+
+def _docx(path, body: str) -> None:
+    ns = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    styles = (
+        f'<w:styles {ns}><w:style w:type="paragraph" w:styleId="Berschrift2">'
+        '<w:name w:val="heading 2"/></w:style></w:styles>'
+    )
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(
+            "word/document.xml",
+            f"<w:document {ns}><w:body>{body}</w:body></w:document>",
+        )
+        archive.writestr("word/styles.xml", styles)
+
+
+def test_docx_loader_keeps_headings_and_tables(tmp_path) -> None:
+    def p(text: str, style: str = "") -> str:
+        props = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+        return f"<w:p>{props}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+    def row(*cells: str) -> str:
+        return "<w:tr>" + "".join(f"<w:tc>{p(c)}</w:tc>" for c in cells) + "</w:tr>"
+
+    path = tmp_path / "policy.docx"
+    _docx(
+        path,
+        p("Vacation", "Berschrift2")
+        + p("Days per region:")
+        + f"<w:tbl>{row('EU', '25')}{row('US', '20')}</w:tbl>",
+    )
+    [doc] = DocxLoader(str(path)).load()
+
+    assert doc.page_content == "## Vacation\n\nDays per region:\n\nEU | 25\nUS | 20"
+    assert doc.metadata == {"source": str(path)}
@@ -0,0 +1,56 @@
+"""Tests for the embedding profile recorded in the Qdrant collection."""
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.ai_assistant.rag import vector_store as vector_store_mod
+from src.ai_assistant.rag.vector_store import PROFILE_METADATA_KEY, collection_profile
+
+
+@pytest.fixture
+def client() -> QdrantClient:
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        "test",
+        vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE),
+    )
+    return client
+
+
+def _add_point(client: QdrantClient) -> None:
+    client.upsert("test", [models.PointStruct(id=1, vector=[1.0, 0.0], payload={})])
+
+
+def _recorded(client: QdrantClient) -> dict:
+    return client.get_collection("test").config.metadata[PROFILE_METADATA_KEY]
+
+
+class TestCollectionProfile:
+    def test_empty_collection_takes_configured_profile(self, client) -> None:
+        profile = collection_profile(client, "test")
+
+        assert profile.query_prefix == "query: "
+        assert _recorded(client)["passage_prefix"] == "passage: "
+
+    def test_unrecorded_collection_was_indexed_without_prefixes(self, client) -> None:
+        _add_point(client)
+        profile = collection_profile(client, "test")
+
+        assert (profile.query_prefix, profile.passage_prefix) == ("", "")
+        assert _recorded(client)["query_prefix"] == ""
+        assert profile.normalize is True  # only the prefixes come from the record
+
+    def test_recorded_prefixes_win_until_reindexed(
+        self, client, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        _add_point(client)
+        collection_profile(client, "test")
+        monkeypatch.setattr(
+            vector_store_mod.config.rag.embedding_profile, "query_prefix", "q: "
+        )
+        assert collection_profile(client, "test").query_prefix == ""
+
+        client.delete("test", points_selector=models.PointIdsList(points=[1]))
+        assert collection_profile(client, "test").query_prefix == "q: "
+        assert _recorded(client)["query_prefix"] == "q: "
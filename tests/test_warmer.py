@@ -0,0 +1,132 @@
+"""Tests for popular-query tracking and cache warming after document changes."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from langchain_core.documents import Document
+
+from src.ai_assistant.core import cache as cache_mod
+from src.ai_assistant.graph import graph as graph_mod
+from src.ai_assistant.graph import warmer as warmer_mod
+from src.ai_assistant.graph.state import RAGState
+from src.ai_assistant.graph.warmer import CacheWarmer
+
+
+@pytest.fixture
+def redis(monkeypatch: pytest.MonkeyPatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.aioredis.FakeRedis()
+    monkeypatch.setattr(cache_mod, "_get_client", lambda: redis)
+    monkeypatch.setattr(cache_mod, "_stats", {})
+    return redis
+
+
+def _warmer(**kwargs) -> CacheWarmer:
+    settings = dict(
+        enabled=True,
+        top_n=2,
+        rate_per_second=1000.0,
+        generate=False,
+        flush_every=100,
+        max_tracked=3,
+    )
+    return CacheWarmer(**{**settings, **kwargs})
+
+
+class TestPopularQueries:
+    async def test_record_flushes_normalized_counts(self, redis) -> None:
+        warmer = _warmer(flush_every=4)
+        for prompt in ["Vacation policy?", " vacation policy? ", "Expenses?"]:
+            warmer.record(prompt)
+        assert await cache_mod.get_popular_queries(5) == []
+
+        warmer.record("VACATION POLICY?")
+        await asyncio.sleep(0)
+        assert await cache_mod.get_popular_queries(5) == [
+            "vacation policy?",
+            "expenses?",
+        ]
+
+    async def test_ranking_is_trimmed(self, redis) -> None:
+        warmer = _warmer(max_tracked=2)
+        for prompt in ["a", "a", "a", "b", "b", "c"]:
+            warmer.record(prompt)
+        await warmer.flush()
+        assert await cache_mod.get_popular_queries(5) == ["a", "b"]
+
+    async def test_disabled_warmer_records_nothing(self, redis) -> None:
+        warmer = _warmer(enabled=False)
+        warmer.record("a")
+        warmer.schedule()
+        await warmer.flush()
+        assert await cache_mod.get_popular_queries(5) == []
+
+
+class TestWarm:
+    async def test_warms_top_queries_and_skips_no_rag(
+        self, redis, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        async def route(state: RAGState) -> RAGState:
+            state.use_rag = state.query != "thanks"
+            return state
+
+        retrieve = AsyncMock()
+        monkeypatch.setattr(warmer_mod, "node_route", route)
+        monkeypatch.setattr(warmer_mod, "node_retrieve", retrieve)
+        warmer = _warmer()
+        for prompt in ["thanks", "thanks", "policy", "expenses"]:
+            warmer.record(prompt)
+
+        warmer.schedule()
+        await warmer._task
+        assert [c.args[0].query for c in retrieve.await_args_list] == ["policy"]
+
+    async def test_schedule_during_run_coalesces(
+        self, redis, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        warm = AsyncMock()
+        monkeypatch.setattr(CacheWarmer, "warm", warm)
+        warmer = _warmer()
+        warmer.record("policy")
+
+        warmer.schedule()
+        warmer.schedule()
+        warmer.schedule()
+        await warmer._task
+        assert warm.await_count == 2  # the run in progress plus one more
+
+    async def test_failure_does_not_stop_the_run(
+        self, redis, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(
+            warmer_mod, "node_route", AsyncMock(side_effect=RuntimeError("down"))
+        )
+        warmer = _warmer()
+        await warmer.warm("policy")  # logged, not raised
+
+
+class TestRetrievalCache:
+    async def test_node_retrieve_reuses_cached_results(
+        self, redis, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        pipeline = MagicMock()
+        pipeline.retrieve = AsyncMock(
+            return_value=[Document(page_content="text", metadata={"source": "a.pdf"})]
+        )
+        monkeypatch.setattr(
+            graph_mod, "aget_rag_pipeline", AsyncMock(return_value=pipeline)
+        )
+
+        for _ in range(2):
+            state = await graph_mod.node_retrieve(
+                RAGState(query="q", query_optimized="policy")
+            )
+        pipeline.retrieve.assert_awaited_once()
+        assert state.docs == [
+            Document(page_content="text", metadata={"source": "a.pdf"})
+        ]
+
+        await cache_mod.delete_documents_cache()
+        await graph_mod.node_retrieve(RAGState(query="q", query_optimized="policy"))
+        assert pipeline.retrieve.await_count == 2